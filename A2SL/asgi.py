@@ -12,5 +12,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'A2SL.settings')
+# Serve the Gemini-bound endpoints with their async views (see ASYNC_VIEWS).
+# Only those endpoints should be routed here: sync views under ASGI share one
+# thread per process, so the rest of the site belongs on A2SL.wsgi (README)
+os.environ.setdefault('ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -17,14 +17,12 @@ load_dotenv()
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-# Below code added by RanjeetKumbhar01
-import nltk
+# NLTK corpora are provisioned with `python manage.py download_nltk_data`
+# and only loaded (never downloaded) at startup.
 NLTK_DATA_DIR = os.path.join(BASE_DIR, 'nltk_data')
-nltk.data.path.append(NLTK_DATA_DIR)
-# download nltk utilities
-nltk.download('averaged_perceptron_tagger')
-nltk.download('wordnet')
-nltk.download('omw-1.4')
+# Preload the tagger/WordNet when the app starts; set NLTK_PRELOAD=0 for
+# fast startup (resources then load on the first conversion).
+NLTK_PRELOAD = os.environ.get('NLTK_PRELOAD', '1').lower() not in ('0', 'false', 'no')
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/3.0/howto/deployment/checklist/
@@ -52,6 +50,7 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'study_companion.middleware.server_timing_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -61,6 +60,26 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-stage Server-Timing response headers (see study_companion.metrics);
+# defaults to on while DEBUG is on
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '1' if DEBUG else '0').lower() not in ('0', 'false', 'no')
+
+# Bearer token required by /metrics when set
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Bearer token that lets integrations call /api/convert/ without a session
+# or CSRF token; the endpoint is session-only when unset
+CONVERT_API_TOKEN = os.environ.get('CONVERT_API_TOKEN', '')
+
+# Route the Gemini-bound endpoints to their async views; A2SL/asgi.py turns
+# this on, so it only applies when served by an ASGI server
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', '0').lower() not in ('0', 'false', 'no')
+
+# Stream summaries to the page while an upload is processed. Needs the ASGI
+# server: on by default there; set it on WSGI workers too when the proxy sends
+# /summary/<id>/stream/ to the ASGI server. Otherwise the page polls
+SUMMARY_STREAM = os.environ.get('SUMMARY_STREAM', '1' if ASYNC_VIEWS else '0').lower() not in ('0', 'false', 'no')
+
 ROOT_URLCONF = 'A2SL.urls'
 
 TEMPLATES = [
@@ -143,5 +162,35 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 import os
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', 'PLACEHOLDER_KEY')
 
+# Caches
+# 'llm' holds Gemini responses keyed by a hash of model, prompt version and
+# content, so identical decks are summarized once (see study_companion.llm_cache).
+# 'progress' relays partial summaries from the worker that processes an upload
+# to the summary stream, so it must be shared by every worker process
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'llm': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'llm_cache'),
+        'TIMEOUT': 30 * 24 * 60 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+            'CULL_FREQUENCY': 4,
+        },
+    },
+    'progress': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'progress_cache'),
+        'TIMEOUT': 15 * 60,
+    },
+}
+
+# Concurrent identical Gemini requests run once; across worker processes
+# they are serialized with file locks here (see study_companion.singleflight).
+# Set to '' to deduplicate within each process only
+LLM_LOCK_DIR = os.path.join(BASE_DIR, 'llm_locks')
+
 # Login URL
 LOGIN_URL = 'login'
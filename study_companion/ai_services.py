@@ -1,75 +1,463 @@
+import asyncio
+import hashlib
 import json
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import httpx
 from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
 import google.genai as genai
+from google.genai import errors as genai_errors
 from google.genai import types
 from django.conf import settings
+from .gloss import get_gloss_engine, gloss_version
+from .llm_cache import llm_cache, llm_cache_key
+from .singleflight import single_flight
+from .metrics import timed
+
+# Rough characters-per-token ratio used to budget chunks without a tokenizer
+CHARS_PER_TOKEN = 4
+DEFAULT_CHUNK_TOKENS = 2500
+
+# Token budget for the deck text in one MCQ request; longer decks are
+# sampled across their chunks (see mcq_source_text)
+DEFAULT_MCQ_INPUT_TOKENS = 3750
+# Smallest excerpt taken from a sampled chunk
+MIN_MCQ_SAMPLE_CHARS = 1000
+
+# Map-reduce summarization defaults (see summarize_deck)
+DEFAULT_SUMMARY_CONCURRENCY = 4
+MAX_MERGED_CONCEPTS = 8
+# Passes of the reduce step before leftover summaries are joined as they are
+MAX_REDUCE_ROUNDS = 4
+
+GEMINI_MODEL = 'gemini-2.5-flash'
+
+def _shape_text(shape, body, tables):
+    """
+    Collects text from a shape (recursing into groups) into body/tables.
+    """
+    if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+        for child in shape.shapes:
+            _shape_text(child, body, tables)
+        return
+    if getattr(shape, "has_table", False) and shape.has_table:
+        tables.append([[cell.text for cell in row.cells] for row in shape.table.rows])
+        return
+    if getattr(shape, "has_text_frame", False) and shape.has_text_frame:
+        text = shape.text_frame.text.strip()
+        if text:
+            body.append(text)
+
+def iter_slides(file_path):
+    """
+    Yields one record per slide instead of building the whole deck as one string:
+    {"number", "title", "body", "notes", "tables"}.
+    """
+    prs = Presentation(file_path)
+    for number, slide in enumerate(prs.slides, start=1):
+        title_shape = slide.shapes.title
+        title = title_shape.text_frame.text.strip() if title_shape is not None and title_shape.has_text_frame else ""
+        body = []
+        tables = []
+        for shape in slide.shapes:
+            if title_shape is not None and shape.shape_id == title_shape.shape_id:
+                continue
+            _shape_text(shape, body, tables)
+        notes = ""
+        if slide.has_notes_slide:
+            notes = slide.notes_slide.notes_text_frame.text.strip()
+        yield {
+            "number": number,
+            "title": title,
+            "body": "\n".join(body),
+            "notes": notes,
+            "tables": tables,
+        }
+
+def slide_text(slide):
+    """
+    Flattens a slide record into plain text.
+    """
+    parts = []
+    if slide["title"]:
+        parts.append(slide["title"])
+    if slide["body"]:
+        parts.append(slide["body"])
+    for table in slide["tables"]:
+        parts.append("\n".join(" | ".join(row) for row in table))
+    if slide["notes"]:
+        parts.append(f"Notes: {slide['notes']}")
+    return "\n".join(parts)
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def _is_cut_point(text, target_chars):
+    """
+    Whether a chunk ends after a slide with this text. Decided by a hash of
+    the slide alone, with probability len(text) / target_chars, so chunks
+    average ~target_chars and a boundary stays put when other slides change.
+    """
+    digest = hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') < len(text) / target_chars * 2 ** 64
+
+def chunk_slides(slides, max_tokens=DEFAULT_CHUNK_TOKENS):
+    """
+    Groups slide records into chunks of at most ~max_tokens, yielding
+    {"slides": [numbers], "text": str} as soon as each chunk is complete.
+    Chunks end at content-defined slides (see _is_cut_point), or earlier
+    when the next slide would not fit, so editing or inserting a slide only
+    changes the chunks around it and the rest keep their cached summaries.
+    A single slide larger than the budget is split on line boundaries.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    target_chars = max_chars // 2
+    numbers = []
+    parts = []
+    size = 0
+    for slide in slides:
+        text = slide_text(slide)
+        if not text:
+            continue
+        pieces = [text]
+        if len(text) > max_chars:
+            pieces = _split_text(text, max_chars)
+        for piece in pieces:
+            if parts and size + len(piece) > max_chars:
+                yield {"slides": numbers, "text": "\n\n".join(parts)}
+                numbers, parts, size = [], [], 0
+            if slide["number"] not in numbers:
+                numbers.append(slide["number"])
+            parts.append(piece)
+            size += len(piece) + 2
+        if _is_cut_point(text, target_chars):
+            yield {"slides": numbers, "text": "\n\n".join(parts)}
+            numbers, parts, size = [], [], 0
+    if parts:
+        yield {"slides": numbers, "text": "\n\n".join(parts)}
+
+def _pack_texts(texts, max_chars):
+    """
+    Joins consecutive texts into groups of at most max_chars, splitting any
+    text that is longer on its own.
+    """
+    groups = []
+    current = ""
+    for text in texts:
+        for piece in _split_text(text, max_chars) if len(text) > max_chars else [text]:
+            if current and len(current) + len(piece) + 2 > max_chars:
+                groups.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        groups.append(current)
+    return groups
+
+def _split_text(text, max_chars):
+    pieces = []
+    current = ""
+    for line in text.split("\n"):
+        while len(line) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if current and len(current) + len(line) + 1 > max_chars:
+            pieces.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        pieces.append(current)
+    return pieces
 
 def extract_ppt_text(file_path):
     """
     Extracts text from a PowerPoint file.
     """
-    prs = Presentation(file_path)
-    text_content = []
+    return "\n\n".join(slide_text(slide) for slide in iter_slides(file_path))
 
-    for slide in prs.slides:
-        slide_text = []
-        for shape in slide.shapes:
-            if hasattr(shape, "text"):
-                slide_text.append(shape.text)
-        text_content.append("\n".join(slide_text))
+# Gemini call policy defaults; override with the GEMINI_* settings
+DEFAULT_GEMINI_TIMEOUT = 60
+DEFAULT_GEMINI_MAX_RETRIES = 3
+DEFAULT_GEMINI_MAX_CONCURRENCY = 8
+DEFAULT_GEMINI_BREAKER_THRESHOLD = 5
+DEFAULT_GEMINI_BREAKER_RESET = 30
+
+# HTTP status codes worth retrying (rate limits and transient server errors)
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+class SummaryError(Exception):
+    """
+    Raised by summarize_text/summarize_deck with raise_errors=True when
+    Gemini could not produce a summary, instead of returning the error text
+    as the summary.
+    """
+
+class GeminiUnavailableError(Exception):
+    """
+    Raised without calling the API when the circuit breaker is open or no
+    call slot frees up before the deadline.
+    """
+
+class GeminiClientManager:
+    """
+    Process-wide access to Gemini: one reused client (and its connection
+    pool), per-call deadlines, retries with exponential backoff and jitter,
+    a cap on in-flight calls and a circuit breaker that fails fast while the
+    API is degraded.
+
+    `acall`/`agenerate_content` apply the same policy to the async client
+    (client.aio) for ASGI views, awaiting instead of holding a thread.
+    """
+
+    def __init__(self, api_key=None, base_url=None, timeout=None, max_retries=None,
+                 max_concurrency=None, breaker_threshold=None, breaker_reset=None,
+                 sleep=time.sleep, async_sleep=asyncio.sleep):
+        self.api_key = api_key if api_key is not None else getattr(settings, 'GEMINI_API_KEY', None)
+        self.base_url = base_url if base_url is not None else getattr(settings, 'GEMINI_BASE_URL', None)
+        self.timeout = timeout if timeout is not None else getattr(settings, 'GEMINI_TIMEOUT', DEFAULT_GEMINI_TIMEOUT)
+        self.max_retries = max_retries if max_retries is not None else getattr(settings, 'GEMINI_MAX_RETRIES', DEFAULT_GEMINI_MAX_RETRIES)
+        if max_concurrency is None:
+            max_concurrency = getattr(settings, 'GEMINI_MAX_CONCURRENCY', DEFAULT_GEMINI_MAX_CONCURRENCY)
+        self.breaker_threshold = breaker_threshold if breaker_threshold is not None else getattr(settings, 'GEMINI_BREAKER_THRESHOLD', DEFAULT_GEMINI_BREAKER_THRESHOLD)
+        self.breaker_reset = breaker_reset if breaker_reset is not None else getattr(settings, 'GEMINI_BREAKER_RESET', DEFAULT_GEMINI_BREAKER_RESET)
+        self.max_concurrency = max_concurrency
+        self._sleep = sleep
+        self._async_sleep = async_sleep
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._async_slots = None
+        self._lock = threading.Lock()
+        self._client = None
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def configured(self):
+        return bool(self.api_key) and self.api_key != 'PLACEHOLDER_KEY'
+
+    @property
+    def client(self):
+        """
+        The shared genai.Client, created on first use.
+        """
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    http_options = types.HttpOptions(
+                        timeout=int(self.timeout * 1000),
+                        base_url=self.base_url or None
+                    )
+                    self._client = genai.Client(api_key=self.api_key, http_options=http_options)
+        return self._client
+
+    @staticmethod
+    def is_retryable(error):
+        if isinstance(error, genai_errors.APIError):
+            return error.code in RETRYABLE_STATUS_CODES
+        return isinstance(error, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError))
+
+    def _before_call(self):
+        """
+        Raises GeminiUnavailableError while the breaker is open. Once
+        breaker_reset has passed exactly one call goes through as a probe;
+        returns True for that call.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            if self._probing or time.monotonic() - self._opened_at < self.breaker_reset:
+                raise GeminiUnavailableError("Gemini circuit breaker is open")
+            self._probing = True
+            return True
+
+    def _record(self, healthy, probe=False):
+        """
+        Records a call's outcome: True closes the breaker, False counts a
+        failure (a failed probe re-opens it at once) and None, for errors
+        that say nothing about API health, leaves the count as it is.
+        """
+        with self._lock:
+            if probe:
+                self._probing = False
+            if healthy:
+                self._failures = 0
+                self._opened_at = None
+            elif healthy is False:
+                self._failures += 1
+                if probe or self._failures >= self.breaker_threshold:
+                    self._opened_at = time.monotonic()
+
+    def backoff(self, attempt):
+        """
+        Exponential backoff with full jitter: 0..min(8, 0.5 * 2**attempt) seconds.
+        """
+        return random.uniform(0, min(8.0, 0.5 * (2 ** attempt)))
+
+    def call(self, func):
+        """
+        Runs func() under the call policy and returns its result. The whole
+        call, retries included, must finish within the configured timeout.
+        """
+        with timed('gemini'):
+            deadline = time.monotonic() + self.timeout
+            attempt = 0
+            while True:
+                probe = self._before_call()
+                if not self._slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                    self._record(None, probe)
+                    raise GeminiUnavailableError("No Gemini call slot available before the deadline")
+                try:
+                    result = func()
+                except Exception as e:
+                    retryable = self.is_retryable(e)
+                    # Client errors (bad request, auth) say nothing about API health
+                    self._record(False if retryable else None, probe)
+                    delay = self.backoff(attempt)
+                    if not retryable or attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+                        raise
+                except BaseException:
+                    self._record(None, probe)
+                    raise
+                else:
+                    self._record(True, probe)
+                    return result
+                finally:
+                    self._slots.release()
+                attempt += 1
+                self._sleep(delay)
+
+    def generate_content(self, client=None, **kwargs):
+        client = client or self.client
+        return self.call(lambda: client.models.generate_content(**kwargs))
 
-    return "\n\n".join(text_content)
+    def _loop_slots(self):
+        """
+        The in-flight cap for async calls. asyncio primitives belong to one
+        event loop, so a new semaphore is made if the running loop changes.
+        """
+        loop = asyncio.get_running_loop()
+        slots = self._async_slots
+        if slots is None or slots[0] is not loop:
+            slots = self._async_slots = (loop, asyncio.BoundedSemaphore(self.max_concurrency))
+        return slots[1]
+
+    async def acall(self, func):
+        """
+        Async counterpart of `call`: awaits func() (a coroutine function)
+        under the same deadline, retries and circuit breaker.
+        """
+        with timed('gemini'):
+            deadline = time.monotonic() + self.timeout
+            slots = self._loop_slots()
+            attempt = 0
+            while True:
+                probe = self._before_call()
+                try:
+                    await asyncio.wait_for(slots.acquire(), max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    self._record(None, probe)
+                    raise GeminiUnavailableError("No Gemini call slot available before the deadline")
+                except BaseException:
+                    self._record(None, probe)
+                    raise
+                try:
+                    result = await func()
+                except Exception as e:
+                    retryable = self.is_retryable(e)
+                    self._record(False if retryable else None, probe)
+                    delay = self.backoff(attempt)
+                    if not retryable or attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+                        raise
+                except BaseException:
+                    # Cancelled: frees the probe for the next caller
+                    self._record(None, probe)
+                    raise
+                else:
+                    self._record(True, probe)
+                    return result
+                finally:
+                    slots.release()
+                attempt += 1
+                await self._async_sleep(delay)
+
+    async def agenerate_content(self, client=None, **kwargs):
+        client = client or self.client
+        return await self.acall(lambda: client.aio.models.generate_content(**kwargs))
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_gemini_manager():
+    """
+    Returns the process-wide GeminiClientManager.
+    """
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = GeminiClientManager()
+    return _manager
+
+def set_gemini_manager(manager):
+    """
+    Replaces the process-wide manager (e.g. with one pointed at a local fake
+    server in tests) and returns the previous one.
+    """
+    global _manager
+    with _manager_lock:
+        previous, _manager = _manager, manager
+    return previous
 
 def get_gemini_client():
     """
-    Returns a configured Gemini API client.
+    Returns the shared Gemini API client.
     """
-    api_key = getattr(settings, 'GEMINI_API_KEY', None)
-    if not api_key or api_key == 'PLACEHOLDER_KEY':
+    manager = get_gemini_manager()
+    if not manager.configured:
         # Fallback or error handling - in production, raise proper error
         print("Warning: GEMINI_API_KEY not set.")
         return None
-    return genai.Client(api_key=api_key)
-
-def summarize_text(text):
-    """
-    Summarizes the given text using Google Gemini 2.5 Flash.
-    Returns a JSON string with structured data.
-    """
-    client = get_gemini_client()
-    if not client:
-        return json.dumps({
-            "summary": "AI Summarization unavailable: API Key missing.",
-            "key_concepts": [],
-            "important_terms": []
-        })
+    return manager.client
 
-    # JSON schema for the response
-    schema = {
-        "type": "OBJECT",
-        "properties": {
-            "summary": {"type": "STRING"},
-            "key_concepts": {
-                "type": "ARRAY",
-                "items": {
-                    "type": "OBJECT",
-                    "properties": {
-                        "title": {"type": "STRING"},
-                        "description": {"type": "STRING"},
-                        "color": {"type": "STRING", "enum": ["green", "blue", "purple"]}
-                    },
-                    "required": ["title", "description", "color"]
-                }
-            },
-            "important_terms": {
-                "type": "ARRAY",
-                "items": {"type": "STRING"}
+# JSON schema for the summary response
+SUMMARY_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "summary": {"type": "STRING"},
+        "key_concepts": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "title": {"type": "STRING"},
+                    "description": {"type": "STRING"},
+                    "color": {"type": "STRING", "enum": ["green", "blue", "purple"]}
+                },
+                "required": ["title", "description", "color"]
             }
         },
-        "required": ["summary", "key_concepts", "important_terms"]
-    }
+        "important_terms": {
+            "type": "ARRAY",
+            "items": {"type": "STRING"}
+        }
+    },
+    "required": ["summary", "key_concepts", "important_terms"],
+    # The summary comes first so it can be shown while the rest streams in
+    "propertyOrdering": ["summary", "key_concepts", "important_terms"]
+}
 
-    prompt = f"""
+# Bump when a prompt changes so cached responses for the old prompt are ignored
+SUMMARY_PROMPT_VERSION = 1
+MCQ_PROMPT_VERSION = 2
+
+def _summary_prompt(text):
+    return f"""
     Analyze the following presentation content and provide a structured learning summary.
     
     1. **summary**: A concise executive summary paragraph (approx 3-5 sentences) suitable for a quick overview.
@@ -77,55 +465,309 @@ def summarize_text(text):
     3. **important_terms**: List specific nouns/verbs that are crucial for sign language practice.
     
     Content:
-    {text[:10000]}
+    {text}
     """
-    
-    try:
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type='application/json',
-                response_schema=schema
-            )
+
+_SUMMARY_FIELD = re.compile(r'"summary"\s*:\s*"')
+_JSON_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f'}
+
+def extract_partial_summary(buffer):
+    """
+    Returns the (possibly incomplete) "summary" string value from a partial
+    JSON response, decoding escapes that have fully arrived.
+    """
+    match = _SUMMARY_FIELD.search(buffer)
+    if not match:
+        return ""
+    out = []
+    i = match.end()
+    while i < len(buffer):
+        c = buffer[i]
+        if c == '"':
+            break
+        if c == '\\':
+            if i + 1 >= len(buffer):
+                break
+            escape = buffer[i + 1]
+            if escape == 'u':
+                if i + 6 > len(buffer):
+                    break
+                out.append(chr(int(buffer[i + 2:i + 6], 16)))
+                i += 6
+                continue
+            out.append(_JSON_ESCAPES.get(escape, escape))
+            i += 2
+            continue
+        out.append(c)
+        i += 1
+    return "".join(out)
+
+def _summary_config():
+    return types.GenerateContentConfig(
+        response_mime_type='application/json',
+        response_schema=SUMMARY_SCHEMA
+    )
+
+def _summary_fallback(message):
+    return json.dumps({
+        "summary": message,
+        "key_concepts": [],
+        "important_terms": []
+    })
+
+def _generate_summary(client, text, on_progress=None):
+    """
+    Calls Gemini for one summary and returns the raw JSON text. Raises on error.
+    With on_progress the response is streamed and on_progress receives
+    {"summary": <text so far>} as the executive summary grows.
+    """
+    manager = get_gemini_manager()
+    config = _summary_config()
+    if on_progress is None:
+        response = manager.generate_content(
+            client,
+            model=GEMINI_MODEL,
+            contents=_summary_prompt(text),
+            config=config
+        )
+        return response.text
+
+    def consume_stream():
+        buffer = ""
+        sent = ""
+        for chunk in client.models.generate_content_stream(
+                model=GEMINI_MODEL, contents=_summary_prompt(text), config=config):
+            buffer += chunk.text or ""
+            partial = extract_partial_summary(buffer)
+            if partial != sent:
+                sent = partial
+                on_progress({"summary": partial})
+        return buffer
+    return manager.call(consume_stream)
+
+async def _agenerate_summary(client, text, on_progress=None):
+    """
+    Async variant of _generate_summary using the async client.
+    """
+    manager = get_gemini_manager()
+    config = _summary_config()
+    if on_progress is None:
+        response = await manager.agenerate_content(
+            client,
+            model=GEMINI_MODEL,
+            contents=_summary_prompt(text),
+            config=config
         )
         return response.text
+
+    async def consume_stream():
+        buffer = ""
+        sent = ""
+        async for chunk in await client.aio.models.generate_content_stream(
+                model=GEMINI_MODEL, contents=_summary_prompt(text), config=config):
+            buffer += chunk.text or ""
+            partial = extract_partial_summary(buffer)
+            if partial != sent:
+                sent = partial
+                on_progress({"summary": partial})
+        return buffer
+    return await manager.acall(consume_stream)
+
+def _fetch_summary(key, generate):
+    """
+    Returns generate()'s summary for `key` and caches it. Concurrent
+    identical requests share one Gemini call (see singleflight). Raises on
+    error.
+    """
+    def fetch():
+        # Another worker may have stored it while this one waited
+        cached = llm_cache.peek(key)
+        if cached is not None:
+            return cached
+        result = generate()
+        # Validate before caching so a malformed response is not reused
+        json.loads(result)
+        llm_cache.set(key, result)
+        return result
+    return single_flight.do(key, fetch)
+
+async def _afetch_summary(key, generate):
+    async def fetch():
+        cached = await llm_cache.apeek(key)
+        if cached is not None:
+            return cached
+        result = await generate()
+        json.loads(result)
+        await llm_cache.aset(key, result)
+        return result
+    return await single_flight.ado(key, fetch)
+
+def summarize_text(text, on_progress=None, raise_errors=False):
+    """
+    Summarizes the given text using Google Gemini 2.5 Flash.
+    Returns a JSON string with structured data.
+    on_progress, if given, is called with partial results while streaming.
+    A failed call returns the error as the summary, or with raise_errors
+    raises SummaryError.
+    """
+    client = get_gemini_client()
+    if not client:
+        return _summary_fallback("AI Summarization unavailable: API Key missing.")
+    
+    key = llm_cache_key('summary', GEMINI_MODEL, SUMMARY_PROMPT_VERSION, text, SUMMARY_SCHEMA)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        return cached
+    try:
+        return _fetch_summary(key, lambda: _generate_summary(client, text, on_progress))
     except Exception as e:
         print(f"Summary Generation Error: {e}")
-        return json.dumps({
-            "summary": f"Error generating summary: {str(e)}",
-            "key_concepts": [],
-            "important_terms": []
-        })
+        if raise_errors:
+            raise SummaryError(f"Error generating summary: {str(e)}") from e
+        return _summary_fallback(f"Error generating summary: {str(e)}")
 
-def generate_mcq(text, num_questions=5, difficulty='Medium'):
+async def asummarize_text(text, on_progress=None):
     """
-    Generates multiple-choice questions from the text using Google Gemini.
-    Returns a list of dictionaries.
+    Async variant of summarize_text for ASGI views; shares its cache entries.
     """
     client = get_gemini_client()
     if not client:
-        return []
+        return _summary_fallback("AI Summarization unavailable: API Key missing.")
 
-    # JSON schema for the response
-    schema = {
-        "type": "ARRAY",
-        "items": {
-            "type": "OBJECT",
-            "properties": {
-                "question": {"type": "STRING"},
-                "options": {
-                    "type": "ARRAY",
-                    "items": {"type": "STRING"}
-                },
-                "correct_answer": {"type": "STRING"},
-                "explanation": {"type": "STRING"}
+    key = llm_cache_key('summary', GEMINI_MODEL, SUMMARY_PROMPT_VERSION, text, SUMMARY_SCHEMA)
+    cached = await llm_cache.aget(key)
+    if cached is not None:
+        return cached
+    try:
+        return await _afetch_summary(key, lambda: _agenerate_summary(client, text, on_progress))
+    except Exception as e:
+        print(f"Summary Generation Error: {e}")
+        return _summary_fallback(f"Error generating summary: {str(e)}")
+
+def _summarize_chunk(client, text):
+    """
+    Summarizes one chunk of a deck, reusing a cached result for identical text.
+    """
+    key = llm_cache_key('summary', GEMINI_MODEL, SUMMARY_PROMPT_VERSION, text, SUMMARY_SCHEMA)
+    cached = llm_cache.get(key)
+    if cached is None:
+        cached = _fetch_summary(key, lambda: _generate_summary(client, text))
+    return json.loads(cached)
+
+def merge_summaries(partials, max_concepts=MAX_MERGED_CONCEPTS):
+    """
+    Merges per-chunk summaries: key concepts are deduplicated by title and
+    important terms case-insensitively, keeping first-seen order.
+    """
+    concepts = []
+    seen_titles = set()
+    terms = []
+    seen_terms = set()
+    for partial in partials:
+        for concept in partial.get("key_concepts", []):
+            title = concept.get("title", "").strip()
+            if title and title.casefold() not in seen_titles and len(concepts) < max_concepts:
+                seen_titles.add(title.casefold())
+                concepts.append(concept)
+        for term in partial.get("important_terms", []):
+            if term.casefold() not in seen_terms:
+                seen_terms.add(term.casefold())
+                terms.append(term)
+    return {
+        "summary": "\n\n".join(p.get("summary", "") for p in partials if p.get("summary")),
+        "key_concepts": concepts,
+        "important_terms": terms,
+    }
+
+def _reduce_summaries(executor, client, summaries, max_chars):
+    """
+    Condenses partial summaries into one executive summary. When they do
+    not fit one call's budget they are summarized in groups that do, and
+    the group summaries reduced again, until a single call covers them.
+    """
+    for _ in range(MAX_REDUCE_ROUNDS):
+        groups = _pack_texts(summaries, max_chars)
+        if len(groups) == 1:
+            return _summarize_chunk(client, groups[0]).get("summary", groups[0])
+        summaries = [
+            partial.get("summary", group)
+            for partial, group in zip(executor.map(lambda text: _summarize_chunk(client, text), groups), groups)
+        ]
+    return "\n\n".join(summaries)
+
+def summarize_deck(slides, max_workers=None, chunk_tokens=None, on_progress=None, raise_errors=False):
+    """
+    Map-reduce summarization for long decks: the slides are chunked, chunks
+    are summarized concurrently (bounded by SUMMARY_MAX_CONCURRENCY) and the
+    partial results merged, with the partial summaries then condensed into
+    one executive summary (see _reduce_summaries). Returns a JSON string in
+    the same shape as summarize_text.
+    on_progress, if given, receives the merged partial result as chunks finish.
+    raise_errors is passed on as in summarize_text; a chunk that fails then
+    raises SummaryError.
+    """
+    if chunk_tokens is None:
+        chunk_tokens = getattr(settings, 'SUMMARY_CHUNK_TOKENS', DEFAULT_CHUNK_TOKENS)
+    chunks = [chunk["text"] for chunk in chunk_slides(slides, max_tokens=chunk_tokens)]
+    if len(chunks) <= 1:
+        return summarize_text(chunks[0] if chunks else "", on_progress, raise_errors)
+
+    client = get_gemini_client()
+    if not client:
+        # Same "API Key missing" response as the single-call path
+        return summarize_text("")
+
+    if max_workers is None:
+        max_workers = getattr(settings, 'SUMMARY_MAX_CONCURRENCY', DEFAULT_SUMMARY_CONCURRENCY)
+    partials = [None] * len(chunks)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='summary-chunk') as executor:
+        try:
+            futures = {executor.submit(_summarize_chunk, client, text): i for i, text in enumerate(chunks)}
+            for future in as_completed(futures):
+                partials[futures[future]] = future.result()
+                if on_progress:
+                    on_progress(merge_summaries([p for p in partials if p is not None]))
+        except Exception as e:
+            print(f"Summary Generation Error: {e}")
+            if raise_errors:
+                raise SummaryError(f"Error generating summary: {str(e)}") from e
+            return json.dumps({
+                "summary": f"Error generating summary: {str(e)}",
+                "key_concepts": [],
+                "important_terms": []
+            })
+
+        merged = merge_summaries(partials)
+        try:
+            merged["summary"] = _reduce_summaries(
+                executor, client,
+                [p["summary"] for p in partials if p.get("summary")],
+                chunk_tokens * CHARS_PER_TOKEN,
+            )
+        except Exception as e:
+            print(f"Summary Merge Error: {e}")
+    return json.dumps(merged)
+
+# JSON schema for the MCQ response
+MCQ_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "question": {"type": "STRING"},
+            "options": {
+                "type": "ARRAY",
+                "items": {"type": "STRING"}
             },
-            "required": ["question", "options", "correct_answer", "explanation"]
-        }
+            "correct_answer": {"type": "STRING"},
+            "explanation": {"type": "STRING"}
+        },
+        "required": ["question", "options", "correct_answer", "explanation"]
     }
+}
 
-    prompt = f"""
+def _mcq_prompt(text, num_questions, difficulty):
+    return f"""
     Generate {num_questions} multiple-choice questions from the following text.
     Difficulty Level: {difficulty}.
     
@@ -137,28 +779,127 @@ def generate_mcq(text, num_questions=5, difficulty='Medium'):
     - explanation: A brief explanation of why the answer is correct
     
     Text Content:
-    {text[:15000]}
+    {text}
     """
 
+def mcq_source_text(text, max_tokens=None):
+    """
+    Returns the deck text an MCQ request is built from. A deck over the
+    budget (MCQ_INPUT_TOKENS) is chunked like a summary and an evenly spaced
+    selection of chunks each contributes an equal share from its start, so
+    the questions cover the whole deck rather than its opening slides.
+    """
+    if max_tokens is None:
+        max_tokens = getattr(settings, 'MCQ_INPUT_TOKENS', DEFAULT_MCQ_INPUT_TOKENS)
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+
+    chunk_tokens = getattr(settings, 'SUMMARY_CHUNK_TOKENS', DEFAULT_CHUNK_TOKENS)
+    chunks = _pack_texts(text.split("\n\n"), min(chunk_tokens * CHARS_PER_TOKEN, max_chars))
+    count = min(len(chunks), max(1, max_chars // MIN_MCQ_SAMPLE_CHARS))
+    share = max_chars // count - 2
+    # Evenly spaced from the first chunk to the last
+    picked = [chunks[i * (len(chunks) - 1) // max(count - 1, 1)] for i in range(count)]
+    return "\n\n".join(_split_text(chunk, share)[0] for chunk in picked)
+
+def _mcq_request(text, num_questions, difficulty):
+    """
+    Returns (cache key, generate_content kwargs) for one MCQ request.
+    """
+    key = llm_cache_key('mcq', GEMINI_MODEL, MCQ_PROMPT_VERSION, text, MCQ_SCHEMA,
+                        difficulty=difficulty, num_questions=num_questions)
+    kwargs = {
+        'model': GEMINI_MODEL,
+        'contents': _mcq_prompt(mcq_source_text(text), num_questions, difficulty),
+        'config': types.GenerateContentConfig(
+            response_mime_type='application/json',
+            response_schema=MCQ_SCHEMA
+        ),
+    }
+    return key, kwargs
+
+def _fetch_mcq(client, key, kwargs):
+    """
+    Generates the MCQ response for `key` and caches it unless empty.
+    Concurrent identical requests share one Gemini call. Raises on error.
+    """
+    def fetch():
+        cached = llm_cache.peek(key)
+        if cached is not None:
+            return cached
+        response = get_gemini_manager().generate_content(client, **kwargs)
+        if json.loads(response.text):
+            llm_cache.set(key, response.text)
+        return response.text
+    return single_flight.do(key, fetch)
+
+async def _afetch_mcq(client, key, kwargs):
+    async def fetch():
+        cached = await llm_cache.apeek(key)
+        if cached is not None:
+            return cached
+        response = await get_gemini_manager().agenerate_content(client, **kwargs)
+        if json.loads(response.text):
+            await llm_cache.aset(key, response.text)
+        return response.text
+    return await single_flight.ado(key, fetch)
+
+def generate_mcq(text, num_questions=5, difficulty='Medium'):
+    """
+    Generates multiple-choice questions from the text using Google Gemini.
+    Returns a list of dictionaries.
+    """
+    client = get_gemini_client()
+    if not client or not text:
+        return []
+
+    key, kwargs = _mcq_request(text, num_questions, difficulty)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        return json.loads(cached)
+
     try:
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type='application/json',
-                response_schema=schema
-            )
-        )
-        return json.loads(response.text)
+        return json.loads(_fetch_mcq(client, key, kwargs))
     except Exception as e:
         print(f"MCQ Generation Error: {e}")
         return []
 
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
-from django.contrib.staticfiles import finders
-import string
+async def agenerate_mcq(text, num_questions=5, difficulty='Medium'):
+    """
+    Async variant of generate_mcq for ASGI views; shares its cache entries.
+    """
+    client = get_gemini_client()
+    if not client or not text:
+        return []
+
+    key, kwargs = _mcq_request(text, num_questions, difficulty)
+    cached = await llm_cache.aget(key)
+    if cached is not None:
+        return json.loads(cached)
+
+    try:
+        return json.loads(await _afetch_mcq(client, key, kwargs))
+    except Exception as e:
+        print(f"MCQ Generation Error: {e}")
+        return []
+
+def parse_summary(summary_text):
+    """
+    Parses a stored summary into its structured form.
+    Legacy summaries stored as plain text are wrapped in the same shape.
+    """
+    try:
+        summary_data = json.loads(summary_text)
+        if not isinstance(summary_data, dict):
+            raise ValueError("Not a dictionary")
+    except (json.JSONDecodeError, ValueError, TypeError):
+        summary_data = {
+            "summary": summary_text or "",
+            "key_concepts": [],
+            "important_terms": []
+        }
+    return summary_data
 
 def process_text_for_sign_language(text):
     """
@@ -168,58 +909,23 @@ def process_text_for_sign_language(text):
     if not text:
         return []
 
-    text = text.lower()
-    try:
-        words = word_tokenize(text)
-    except LookupError:
-        nltk.download('punkt')
-        words = word_tokenize(text)
-
-    try:
-        tagged = nltk.pos_tag(words)
-    except LookupError:
-        nltk.download('averaged_perceptron_tagger')
-        tagged = nltk.pos_tag(words)
+    # Simplified tense logic (no tense marker for summaries)
+    return get_gloss_engine().to_gloss(text, mark_tense=False)
 
-    # Simplified tense logic (defaulting to present for summary)
-    
-    stop_words = set(["mightn't", 're', 'wasn', 'wouldn', 'be', 'has', 'that', 'does', 'shouldn', 'do', "you've",'off', 'for', "didn't", 'm', 'ain', 'haven', "weren't", 'are', "she's", "wasn't", 'its', "haven't", "wouldn't", 'don', 'weren', 's', "you'd", "don't", 'doesn', "hadn't", 'is', 'was', "that'll", "should've", 'a', 'then', 'the', 'mustn', 'i', 'nor', 'as', "it's", "needn't", 'd', 'am', 'have',  'hasn', 'o', "aren't", "you'll", "couldn't", "you're", "mustn't", 'didn', "doesn't", 'll', 'an', 'hadn', 'whom', 'y', "hasn't", 'itself', 'couldn', 'needn', "shan't", 'isn', 'been', 'such', 'shan', "shouldn't", 'aren', 'being', 'were', 'did', 'ma', 't', 'having', 'mightn', 've', "isn't", "won't"])
+def summary_sign_words(upload, summary_data=None, save=True):
+    """
+    Returns the sign gloss for an upload's summary. The stored gloss is used
+    while its version matches the current rules and vocabulary; otherwise it
+    is recomputed and, unless save is False, saved.
+    """
+    version = gloss_version()
+    if upload.sign_words is not None and upload.sign_words_version == version:
+        return upload.sign_words
 
-    lr = WordNetLemmatizer()
-    try:
-        lr.lemmatize('test')
-    except LookupError:
-        nltk.download('wordnet')
-        nltk.download('omw-1.4')
-
-    filtered_text = []
-    for w, p in zip(words, tagged):
-        if w not in stop_words and w not in string.punctuation:
-            if p[1] in ['VBG', 'VBD', 'VBZ', 'VBN', 'NN']:
-                filtered_text.append(lr.lemmatize(w, pos='v'))
-            elif p[1] in ['JJ', 'JJR', 'JJS', 'RBR', 'RBS']:
-                filtered_text.append(lr.lemmatize(w, pos='a'))
-            else:
-                filtered_text.append(lr.lemmatize(w))
-
-    # Match with existing assets
-    final_words = []
-    for w in filtered_text:
-        # Capitalize first letter as assets are mostly TitleCase or uppercase
-        w_title = w.capitalize() 
-        path = w_title + ".mp4"
-        
-        # Check specific naming conventions if needed (e.g. "Do Not")
-        # For now, simplistic check
-        
-        if finders.find(path):
-            final_words.append(w_title)
-        else:
-            # If word not found, spell it out (return individual chars)
-            # Or just append the word and let frontend handle spelling if missing?
-            # The existing logic split it. Let's split it here to be safe and consistent.
-            for c in w:
-                if c.isalnum():
-                    final_words.append(c.upper())
-
-    return final_words
+    if summary_data is None:
+        summary_data = parse_summary(upload.summary_text)
+    upload.sign_words = process_text_for_sign_language(summary_data.get('summary', ''))
+    upload.sign_words_version = version
+    if save:
+        upload.save(update_fields=['sign_words', 'sign_words_version'])
+    return upload.sign_words
@@ -1,6 +1,50 @@
+import logging
+
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
 
 
 class StudyCompanionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'study_companion'
+
+    def ready(self):
+        # Scan the sign clips once per process instead of on every lookup
+        from .sign_assets import get_sign_index
+        get_sign_index()
+
+        if getattr(settings, 'SIGN_METADATA_REFRESH', True):
+            self.refresh_asset_metadata()
+
+        if getattr(settings, 'NLTK_PRELOAD', True):
+            self.preload_nlp()
+
+    def refresh_asset_metadata(self):
+        """
+        Re-indexes sign clips added or changed since the last run.
+        """
+        from .asset_metadata import get_asset_metadata
+        try:
+            updated, removed = get_asset_metadata().refresh()
+        except OSError as e:
+            logger.warning("Could not refresh the sign metadata index: %s", e)
+            return
+        if updated or removed:
+            logger.info("Sign metadata index: %d clip(s) indexed, %d removed", updated, removed)
+
+    def preload_nlp(self):
+        """
+        Verifies the NLTK data is installed and loads it into memory.
+        Missing data is reported, never downloaded.
+        """
+        from .gloss import get_gloss_engine
+        try:
+            engine = get_gloss_engine()
+        except (LookupError, AttributeError) as e:
+            logger.warning(
+                "NLTK data is missing, run `python manage.py download_nltk_data`: %s", e
+            )
+            return
+        logger.info("Preloaded NLTK tagger and WordNet in %.3fs", engine.load_seconds)
@@ -0,0 +1,326 @@
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from .sign_assets import get_sign_index
+
+# Bump when the stored fields change so old index files are rebuilt
+METADATA_FORMAT_VERSION = 1
+
+# Boxes that only contain other boxes on the path to the sample description
+MP4_CONTAINER_BOXES = frozenset([b'moov', b'trak', b'mdia', b'minf', b'stbl'])
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# How often (seconds) a background scan re-stats every clip to catch files
+# overwritten in place; added and removed clips are picked up with the sign index
+DEFAULT_REFRESH_INTERVAL = 30.0
+
+
+class MP4ParseError(ValueError):
+    pass
+
+
+def _iter_boxes(data, start=0, end=None):
+    """
+    Yields (type, payload_start, box_end) for the boxes in data[start:end].
+    """
+    if end is None:
+        end = len(data)
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', data, pos)
+        header = 8
+        if size == 1:
+            if pos + 16 > end:
+                raise MP4ParseError("Truncated box header")
+            size = struct.unpack_from('>Q', data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise MP4ParseError(f"Invalid size for box {box_type!r}")
+        yield box_type, pos + header, pos + size
+        pos += size
+
+
+def _read_moov(f):
+    """
+    Returns the bytes of the top-level moov box, which may sit before or
+    after the media data.
+    """
+    f.seek(0, os.SEEK_END)
+    file_size = f.tell()
+    pos = 0
+    while pos + 8 <= file_size:
+        f.seek(pos)
+        header = f.read(16)
+        size, box_type = struct.unpack_from('>I4s', header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - pos
+        if size < header_size:
+            raise MP4ParseError(f"Invalid size for box {box_type!r}")
+        if box_type == b'moov':
+            f.seek(pos + header_size)
+            return f.read(size - header_size)
+        pos += size
+    raise MP4ParseError("No moov box")
+
+
+def _parse_mvhd(data, start):
+    version = data[start]
+    if version == 1:
+        timescale, duration = struct.unpack_from('>IQ', data, start + 20)
+    else:
+        timescale, duration = struct.unpack_from('>II', data, start + 12)
+    if not timescale:
+        raise MP4ParseError("Zero timescale")
+    return duration / timescale
+
+
+def _parse_tkhd(data, start):
+    # Width and height are 16.16 fixed point at the end of the box
+    offset = start + (88 if data[start] == 1 else 76)
+    width, height = struct.unpack_from('>II', data, offset)
+    return width >> 16, height >> 16
+
+
+def _parse_trak(data, start, end):
+    track = {}
+
+    def walk(box_start, box_end):
+        for box_type, payload, box_stop in _iter_boxes(data, box_start, box_end):
+            if box_type == b'tkhd':
+                track['width'], track['height'] = _parse_tkhd(data, payload)
+            elif box_type == b'hdlr':
+                track['handler'] = data[payload + 8:payload + 12].decode('latin-1')
+            elif box_type == b'stsd':
+                # First sample entry: size(4) then the codec fourcc
+                track['codec'] = data[payload + 12:payload + 16].decode('latin-1')
+            elif box_type in MP4_CONTAINER_BOXES:
+                walk(payload, box_stop)
+
+    walk(start, end)
+    return track
+
+
+def parse_mp4(path):
+    """
+    Reads duration (seconds), resolution and codec from an MP4's headers
+    without decoding any media. Raises MP4ParseError for files that are not
+    valid MP4s.
+    """
+    with open(path, 'rb') as f:
+        try:
+            moov = _read_moov(f)
+        except struct.error:
+            raise MP4ParseError("Truncated file")
+
+    info = {'duration': None, 'width': None, 'height': None, 'codec': None}
+    try:
+        for box_type, payload, end in _iter_boxes(moov):
+            if box_type == b'mvhd':
+                info['duration'] = round(_parse_mvhd(moov, payload), 3)
+            elif box_type == b'trak':
+                track = _parse_trak(moov, payload, end)
+                if track.get('handler') == 'vide' and info['codec'] is None:
+                    info['width'] = track.get('width')
+                    info['height'] = track.get('height')
+                    info['codec'] = track.get('codec')
+    except struct.error:
+        raise MP4ParseError("Truncated moov box")
+    if info['duration'] is None:
+        raise MP4ParseError("No mvhd box")
+    return info
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def describe_clip(path, stat=None):
+    """
+    Returns the metadata entry for one clip: size, mtime, sha256 and the MP4
+    header fields, or an "error" instead of the header fields if the file
+    does not parse.
+    """
+    if stat is None:
+        stat = os.stat(path)
+    entry = {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': file_sha256(path),
+    }
+    try:
+        entry.update(parse_mp4(path))
+    except (MP4ParseError, OSError) as e:
+        entry['error'] = str(e)
+    return entry
+
+
+class AssetMetadataIndex:
+    """
+    Duration, resolution, codec, size and sha256 of every sign clip, kept in
+    a compact JSON file next to the project (SIGN_METADATA_PATH).
+
+    `refresh` is incremental: a clip is only re-parsed and re-hashed when its
+    size or mtime changed, so keeping the index current on startup costs one
+    stat per clip. Lookups are dict hits on the last scan: when the sign
+    index reloads, or every refresh_interval seconds
+    (SIGN_METADATA_REFRESH_INTERVAL, None to never re-check), they schedule
+    a rescan on a background thread and keep answering from the old entries
+    until it finishes.
+    """
+
+    def __init__(self, path=None, sign_index=None, refresh_interval=None, executor=None):
+        if path is None:
+            path = getattr(settings, 'SIGN_METADATA_PATH', None) or os.path.join(settings.BASE_DIR, 'sign_metadata.json')
+        if refresh_interval is None:
+            refresh_interval = getattr(settings, 'SIGN_METADATA_REFRESH_INTERVAL', DEFAULT_REFRESH_INTERVAL)
+        self.path = str(path)
+        self.refresh_interval = refresh_interval
+        self._sign_index = sign_index
+        self._executor = executor
+        self._lock = threading.Lock()
+        self._schedule_lock = threading.Lock()
+        self._clips = None
+        self._index_version = None
+        self._checked_at = 0.0
+        self._scheduled = False
+
+    @property
+    def sign_index(self):
+        if self._sign_index is None:
+            self._sign_index = get_sign_index()
+        return self._sign_index
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._schedule_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sign-metadata')
+        return self._executor
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != METADATA_FORMAT_VERSION:
+            return {}
+        return data.get('clips', {})
+
+    def _save(self, clips):
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': METADATA_FORMAT_VERSION, 'clips': clips}, f,
+                      separators=(',', ':'), sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def refresh(self, rebuild=False):
+        """
+        Brings the index in line with the clips on disk and returns the
+        number of (updated, removed) entries.
+        """
+        with self._lock:
+            clips = {} if rebuild else (self._clips if self._clips is not None else self._load())
+            index = self.sign_index
+            version = index.version
+            current = {}
+            updated = 0
+            for name in index.names():
+                path = index.path(name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entry = clips.get(name)
+                if entry is None or entry.get('size') != stat.st_size or entry.get('mtime_ns') != stat.st_mtime_ns:
+                    entry = describe_clip(path, stat)
+                    updated += 1
+                current[name] = entry
+            removed = len(set(clips) - set(current))
+
+            if updated or removed or not os.path.exists(self.path):
+                try:
+                    self._save(current)
+                except OSError as e:
+                    print(f"Error saving sign metadata index: {e}")
+            self._clips = current
+            self._index_version = version
+            self._checked_at = time.monotonic()
+            return updated, removed
+
+    def _refresh(self):
+        if self._clips is None:
+            # Only reached when the startup refresh was skipped
+            self.refresh()
+            return
+        if self._index_version == self.sign_index.version and (
+                self.refresh_interval is None
+                or time.monotonic() - self._checked_at < self.refresh_interval):
+            return
+        # Clips overwritten in place do not change the directory mtime, so
+        # they are rescanned in the background; one scan at a time
+        with self._schedule_lock:
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.executor.submit(self._background_refresh)
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except OSError as e:
+            print(f"Error refreshing sign metadata index: {e}")
+            self._checked_at = time.monotonic()
+        finally:
+            with self._schedule_lock:
+                self._scheduled = False
+
+    def get(self, name):
+        """
+        Returns the metadata for the clip `name`, or None if there is no
+        such clip.
+        """
+        self._refresh()
+        name = self.sign_index.find(name)
+        if name is None:
+            return None
+        return self._clips.get(name)
+
+    def clips(self):
+        self._refresh()
+        return dict(self._clips)
+
+
+_metadata = None
+_metadata_lock = threading.Lock()
+
+
+def get_asset_metadata():
+    """
+    Returns the process-wide AssetMetadataIndex.
+    """
+    global _metadata
+    if _metadata is None:
+        with _metadata_lock:
+            if _metadata is None:
+                _metadata = AssetMetadataIndex()
+    return _metadata
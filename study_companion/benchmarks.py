@@ -0,0 +1,304 @@
+import gc
+import json
+import platform
+import random
+import time
+import tracemalloc
+
+import django
+from django.db import transaction
+
+# Seed for the generated corpora; change it and results stop being comparable
+CORPUS_SEED = 20240601
+
+SHORT_SENTENCES = [
+    "Hello, how are you?",
+    "Thank you for coming today.",
+    "I am studying computer science.",
+    "We will go to the library tomorrow.",
+    "She walked home after class.",
+    "Do not forget your homework.",
+    "The teacher explained the lesson again.",
+    "My friends are learning sign language.",
+    "Please open your books to page ten.",
+    "He does not understand the question.",
+    "They played football in the evening.",
+    "What time does the exam start?",
+    "I want to learn more about history.",
+    "The weather is beautiful today.",
+    "We are going to the museum next week.",
+    "Can you help me with this problem?",
+    "The computer is not working right now.",
+    "I finished my project yesterday.",
+    "Our class starts at nine in the morning.",
+    "Learning a new language takes time.",
+    "The students asked many good questions.",
+    "I will call you after the meeting.",
+    "Water boils at one hundred degrees.",
+    "The sun rises in the east.",
+    "She is reading a book about science.",
+    "We should protect the environment.",
+    "My brother works at the hospital.",
+    "Let us review the main ideas.",
+    "Plants need sunlight to grow.",
+    "The library closes early on Sunday.",
+]
+
+LECTURE_TERMS = [
+    "photosynthesis", "mitochondria", "algorithm", "variable", "equation",
+    "democracy", "economy", "ecosystem", "molecule", "gravity", "energy",
+    "network", "database", "function", "evolution", "climate", "history",
+    "language", "culture", "government", "computer", "science", "teacher",
+    "student", "example", "process", "system", "structure", "analysis",
+    "experiment", "theory", "result", "method", "model", "data",
+]
+
+LECTURE_TEMPLATES = [
+    "The {0} explains how {1} affects the {2}.",
+    "Students learn that {0} and {1} are closely related.",
+    "An important example of {0} is the {1} of a {2}.",
+    "We studied the {0} to understand the {1}.",
+    "The lecture compared {0} with {1} and {2}.",
+    "Scientists used a {0} to measure the {1}.",
+    "Remember that every {0} needs a clear {1}.",
+    "The {0} changed after the {1} was introduced.",
+]
+
+# The colors SUMMARY_SCHEMA allows for a key concept
+CONCEPT_COLORS = ["green", "blue", "purple"]
+
+
+def paragraphs(count=10, seed=CORPUS_SEED):
+    """
+    Returns `count` paragraphs of five to eight sentences each.
+    """
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(SHORT_SENTENCES) for _ in range(rng.randint(5, 8))) for _ in range(count)]
+
+
+def deck_summaries(count=5, seed=CORPUS_SEED):
+    """
+    Returns `count` summaries in the shape of SUMMARY_SCHEMA, like the
+    Gemini output for a lecture deck (about 400 words each).
+    """
+    rng = random.Random(seed + 1)
+    summaries = []
+    for _ in range(count):
+        sentences = []
+        for _ in range(40):
+            template = rng.choice(LECTURE_TEMPLATES)
+            sentences.append(template.format(*rng.sample(LECTURE_TERMS, 3)))
+        summaries.append({
+            'summary': ' '.join(sentences),
+            'key_concepts': [
+                {
+                    'title': term.capitalize(),
+                    'description': rng.choice(LECTURE_TEMPLATES).format(term, *rng.sample(LECTURE_TERMS, 2)),
+                    'color': rng.choice(CONCEPT_COLORS),
+                }
+                for term in rng.sample(LECTURE_TERMS, 4)
+            ],
+            'important_terms': rng.sample(LECTURE_TERMS, 6),
+        })
+    return summaries
+
+
+def percentile(sorted_values, pct):
+    """
+    Linear-interpolated percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def measure(func, inputs, iterations=3, warmup=1, setup=None):
+    """
+    Calls `func` on every input `iterations` times (after `warmup` untimed
+    rounds) and returns latency percentiles in milliseconds, throughput in
+    calls per second and the peak traced memory of one extra round.
+
+    `setup`, if given, runs untimed before every call.
+    """
+    for _ in range(warmup):
+        for item in inputs:
+            if setup:
+                setup()
+            func(item)
+
+    timings = []
+    for _ in range(iterations):
+        for item in inputs:
+            if setup:
+                setup()
+            started = time.perf_counter()
+            func(item)
+            timings.append(time.perf_counter() - started)
+
+    # Memory is traced in a separate round, tracemalloc skews the timings
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for item in inputs:
+            if setup:
+                setup()
+            func(item)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    total = sum(timings)
+    return {
+        'calls': len(timings),
+        'p50_ms': round(percentile(timings, 50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 95) * 1000, 3),
+        'p99_ms': round(percentile(timings, 99) * 1000, 3),
+        'mean_ms': round(total / len(timings) * 1000, 3) if timings else 0.0,
+        'throughput_per_s': round(len(timings) / total, 1) if total else 0.0,
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+class ConversionBenchmark:
+    """
+    Times each stage of text-to-sign conversion on the fixed corpora:
+    the gloss pipeline (cold and cached), clip lookup and manifest building,
+    and the live converter and summary pages through the Django test client.
+
+    The request stages create a throwaway user and uploads inside a
+    transaction that is rolled back afterwards, so the database is left as
+    it was.
+    """
+
+    STAGES = ['gloss_cold', 'gloss_cached', 'gloss_batch', 'asset_lookup', 'animation_view', 'summary_view']
+
+    def __init__(self, iterations=3, warmup=1, stages=None, engine=None):
+        self.iterations = iterations
+        self.warmup = warmup
+        self.stages = list(stages or self.STAGES)
+        self._engine = engine
+        self.corpora = {
+            'sentences': list(SHORT_SENTENCES),
+            'paragraphs': paragraphs(),
+            'summaries': [s['summary'] for s in deck_summaries()],
+        }
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from .gloss import get_gloss_engine
+            self._engine = get_gloss_engine()
+        return self._engine
+
+    def run(self):
+        results = {}
+        for stage in self.stages:
+            results[stage] = getattr(self, 'bench_' + stage)()
+        return {
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'corpus_seed': CORPUS_SEED,
+            'iterations': self.iterations,
+            'warmup': self.warmup,
+            'stages': results,
+        }
+
+    def _per_corpus(self, func, setup=None):
+        return {
+            name: measure(func, texts, self.iterations, self.warmup, setup=setup)
+            for name, texts in self.corpora.items()
+        }
+
+    def bench_gloss_cold(self):
+        engine = self.engine
+        return self._per_corpus(engine.to_gloss, setup=engine.result_cache.clear)
+
+    def bench_gloss_cached(self):
+        return self._per_corpus(self.engine.to_gloss)
+
+    def bench_gloss_batch(self):
+        engine = self.engine
+        return {
+            name: measure(engine.to_gloss_batch, [texts], self.iterations, self.warmup, setup=engine.result_cache.clear)
+            for name, texts in self.corpora.items()
+        }
+
+    def bench_asset_lookup(self):
+        from .playback import playback_manifest
+        engine = self.engine
+        glosses = {name: engine.to_gloss_batch(texts) for name, texts in self.corpora.items()}
+        index = engine.sign_index
+
+        def lookup(gloss):
+            for word in gloss:
+                index.find(word)
+
+        return {
+            'find': {name: measure(lookup, g, self.iterations, self.warmup) for name, g in glosses.items()},
+            'manifest': {name: measure(playback_manifest, g, self.iterations, self.warmup) for name, g in glosses.items()},
+        }
+
+    def _with_client(self, func):
+        """
+        Runs func(client, user) with a logged-in test client and rolls back
+        everything it wrote.
+        """
+        from django.conf import settings
+        from django.contrib.auth.models import User
+        from django.test import Client, override_settings
+
+        # The test client talks to "testserver"
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            with transaction.atomic():
+                user = User.objects.create_user(username='benchmark-user', password=None)
+                client = Client()
+                client.force_login(user)
+                try:
+                    return func(client, user)
+                finally:
+                    transaction.set_rollback(True)
+
+    def bench_animation_view(self):
+        from django.urls import reverse
+        url = reverse('animation')
+
+        def run(client, user):
+            def post(text):
+                response = client.post(url, {'sen': text})
+                assert response.status_code == 200, response.status_code
+            return self._per_corpus(post)
+
+        return self._with_client(run)
+
+    def bench_summary_view(self):
+        from django.urls import reverse
+        from .models import PPTUpload
+
+        def run(client, user):
+            urls = []
+            for summary in deck_summaries():
+                upload = PPTUpload.objects.create(
+                    user=user, title="Benchmark deck", file='ppt_uploads/benchmark.pptx',
+                    extracted_text=summary['summary'], summary_text=json.dumps(summary),
+                )
+                urls.append(reverse('summary', args=[upload.id]))
+
+            def get(url):
+                response = client.get(url)
+                assert response.status_code == 200, response.status_code
+
+            def reset_gloss():
+                PPTUpload.objects.filter(user=user).update(sign_words=None, sign_words_version='')
+                self.engine.result_cache.clear()
+
+            return {
+                'stored_gloss': measure(get, urls, self.iterations, self.warmup),
+                'regloss': measure(get, urls, self.iterations, self.warmup, setup=reset_gloss),
+            }
+
+        return self._with_client(run)
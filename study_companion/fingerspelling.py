@@ -0,0 +1,168 @@
+import string
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.urls import reverse
+
+from .asset_metadata import get_asset_metadata
+from .rendering import get_renderer
+from .sign_assets import get_sign_index
+
+# Characters packed into the sprite, in playback order
+FINGERSPELLING_CHARACTERS = string.ascii_uppercase + string.digits
+
+# The sprite is re-encoded when the letter clips differ in size, which takes
+# far longer than a per-request render; override with SIGN_SPRITE_RENDER_TIMEOUT
+SPRITE_RENDER_TIMEOUT = 15 * 60
+
+# Seconds before a sprite build that did not produce a file is scheduled again
+SPRITE_RETRY_INTERVAL = 10 * 60
+
+
+class FingerspellingSprite:
+    """
+    One video holding every letter and digit clip back to back, with the
+    start and end time of each character.
+
+    A spelled-out word then plays by seeking inside a single resource
+    instead of fetching one clip per letter. The sprite is rendered ahead of
+    time, by `index_sign_assets` or a job on its own single background
+    thread (so a long re-encode never occupies the upload pool), into
+    the SequenceRenderer's disk cache; `segments` only looks it up, so a
+    request never waits for ffmpeg. Until it exists (or without ffmpeg)
+    `segments` returns None and players fall back to per-letter clips.
+    """
+
+    def __init__(self, renderer=None, metadata=None, sign_index=None, executor=None):
+        self._renderer = renderer
+        self._metadata = metadata
+        self._sign_index = sign_index
+        self._executor = executor
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._state = None
+        self._scheduled = None
+
+    @property
+    def renderer(self):
+        if self._renderer is None:
+            self._renderer = get_renderer()
+        return self._renderer
+
+    @property
+    def metadata(self):
+        if self._metadata is None:
+            self._metadata = get_asset_metadata()
+        return self._metadata
+
+    @property
+    def sign_index(self):
+        if self._sign_index is None:
+            self._sign_index = get_sign_index()
+        return self._sign_index
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sign-sprite')
+        return self._executor
+
+    def _layout(self):
+        """
+        Returns (names, offsets) of the characters that have a clip with a
+        known duration.
+        """
+        names = []
+        offsets = {}
+        position = 0.0
+        for char in FINGERSPELLING_CHARACTERS:
+            name = self.sign_index.find(char)
+            entry = self.metadata.get(name) if name else None
+            if not entry or not entry.get('duration'):
+                continue
+            names.append(name)
+            offsets[name] = (round(position, 3), round(position + entry['duration'], 3))
+            position += entry['duration']
+        return names, offsets
+
+    def _current(self):
+        """
+        Returns (names, sprite) for the current sign index, where sprite is
+        what `segments` hands out once rendered. Recomputed only when the
+        index changes.
+        """
+        version = self.sign_index.version
+        state = self._state
+        if state is None or state[0] != version:
+            names, offsets = self._layout()
+            sprite = None
+            if names:
+                key = self.renderer.sequence_key(self.renderer.clip_paths(names))
+                sprite = {
+                    'key': key,
+                    'url': reverse('sign_render', args=[key]),
+                    'offsets': offsets,
+                }
+            state = self._state = (version, names, sprite)
+        return state[1], state[2]
+
+    def segments(self):
+        """
+        Returns {"key", "url", "offsets": {sign: (start, end)}} for the
+        current sprite if it has been rendered, else None. Never renders:
+        a missing sprite is scheduled on the sprite thread instead.
+        """
+        _, sprite = self._current()
+        if sprite is None:
+            return None
+        if self.renderer.cached_path(sprite['key']):
+            return sprite
+        self._schedule_build(sprite['key'])
+        return None
+
+    def build(self):
+        """
+        Renders the sprite if it is not cached yet and returns `segments()`,
+        or None if there are no letter clips or ffmpeg is unavailable or
+        fails.
+        """
+        with self._build_lock:
+            names, sprite = self._current()
+            if sprite is None:
+                return None
+            timeout = getattr(settings, 'SIGN_SPRITE_RENDER_TIMEOUT', SPRITE_RENDER_TIMEOUT)
+            if self.renderer.render(names, timeout=timeout) != sprite['key']:
+                return None
+        return sprite
+
+    def _schedule_build(self, key):
+        # One background build per sprite, retried after a while if it failed
+        if not self.renderer.available:
+            return
+        now = time.monotonic()
+        with self._lock:
+            scheduled = self._scheduled
+            if scheduled is not None and scheduled[0] == key and now - scheduled[1] < SPRITE_RETRY_INTERVAL:
+                return
+            self._scheduled = (key, now)
+        self.executor.submit(self.build)
+
+
+_sprite = None
+_sprite_lock = threading.Lock()
+
+
+def get_fingerspelling_sprite():
+    """
+    Returns the process-wide FingerspellingSprite.
+    """
+    global _sprite
+    if _sprite is None:
+        with _sprite_lock:
+            if _sprite is None:
+                _sprite = FingerspellingSprite()
+    return _sprite
@@ -0,0 +1,319 @@
+import string
+import threading
+import time
+
+import nltk
+from django.conf import settings
+from nltk.corpus import wordnet
+from nltk.stem import WordNetLemmatizer
+from nltk.tokenize import word_tokenize
+
+from .lru import LRUCache
+from .metrics import metric_family, stage_metrics, timed
+from .phrases import PhraseTrie, normalize_token
+from .sign_assets import get_sign_index
+
+# NLTK packages used by the pipeline (old and new names of the tokenizer and
+# tagger models, so any supported NLTK version finds what it needs)
+NLTK_PACKAGES = [
+    'punkt',
+    'punkt_tab',
+    'averaged_perceptron_tagger',
+    'averaged_perceptron_tagger_eng',
+    'wordnet',
+    'omw-1.4',
+]
+
+# Stopwords that carry no sign of their own
+STOP_WORDS = frozenset(["mightn't", 're', 'wasn', 'wouldn', 'be', 'has', 'that', 'does', 'shouldn', 'do', "you've", 'off', 'for', "didn't", 'm', 'ain', 'haven', "weren't", 'are', "she's", "wasn't", 'its', "haven't", "wouldn't", 'don', 'weren', 's', "you'd", "don't", 'doesn', "hadn't", 'is', 'was', "that'll", "should've", 'a', 'then', 'the', 'mustn', 'i', 'nor', 'as', "it's", "needn't", 'd', 'am', 'have', 'hasn', 'o', "aren't", "you'll", "couldn't", "you're", "mustn't", 'didn', "doesn't", 'll', 'an', 'hadn', 'whom', 'y', "hasn't", 'itself', 'couldn', 'needn', "shan't", 'isn', 'been', 'such', 'shan', "shouldn't", 'aren', 'being', 'were', 'did', 'ma', 't', 'having', 'mightn', 've', "isn't", "won't"])
+
+VERB_TAGS = frozenset(['VBG', 'VBD', 'VBZ', 'VBN', 'NN'])
+ADJECTIVE_TAGS = frozenset(['JJ', 'JJR', 'JJS', 'RBR', 'RBS'])
+
+PUNCTUATION = frozenset(string.punctuation)
+
+# Bump whenever the gloss rules change so stored glosses get recomputed
+GLOSS_RULES_VERSION = 2
+
+# Default cache sizes (entries); override with GLOSS_LEMMA_CACHE_SIZE and
+# GLOSS_RESULT_CACHE_SIZE in settings
+DEFAULT_LEMMA_CACHE_SIZE = 50000
+DEFAULT_RESULT_CACHE_SIZE = 5000
+
+
+class GlossEngine:
+    """
+    Converts English text into a sequence of sign names (gloss).
+
+    Pipeline: tokenize -> POS-tag -> phrase match -> stopword filter ->
+    lemmatize -> tense marker -> asset match. The tagger, lemmatizer and
+    stopword set are loaded once and shared by every request in the process.
+    Multi-word signs ("Thank You", "Do Not") are matched longest-first
+    before stopwords are dropped.
+
+    Lemmas are memoized per (word, tag) and full results per normalized
+    sentence in bounded LRU caches, so repeated phrases skip tagging entirely.
+    """
+
+    def __init__(self, sign_index=None, lemma_cache_size=None, result_cache_size=None):
+        self.stop_words = STOP_WORDS
+        self.lemmatizer = WordNetLemmatizer()
+        self._sign_index = sign_index
+        if lemma_cache_size is None:
+            lemma_cache_size = getattr(settings, 'GLOSS_LEMMA_CACHE_SIZE', DEFAULT_LEMMA_CACHE_SIZE)
+        if result_cache_size is None:
+            result_cache_size = getattr(settings, 'GLOSS_RESULT_CACHE_SIZE', DEFAULT_RESULT_CACHE_SIZE)
+        self.lemma_cache = LRUCache(lemma_cache_size)
+        self.result_cache = LRUCache(result_cache_size)
+        self._phrases = None
+        self._phrases_version = None
+
+    @property
+    def sign_index(self):
+        if self._sign_index is None:
+            self._sign_index = get_sign_index()
+        return self._sign_index
+
+    @property
+    def phrases(self):
+        """
+        Trie of the multi-word sign names, rebuilt when the clips change.
+        """
+        version = self.sign_index.version
+        if self._phrases is None or self._phrases_version != version:
+            self._phrases = PhraseTrie.from_names(self.sign_index.names())
+            self._phrases_version = version
+        return self._phrases
+
+    def load(self):
+        """
+        Loads the tokenizer, tagger and WordNet into memory and returns the
+        time it took in seconds. NLTK loads corpora lazily; touching them once
+        here keeps request threads from racing on the first load.
+
+        Nothing is downloaded: a LookupError is raised if the data has not
+        been provisioned with `manage.py download_nltk_data`.
+        """
+        started = time.perf_counter()
+        add_nltk_data_path()
+        word_tokenize('test')
+        nltk.pos_tag(['test'])
+        wordnet.ensure_loaded()
+        self.lemmatizer.lemmatize('test')
+        self.load_seconds = time.perf_counter() - started
+        return self.load_seconds
+
+    def tokenize(self, text):
+        return word_tokenize(text.lower())
+
+    def lemmatize(self, word, tag):
+        if tag in VERB_TAGS:
+            pos = 'v'
+        elif tag in ADJECTIVE_TAGS:
+            pos = 'a'
+        else:
+            pos = 'n'
+        key = (word, pos)
+        lemma = self.lemma_cache.get(key)
+        if lemma is None:
+            lemma = self.lemmatizer.lemmatize(word, pos=pos)
+            self.lemma_cache.set(key, lemma)
+        return lemma
+
+    def filter_and_lemmatize(self, tagged):
+        """
+        Replaces multi-word phrases with their sign, then drops stopwords and
+        punctuation and lemmatizes the remaining words.
+        """
+        phrases = self.phrases
+        tokens = [normalize_token(w) for w, _ in tagged] if len(phrases) else None
+        words = []
+        i = 0
+        while i < len(tagged):
+            if tokens is not None:
+                length, sign = phrases.longest_match(tokens, i)
+                if length:
+                    words.append(sign)
+                    i += length
+                    continue
+            w, tag = tagged[i]
+            i += 1
+            if w in self.stop_words or w in PUNCTUATION:
+                continue
+            lemma = self.lemmatize(w, tag)
+            words.append('Me' if lemma == 'I' else lemma)
+        return words
+
+    def tense_marker(self, tagged):
+        """
+        Returns the sign that marks the sentence tense ("Before", "Will",
+        "Now") or None.
+        """
+        tense = {
+            "future": 0,
+            "present": 0,
+            "past": 0,
+            "present_continuous": 0,
+        }
+        for _, tag in tagged:
+            if tag == "MD":
+                tense["future"] += 1
+            elif tag in ("VBD", "VBN"):
+                tense["past"] += 1
+            elif tag in ("VBP", "VBZ", "VBG"):
+                tense["present"] += 1
+                if tag == "VBG":
+                    tense["present_continuous"] += 1
+
+        probable_tense = max(tense, key=tense.get)
+        if probable_tense == "past" and tense["past"] >= 1:
+            return "Before"
+        if probable_tense == "future" and tense["future"] >= 1:
+            return "Will"
+        if probable_tense == "present" and tense["present_continuous"] >= 1:
+            return "Now"
+        return None
+
+    def match_assets(self, words):
+        """
+        Maps words to sign clips, fingerspelling words that have no clip.
+        """
+        sign_index = self.sign_index
+        gloss = []
+        for w in words:
+            sign = sign_index.find(w)
+            if sign:
+                gloss.append(sign)
+                continue
+            for c in w:
+                if c.isalnum():
+                    gloss.append(sign_index.find(c) or c.upper())
+        return gloss
+
+    def _gloss_tagged(self, tagged, mark_tense):
+        with timed('lemmatize'):
+            words = self.filter_and_lemmatize(tagged)
+            if mark_tense:
+                marker = self.tense_marker(tagged)
+                if marker and not any(w.casefold() == marker.casefold() for w in words):
+                    words.insert(0, marker)
+        with timed('asset_match'):
+            return self.match_assets(words)
+
+    def _result_key(self, text, mark_tense):
+        # Results depend on the clip vocabulary, so key on the index version
+        return (self.sign_index.version, mark_tense, ' '.join(text.lower().split()))
+
+    def to_gloss(self, text, mark_tense=True):
+        """
+        Returns the list of sign names for `text`.
+        """
+        if not text:
+            return []
+        key = self._result_key(text, mark_tense)
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            return list(cached)
+        with timed('tokenize'):
+            tokens = self.tokenize(text)
+        with timed('pos_tag'):
+            tagged = nltk.pos_tag(tokens)
+        gloss = self._gloss_tagged(tagged, mark_tense)
+        self.result_cache.set(key, tuple(gloss))
+        return gloss
+
+    def to_gloss_batch(self, texts, mark_tense=True):
+        """
+        Returns one gloss list per text. Cache misses are tagged together in
+        a single pos_tag_sents call.
+        """
+        results = [None] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            if not text:
+                results[i] = []
+                continue
+            key = self._result_key(text, mark_tense)
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                results[i] = list(cached)
+            else:
+                with timed('tokenize'):
+                    pending.append((i, key, self.tokenize(text)))
+
+        if pending:
+            with timed('pos_tag'):
+                tagged_sents = nltk.pos_tag_sents([tokens for _, _, tokens in pending])
+            for (i, key, _), tagged in zip(pending, tagged_sents):
+                gloss = self._gloss_tagged(tagged, mark_tense)
+                self.result_cache.set(key, tuple(gloss))
+                results[i] = gloss
+        return results
+
+    def cache_stats(self):
+        return {
+            'lemma': self.lemma_cache.stats(),
+            'result': self.result_cache.stats(),
+        }
+
+
+def gloss_version(sign_index=None):
+    """
+    Identifies the gloss rules and clip vocabulary a stored gloss was built
+    with. Does not need the NLP resources loaded.
+    """
+    if sign_index is None:
+        sign_index = get_sign_index()
+    return f"{GLOSS_RULES_VERSION}-{sign_index.fingerprint()[:16]}"
+
+
+def add_nltk_data_path():
+    """
+    Makes the project's NLTK_DATA_DIR visible to NLTK.
+    """
+    data_dir = getattr(settings, 'NLTK_DATA_DIR', None)
+    if data_dir and data_dir not in nltk.data.path:
+        nltk.data.path.append(data_dir)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_gloss_engine():
+    """
+    Returns the process-wide GlossEngine, loading NLP resources on first use.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = GlossEngine()
+                engine.load()
+                _engine = engine
+    return _engine
+
+
+def gloss_cache_metrics():
+    """
+    Prometheus lines for the process-wide engine's lemma and result caches;
+    nothing until the engine is loaded.
+    """
+    engine = _engine
+    if engine is None:
+        return []
+    stats = engine.cache_stats()
+    caches = sorted(stats)
+    return (
+        metric_family('a2sl_gloss_cache_hits_total', 'counter', 'Gloss cache lookups answered from memory.',
+                      [({'cache': name}, stats[name]['hits']) for name in caches])
+        + metric_family('a2sl_gloss_cache_misses_total', 'counter', 'Gloss cache lookups that had to compute.',
+                        [({'cache': name}, stats[name]['misses']) for name in caches])
+        + metric_family('a2sl_gloss_cache_entries', 'gauge', 'Entries held in each gloss cache.',
+                        [({'cache': name}, stats[name]['size']) for name in caches])
+        + metric_family('a2sl_gloss_cache_max_entries', 'gauge', 'Capacity of each gloss cache.',
+                        [({'cache': name}, stats[name]['maxsize']) for name in caches])
+    )
+
+
+stage_metrics.register(gloss_cache_metrics)
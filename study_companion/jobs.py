@@ -0,0 +1,180 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, transaction
+
+from .metrics import timed
+
+# Default number of uploads processed concurrently per worker process
+DEFAULT_WORKER_THREADS = 2
+
+# Quiz variants generated right after an upload is summarized; override with
+# QUIZ_PREGENERATE_DIFFICULTIES (empty list disables) and QUIZ_PREGENERATE_QUESTIONS
+DEFAULT_PREGENERATE_DIFFICULTIES = ['Easy', 'Medium', 'Hard']
+DEFAULT_PREGENERATE_QUESTIONS = 5
+
+# How long partial results of an in-flight upload are kept for streaming
+PROGRESS_TIMEOUT = 15 * 60
+
+# CACHES alias for partial results; it must be shared between processes
+# (not LocMemCache) since the upload may run in another worker than the stream
+DEFAULT_PROGRESS_CACHE_ALIAS = 'progress'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def progress_key(upload_id):
+    return f"upload-progress:{upload_id}"
+
+
+def progress_cache():
+    alias = getattr(settings, 'PROGRESS_CACHE_ALIAS', DEFAULT_PROGRESS_CACHE_ALIAS)
+    if alias not in settings.CACHES:
+        alias = 'default'
+    return caches[alias]
+
+
+def publish_progress(upload_id, data):
+    """
+    Shares partial summary results with the summary stream and
+    upload_status_api while the upload is still being processed.
+    """
+    progress_cache().set(progress_key(upload_id), data, PROGRESS_TIMEOUT)
+
+
+def get_progress(upload_id):
+    return progress_cache().get(progress_key(upload_id))
+
+
+def get_executor():
+    """
+    Returns the process-wide thread pool used for upload processing.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'PPT_WORKER_THREADS', DEFAULT_WORKER_THREADS),
+                    thread_name_prefix='ppt-worker',
+                )
+    return _executor
+
+
+def process_upload(upload_id):
+    """
+    Extracts the text of an uploaded deck, summarizes it and generates the
+    sign gloss, recording progress in PPTUpload.status.
+    """
+    from .models import PPTUpload
+    from .ai_services import SummaryError, iter_slides, slide_text, summarize_deck, summary_sign_words
+
+    try:
+        upload = PPTUpload.objects.get(id=upload_id)
+        upload.status = PPTUpload.STATUS_PROCESSING
+        upload.save(update_fields=['status'])
+
+        with timed('ppt_parse'):
+            slides = list(iter_slides(upload.file.path))
+            upload.extracted_text = "\n\n".join(slide_text(slide) for slide in slides)
+        with timed('summarize'):
+            # A Gemini failure fails the upload (and leaves it to
+            # `process_uploads --retry-failed`) instead of becoming its summary
+            upload.summary_text = summarize_deck(
+                slides,
+                on_progress=lambda data: publish_progress(upload_id, data),
+                raise_errors=True
+            )
+
+        # Store the sign gloss in the same save that marks the upload done so
+        # the summary page never sees a finished upload without its gloss
+        try:
+            summary_sign_words(upload, save=False)
+        except Exception as e:
+            print(f"Error generating sign language: {e}")
+
+        upload.status = PPTUpload.STATUS_DONE
+        upload.error_message = ''
+        upload.save(update_fields=[
+            'extracted_text', 'summary_text', 'sign_words', 'sign_words_version',
+            'status', 'error_message'
+        ])
+
+        enqueue_quiz_pregeneration(upload.id)
+    except PPTUpload.DoesNotExist:
+        pass
+    except SummaryError as e:
+        print(f"Error summarizing PPT: {e}")
+        PPTUpload.objects.filter(id=upload_id).update(
+            status=PPTUpload.STATUS_FAILED,
+            error_message=str(e)
+        )
+    except Exception as e:
+        print(f"Error processing PPT: {e}")
+        PPTUpload.objects.filter(id=upload_id).update(
+            status=PPTUpload.STATUS_FAILED,
+            error_message=f'Error processing file: {e}'
+        )
+    finally:
+        progress_cache().delete(progress_key(upload_id))
+
+
+def pregenerate_quiz(upload_id, difficulty, num_questions):
+    """
+    Generates and stores one quiz variant unless it is already stored.
+    """
+    from .models import PPTUpload
+    from .ai_services import generate_mcq
+    from .quizzes import get_cached_quiz, store_quiz
+
+    upload = PPTUpload.objects.filter(id=upload_id).select_related('content').first()
+    if upload is None or not upload.extracted_text:
+        return
+    if get_cached_quiz(upload, difficulty, num_questions) is not None:
+        return
+    try:
+        questions = generate_mcq(upload.extracted_text, num_questions, difficulty)
+    except Exception as e:
+        print(f"MCQ Pregeneration Error: {e}")
+        return
+    if questions:
+        store_quiz(upload_id, difficulty, num_questions, questions)
+
+
+def enqueue_quiz_pregeneration(upload_id):
+    """
+    Schedules the common quiz variants so the first quiz load is a DB read.
+    """
+    num_questions = getattr(settings, 'QUIZ_PREGENERATE_QUESTIONS', DEFAULT_PREGENERATE_QUESTIONS)
+    for difficulty in getattr(settings, 'QUIZ_PREGENERATE_DIFFICULTIES', DEFAULT_PREGENERATE_DIFFICULTIES):
+        enqueue(pregenerate_quiz, upload_id, difficulty, num_questions)
+
+
+def _run_in_worker(func, *args):
+    # Pool threads keep their own DB connections; drop stale ones around each job
+    close_old_connections()
+    try:
+        func(*args)
+    finally:
+        close_old_connections()
+
+
+def enqueue(func, *args):
+    """
+    Schedules `func(*args)` on the worker pool once the current transaction
+    commits. With PPT_PROCESS_EAGER the work runs inline.
+    """
+    if getattr(settings, 'PPT_PROCESS_EAGER', False):
+        func(*args)
+        return
+    transaction.on_commit(lambda: get_executor().submit(_run_in_worker, func, *args))
+
+
+def enqueue_upload(upload_id):
+    """
+    Schedules an upload for background processing.
+    """
+    enqueue(process_upload, upload_id)
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from .metrics import metric_family, stage_metrics
+
+# Name of the CACHES alias holding LLM responses
+DEFAULT_CACHE_ALIAS = 'llm'
+
+
+def normalize_text(text):
+    """
+    Collapses whitespace so re-exported decks with different spacing share
+    cache entries.
+    """
+    return ' '.join((text or '').split())
+
+
+def llm_cache_key(kind, model, prompt_version, text, schema, **params):
+    """
+    Content-addressed key: a hash of everything that determines the response.
+    """
+    payload = json.dumps({
+        'kind': kind,
+        'model': model,
+        'prompt_version': prompt_version,
+        'text': normalize_text(text),
+        'schema': schema,
+        'params': params,
+    }, sort_keys=True)
+    return f"llm:{kind}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+class LLMResponseCache:
+    """
+    Stores LLM responses in the configured cache backend (file-based by
+    default, with TTL and entry-count culling) and counts hits and misses.
+    """
+
+    def __init__(self, alias=None):
+        self._alias = alias
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        alias = self._alias or getattr(settings, 'LLM_CACHE_ALIAS', DEFAULT_CACHE_ALIAS)
+        if alias not in settings.CACHES:
+            alias = 'default'
+        return caches[alias]
+
+    def get(self, key):
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def peek(self, key):
+        """
+        Reads without counting a hit or miss, for re-checks after waiting on
+        another worker's call.
+        """
+        return self.backend.get(key)
+
+    def set(self, key, value):
+        self.backend.set(key, value)
+
+    # BaseCache.aget/aset wrap the sync methods on the one thread ASGI shares
+    # between all sync code; the file reads run on the thread pool instead
+    async def aget(self, key):
+        value = await sync_to_async(self.backend.get, thread_sensitive=False)(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    async def apeek(self, key):
+        return await sync_to_async(self.backend.get, thread_sensitive=False)(key)
+
+    async def aset(self, key, value):
+        await sync_to_async(self.backend.set, thread_sensitive=False)(key, value)
+
+    def entries(self):
+        """
+        Number of responses stored, or None for backends that cannot count
+        them cheaply (only the file-based and local-memory ones can).
+        """
+        backend = self.backend
+        if isinstance(backend, FileBasedCache):
+            return len(backend._list_cache_files())
+        if isinstance(backend, LocMemCache):
+            return len(backend._cache)
+        return None
+
+    def stats(self):
+        entries = self.entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': entries,
+            }
+
+
+llm_cache = LLMResponseCache()
+
+
+def llm_cache_metrics():
+    """
+    Prometheus lines for the LLM response cache: this process's hits and
+    misses, and the entries stored in the (shared) backend.
+    """
+    stats = llm_cache.stats()
+    lines = (
+        metric_family('a2sl_llm_cache_hits_total', 'counter', 'Gemini responses served from the cache.',
+                      [({}, stats['hits'])])
+        + metric_family('a2sl_llm_cache_misses_total', 'counter', 'Cache lookups that needed a Gemini call.',
+                        [({}, stats['misses'])])
+    )
+    if stats['entries'] is not None:
+        lines += metric_family('a2sl_llm_cache_entries', 'gauge', 'Gemini responses stored in the cache.',
+                               [({}, stats['entries'])])
+    return lines
+
+
+stage_metrics.register(llm_cache_metrics)
@@ -0,0 +1,62 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from study_companion.benchmarks import ConversionBenchmark
+
+
+class Command(BaseCommand):
+    help = "Benchmarks text-to-sign conversion on fixed corpora and reports latency, throughput and memory as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, default=3,
+            help="Timed rounds over each corpus (default 3).",
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=1,
+            help="Untimed rounds before measuring (default 1).",
+        )
+        parser.add_argument(
+            '--stage', action='append', choices=ConversionBenchmark.STAGES, dest='stages',
+            help="Stage to run; repeat for several. Defaults to all stages.",
+        )
+        parser.add_argument(
+            '--output',
+            help="Write the JSON report to this file instead of stdout.",
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError("--iterations must be at least 1")
+        benchmark = ConversionBenchmark(
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            stages=options['stages'],
+        )
+        try:
+            report = benchmark.run()
+        except LookupError as e:
+            raise CommandError(f"NLTK data is missing, run `python manage.py download_nltk_data`: {e}")
+
+        output = json.dumps(report, indent=2)
+        if not options['output']:
+            self.stdout.write(output)
+            return
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        for stage, groups in report['stages'].items():
+            for name, stats in self._flatten(groups):
+                self.stdout.write(
+                    f"{stage:<16} {name:<22} p50 {stats['p50_ms']:>9.3f}ms  p95 {stats['p95_ms']:>9.3f}ms  "
+                    f"p99 {stats['p99_ms']:>9.3f}ms  {stats['throughput_per_s']:>9.1f}/s  "
+                    f"peak {stats['peak_memory_kb']:>9.1f}KB"
+                )
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def _flatten(self, groups, prefix=''):
+        for name, value in groups.items():
+            if 'p50_ms' in value:
+                yield prefix + name, value
+            else:
+                yield from self._flatten(value, prefix + name + '.')
@@ -0,0 +1,37 @@
+import nltk
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from study_companion.gloss import NLTK_PACKAGES, GlossEngine
+
+
+class Command(BaseCommand):
+    help = "Downloads the NLTK data used by the sign language pipeline into NLTK_DATA_DIR."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Only verify the installed data and report how long preloading takes.",
+        )
+        parser.add_argument(
+            '--dir', default=None,
+            help="Download directory (defaults to settings.NLTK_DATA_DIR).",
+        )
+
+    def handle(self, *args, **options):
+        download_dir = options['dir'] or settings.NLTK_DATA_DIR
+        if download_dir not in nltk.data.path:
+            nltk.data.path.append(download_dir)
+
+        if not options['check']:
+            for package in NLTK_PACKAGES:
+                if nltk.download(package, download_dir=download_dir, quiet=True):
+                    self.stdout.write(f"  {package}: ok")
+                else:
+                    self.stderr.write(f"  {package}: failed")
+
+        try:
+            seconds = GlossEngine().load()
+        except (LookupError, AttributeError) as e:
+            raise CommandError(f"NLTK data is incomplete: {e}")
+        self.stdout.write(self.style.SUCCESS(f"NLTK data verified, preload took {seconds:.3f}s"))
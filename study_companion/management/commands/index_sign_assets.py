@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from study_companion.asset_metadata import AssetMetadataIndex
+from study_companion.fingerspelling import FingerspellingSprite
+from study_companion.rendering import SequenceRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        "Indexes duration, resolution, codec, size and checksum of the sign clips "
+        "and renders the fingerspelling sprite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help="Re-parse and re-hash every clip instead of only changed ones.",
+        )
+        parser.add_argument(
+            '--path',
+            help="Index file to write (defaults to SIGN_METADATA_PATH).",
+        )
+        parser.add_argument(
+            '--no-sprite', action='store_true',
+            help="Skip rendering the fingerspelling sprite.",
+        )
+
+    def handle(self, *args, **options):
+        index = AssetMetadataIndex(path=options['path'])
+        updated, removed = index.refresh(rebuild=options['rebuild'])
+        clips = index.clips()
+
+        invalid = sorted(name for name, entry in clips.items() if 'error' in entry)
+        for name in invalid:
+            self.stderr.write(f"{name}: {clips[name]['error']}")
+
+        total = sum(entry.get('duration') or 0 for entry in clips.values())
+        self.stdout.write(
+            f"{len(clips)} clip(s), {updated} indexed, {removed} removed, "
+            f"{total:.1f}s of video -> {index.path}"
+        )
+        if invalid:
+            raise CommandError(f"{len(invalid)} clip(s) are not valid MP4 files")
+        if not options['no_sprite']:
+            self.build_sprite(index)
+        self.stdout.write(self.style.SUCCESS("Sign metadata index is up to date"))
+
+    def build_sprite(self, index):
+        renderer = SequenceRenderer(sign_index=index.sign_index, metadata=index)
+        sprite = FingerspellingSprite(renderer=renderer, metadata=index, sign_index=index.sign_index)
+        if not renderer.available:
+            self.stdout.write("ffmpeg not found, fingerspelling sprite not rendered")
+            return
+        segments = sprite.build()
+        if segments is None:
+            self.stderr.write("Could not render the fingerspelling sprite")
+            return
+        self.stdout.write(f"Fingerspelling sprite: {len(segments['offsets'])} character(s) -> {segments['key']}")
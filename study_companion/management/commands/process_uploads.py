@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from study_companion.jobs import process_upload
+from study_companion.models import PPTUpload
+
+
+class Command(BaseCommand):
+    help = "Processes uploads left pending (e.g. after a worker restart) in the foreground."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retry-failed', action='store_true',
+            help="Also retry uploads whose processing failed.",
+        )
+
+    def handle(self, *args, **options):
+        statuses = [PPTUpload.STATUS_PENDING, PPTUpload.STATUS_PROCESSING]
+        if options['retry_failed']:
+            statuses.append(PPTUpload.STATUS_FAILED)
+
+        upload_ids = list(
+            PPTUpload.objects.filter(status__in=statuses).order_by('uploaded_at').values_list('id', flat=True)
+        )
+        for upload_id in upload_ids:
+            process_upload(upload_id)
+            status = PPTUpload.objects.filter(id=upload_id).values_list('status', flat=True).first()
+            self.stdout.write(f"Upload {upload_id}: {status}")
+        self.stdout.write(self.style.SUCCESS(f"Processed {len(upload_ids)} upload(s)"))
@@ -0,0 +1,21 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from study_companion.quizzes import rebuild_quiz_totals
+
+
+class Command(BaseCommand):
+    help = "Recomputes the running quiz totals on user profiles from the stored quiz results."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', action='append', dest='usernames', metavar='USERNAME',
+            help="Only rebuild this user's totals (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        users = None
+        if options['usernames']:
+            users = User.objects.filter(username__in=options['usernames'])
+        updated = rebuild_quiz_totals(users)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt quiz totals for {updated} profile(s)"))
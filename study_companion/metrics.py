@@ -0,0 +1,160 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+METRIC_NAME = 'a2sl_stage_duration_seconds'
+
+# Per-request list of (stage, seconds), set by ServerTimingMiddleware
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram in the Prometheus sense: observations are
+    counted in the first bucket whose upper bound they fit under.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+
+    def snapshot(self):
+        """
+        Returns (cumulative bucket counts including +Inf, sum, count).
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative = []
+        running = 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total, running
+
+
+class StageMetrics:
+    """
+    One duration histogram per pipeline stage, kept in process memory.
+    Each worker process reports its own numbers.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, Histogram(self.buckets))
+        histogram.observe(seconds)
+
+    def clear(self):
+        with self._lock:
+            self._histograms = {}
+
+    def register(self, collector):
+        """
+        Adds a callable returning more exposition lines (see metric_family)
+        to every scrape, e.g. cache counters kept by another module.
+        """
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def render_prometheus(self):
+        """
+        Returns the histograms, followed by the registered collectors'
+        metrics, in the Prometheus text exposition format.
+        """
+        lines = [
+            f'# HELP {METRIC_NAME} Time spent in each conversion stage.',
+            f'# TYPE {METRIC_NAME} histogram',
+        ]
+        for stage in sorted(self._histograms):
+            cumulative, total, count = self._histograms[stage].snapshot()
+            bounds = [f'{b:g}' for b in self._histograms[stage].buckets] + ['+Inf']
+            for bound, value in zip(bounds, cumulative):
+                lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="{bound}"}} {value}')
+            lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {count}')
+        for collector in list(self._collectors):
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+
+def metric_family(name, kind, help_text, samples):
+    """
+    Exposition lines for one counter or gauge; samples are (labels, value)
+    pairs, labels a dict.
+    """
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+    for labels, value in samples:
+        label_text = ','.join(f'{key}="{labels[key]}"' for key in sorted(labels))
+        lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+    return lines
+
+
+stage_metrics = StageMetrics()
+
+
+@contextmanager
+def timed(stage):
+    """
+    Times the enclosed block as `stage`: recorded in the process histograms
+    and, inside a request handled by ServerTimingMiddleware, reported in the
+    response's Server-Timing header.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_metrics.observe(stage, elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+
+def start_request_timing():
+    """
+    Starts collecting stage timings for the current request; returns the
+    token for `stop_request_timing`.
+    """
+    return _request_timings.set([])
+
+
+def stop_request_timing(token):
+    """
+    Stops collecting and returns the request's timings summed per stage, in
+    the order the stages first ran.
+    """
+    timings = _request_timings.get() or []
+    _request_timings.reset(token)
+    totals = {}
+    for stage, elapsed in timings:
+        totals[stage] = totals.get(stage, 0.0) + elapsed
+    return totals
+
+
+def server_timing_header(totals):
+    return ', '.join(f'{stage};dur={seconds * 1000:.2f}' for stage, seconds in totals.items())
@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.decorators import sync_and_async_middleware
+
+from .metrics import server_timing_header, start_request_timing, stop_request_timing
+
+
+@sync_and_async_middleware
+def server_timing_middleware(get_response):
+    """
+    Adds a Server-Timing header listing the time spent in each instrumented
+    stage (tokenize, pos_tag, gemini, ...) plus the whole request, so the
+    breakdown shows up in the browser devtools. Enabled by SERVER_TIMING,
+    which defaults to DEBUG.
+    """
+    if not getattr(settings, 'SERVER_TIMING', settings.DEBUG):
+        raise MiddlewareNotUsed()
+
+    def finish(response, token, started):
+        totals = stop_request_timing(token)
+        totals['total'] = time.perf_counter() - started
+        response['Server-Timing'] = server_timing_header(totals)
+        return response
+
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            started = time.perf_counter()
+            token = start_request_timing()
+            response = await get_response(request)
+            return finish(response, token, started)
+    else:
+        def middleware(request):
+            started = time.perf_counter()
+            token = start_request_timing()
+            response = get_response(request)
+            return finish(response, token, started)
+    return middleware
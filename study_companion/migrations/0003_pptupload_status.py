@@ -0,0 +1,23 @@
+# Generated by Django 4.1.13 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study_companion', '0002_userprofile_quizresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pptupload',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='done', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='pptupload',
+            name='error_message',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
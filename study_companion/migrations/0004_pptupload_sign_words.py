@@ -0,0 +1,23 @@
+# Generated by Django 4.1.13 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study_companion', '0003_pptupload_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pptupload',
+            name='sign_words',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pptupload',
+            name='sign_words_version',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
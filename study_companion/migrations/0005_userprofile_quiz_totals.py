@@ -0,0 +1,46 @@
+# Generated by Django 4.1.13 on 2026-10-18 12:40
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_quiz_totals(apps, schema_editor):
+    QuizResult = apps.get_model('study_companion', 'QuizResult')
+    UserProfile = apps.get_model('study_companion', 'UserProfile')
+    results = QuizResult.objects.filter(user=OuterRef('user')).order_by().values('user')
+
+    def total(aggregate):
+        return Coalesce(Subquery(results.annotate(value=aggregate).values('value')), 0)
+
+    UserProfile.objects.update(
+        quiz_score_total=total(Sum('score')),
+        quiz_possible_total=total(Sum('total')),
+        quiz_count=total(Count('id')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study_companion', '0004_pptupload_sign_words'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='quiz_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='quiz_possible_total',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='quiz_score_total',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_quiz_totals, migrations.RunPython.noop),
+    ]
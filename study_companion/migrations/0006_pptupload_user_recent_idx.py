@@ -0,0 +1,19 @@
+# Generated by Django 4.1.13 on 2026-10-18 13:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study_companion', '0005_userprofile_quiz_totals'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pptupload',
+            index=models.Index(fields=['user', '-uploaded_at', '-id'], name='pptupload_user_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.1.13 on 2026-10-18 14:20
+
+import django.db.models.deletion
+import study_companion.fields
+from django.db import migrations, models
+
+BATCH_SIZE = 200
+
+
+def copy_content(apps, schema_editor):
+    PPTUpload = apps.get_model('study_companion', 'PPTUpload')
+    PPTContent = apps.get_model('study_companion', 'PPTContent')
+    rows = (PPTUpload.objects
+            .exclude(extracted_text__isnull=True, summary_text__isnull=True, quiz_data__isnull=True)
+            .values_list('id', 'extracted_text', 'summary_text', 'quiz_data')
+            .iterator(chunk_size=BATCH_SIZE))
+    batch = []
+    for upload_id, extracted_text, summary_text, quiz_data in rows:
+        batch.append(PPTContent(upload_id=upload_id, extracted_text=extracted_text,
+                                summary_text=summary_text, quiz_data=quiz_data))
+        if len(batch) >= BATCH_SIZE:
+            PPTContent.objects.bulk_create(batch)
+            batch = []
+    PPTContent.objects.bulk_create(batch)
+
+
+def restore_content(apps, schema_editor):
+    PPTUpload = apps.get_model('study_companion', 'PPTUpload')
+    PPTContent = apps.get_model('study_companion', 'PPTContent')
+    for content in PPTContent.objects.iterator(chunk_size=BATCH_SIZE):
+        PPTUpload.objects.filter(id=content.upload_id).update(
+            extracted_text=content.extracted_text,
+            summary_text=content.summary_text,
+            quiz_data=content.quiz_data,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study_companion', '0006_pptupload_user_recent_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PPTContent',
+            fields=[
+                ('upload', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='content', serialize=False, to='study_companion.pptupload')),
+                ('extracted_text', study_companion.fields.CompressedTextField(blank=True, null=True)),
+                ('summary_text', study_companion.fields.CompressedTextField(blank=True, null=True)),
+                ('quiz_data', study_companion.fields.CompressedJSONField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(copy_content, restore_content),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.1.13 on 2026-10-18 14:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study_companion', '0007_pptcontent'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='pptupload',
+            name='extracted_text',
+        ),
+        migrations.RemoveField(
+            model_name='pptupload',
+            name='quiz_data',
+        ),
+        migrations.RemoveField(
+            model_name='pptupload',
+            name='summary_text',
+        ),
+    ]
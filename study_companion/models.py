@@ -1,22 +1,115 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+from .fields import CompressedJSONField, CompressedTextField
+
 class PPTUpload(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     file = models.FileField(upload_to='ppt_uploads/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
     title = models.CharField(max_length=255, blank=True)
-    
+
+    # Sign gloss of the summary, computed when the summary is written.
+    # sign_words_version records the gloss rules/vocabulary it was built with.
+    sign_words = models.JSONField(blank=True, null=True)
+    sign_words_version = models.CharField(max_length=64, blank=True, default='')
+
+    # Background processing state (uploads are processed by study_companion.jobs)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_DONE)
+    error_message = models.TextField(blank=True, default='')
+
+    class Meta:
+        indexes = [
+            # Newest-first listings per user (see study_companion.pagination)
+            models.Index(fields=['user', '-uploaded_at', '-id'], name='pptupload_user_recent_idx'),
+        ]
+
+    # Large payloads live compressed in PPTContent; see the properties below
+    CONTENT_FIELDS = ('extracted_text', 'summary_text', 'quiz_data')
+
+    @property
+    def is_processing(self):
+        return self.status in (self.STATUS_PENDING, self.STATUS_PROCESSING)
+
+    def _content(self):
+        """
+        The upload's PPTContent, loaded on first use (or by
+        select_related('content')). An unsaved one is made if none exists.
+        """
+        try:
+            return self.content
+        except PPTContent.DoesNotExist:
+            content = PPTContent()
+            self.content = content
+            return content
+
+    def _content_value(name):
+        def getter(self):
+            return getattr(self._content(), name)
+
+        def setter(self, value):
+            setattr(self._content(), name, value)
+            self._content_changed = True
+
+        return property(getter, setter)
+
     # Store processed data to avoid re-running AI expensive calls
-    extracted_text = models.TextField(blank=True, null=True)
-    summary_text = models.TextField(blank=True, null=True)
-    
+    extracted_text = _content_value('extracted_text')
+    summary_text = _content_value('summary_text')
     # Store generated quiz as JSON
-    quiz_data = models.JSONField(blank=True, null=True)
+    quiz_data = _content_value('quiz_data')
+    del _content_value
+
+    def save(self, *args, **kwargs):
+        """
+        Saves the upload and then, if any of CONTENT_FIELDS were assigned,
+        its PPTContent. update_fields may name content fields.
+        """
+        update_fields = kwargs.get('update_fields')
+        content_fields = None
+        if update_fields is not None:
+            content_fields = [f for f in update_fields if f in self.CONTENT_FIELDS]
+            kwargs['update_fields'] = [f for f in update_fields if f not in self.CONTENT_FIELDS]
+        if kwargs.get('update_fields') != []:
+            super().save(*args, **kwargs)
+
+        if getattr(self, '_content_changed', False) and content_fields != []:
+            content = self.content
+            content.upload = self
+            if content._state.adding or content_fields is None:
+                content.save()
+            else:
+                content.save(update_fields=content_fields)
+            self._content_changed = False
     
     def __str__(self):
         return f"{self.title} - {self.uploaded_at.strftime('%Y-%m-%d')}"
 
+class PPTContent(models.Model):
+    """
+    The large per-upload payloads, compressed and kept out of the
+    PPTUpload rows that listings and ownership checks read. Accessed
+    through PPTUpload.extracted_text, summary_text and quiz_data.
+    """
+    upload = models.OneToOneField(PPTUpload, on_delete=models.CASCADE, primary_key=True, related_name='content')
+    extracted_text = CompressedTextField(blank=True, null=True)
+    summary_text = CompressedTextField(blank=True, null=True)
+    quiz_data = CompressedJSONField(blank=True, null=True)
+
+    def __str__(self):
+        return f"Content of upload {self.upload_id}"
+
 class QuizResult(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     upload = models.ForeignKey(PPTUpload, on_delete=models.CASCADE)
@@ -35,11 +128,27 @@ class UserProfile(models.Model):
     last_activity_date = models.DateField(null=True, blank=True)
     total_xp = models.IntegerField(default=0)
 
+    # Running quiz totals, kept in step with QuizResult by quiz_save_result
+    # (rebuild with `manage.py rebuild_quiz_totals`)
+    quiz_score_total = models.IntegerField(default=0)
+    quiz_possible_total = models.IntegerField(default=0)
+    quiz_count = models.IntegerField(default=0)
+
+    @property
+    def vocab_mastery(self):
+        """
+        Average quiz accuracy as a whole percentage.
+        """
+        if self.quiz_possible_total <= 0:
+            return 0
+        return int((self.quiz_score_total / self.quiz_possible_total) * 100)
+
     def __str__(self):
         return f"{self.user.username}'s Profile"
 
 # Signal to create UserProfile when User is created
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 @receiver(post_save, sender=User)
@@ -47,9 +156,11 @@ def create_user_profile(sender, instance, created, **kwargs):
     if created:
         UserProfile.objects.create(user=instance)
 
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    try:
-        instance.userprofile.save()
-    except:
-        pass
+@receiver(post_delete, sender=QuizResult)
+def remove_quiz_from_totals(sender, instance, **kwargs):
+    # Also runs for results deleted along with their upload
+    UserProfile.objects.filter(user_id=instance.user_id).update(
+        quiz_score_total=F('quiz_score_total') - instance.score,
+        quiz_possible_total=F('quiz_possible_total') - instance.total,
+        quiz_count=F('quiz_count') - 1,
+    )
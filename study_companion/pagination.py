@@ -0,0 +1,54 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+from .models import PPTUpload
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Columns the upload listings need; the rest of the row (e.g. the stored
+# sign gloss) is never loaded for a list
+LISTING_FIELDS = ('id', 'user', 'title', 'uploaded_at', 'status')
+
+
+def encode_cursor(upload):
+    """
+    Opaque cursor pointing just after `upload` in newest-first order.
+    """
+    raw = f"{upload.uploaded_at.isoformat()}|{upload.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Returns (uploaded_at, id) from a cursor. Raises ValueError if malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        uploaded_at, upload_id = raw.split('|')
+        return datetime.fromisoformat(uploaded_at), int(upload_id)
+    except (TypeError, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def upload_page(user, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    One page of a user's uploads, newest first, with keyset pagination on
+    (uploaded_at, id) so every page is an index range scan however deep
+    the user scrolls. Returns (uploads, next_cursor); next_cursor is None
+    on the last page.
+    """
+    uploads = (PPTUpload.objects.filter(user=user)
+               .only(*LISTING_FIELDS)
+               .order_by('-uploaded_at', '-id'))
+    if cursor:
+        uploaded_at, upload_id = decode_cursor(cursor)
+        uploads = uploads.filter(Q(uploaded_at__lt=uploaded_at) | Q(uploaded_at=uploaded_at, id__lt=upload_id))
+
+    # One extra row tells whether another page exists
+    page = list(uploads[:limit + 1])
+    if len(page) > limit:
+        return page[:limit], encode_cursor(page[limit - 1])
+    return page, None
@@ -0,0 +1,64 @@
+# Tokens the tokenizer splits off that should match a phrase word
+TOKEN_ALIASES = {
+    "n't": 'not',
+}
+
+# Marks a node where a phrase ends; holds the sign name
+_END = object()
+
+
+def normalize_token(token):
+    token = token.casefold()
+    return TOKEN_ALIASES.get(token, token)
+
+
+class PhraseTrie:
+    """
+    Token trie over the multi-word sign names ("Thank You", "Do Not").
+
+    `longest_match` walks the trie from one position, so scanning a sentence
+    left to right costs O(tokens x longest phrase), which is linear for a
+    fixed vocabulary.
+    """
+
+    def __init__(self, names=()):
+        self._root = {}
+        self._count = 0
+        self.max_length = 0
+        for name in names:
+            self.add(name)
+
+    @classmethod
+    def from_names(cls, names):
+        """
+        Builds a trie from the sign names that contain more than one word.
+        """
+        return cls(name for name in names if len(name.split()) > 1)
+
+    def add(self, name):
+        tokens = [normalize_token(t) for t in name.split()]
+        node = self._root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        if _END not in node:
+            self._count += 1
+        node[_END] = name
+        self.max_length = max(self.max_length, len(tokens))
+
+    def longest_match(self, tokens, start=0):
+        """
+        Returns (length, sign) for the longest phrase starting at
+        tokens[start], or (0, None). `tokens` must be normalized.
+        """
+        node = self._root
+        best = (0, None)
+        for i in range(start, min(len(tokens), start + self.max_length)):
+            node = node.get(tokens[i])
+            if node is None:
+                break
+            if _END in node:
+                best = (i - start + 1, node[_END])
+        return best
+
+    def __len__(self):
+        return self._count
@@ -0,0 +1,48 @@
+from django.urls import reverse
+
+from .asset_metadata import get_asset_metadata
+from .fingerspelling import get_fingerspelling_sprite
+from .metrics import timed
+from .sign_assets import get_sign_index
+
+
+def playback_manifest(gloss, sign_index=None, metadata=None, sprite=None):
+    """
+    Describes the clips a player needs for `gloss`, in playback order.
+
+    Returns one {"sign", "url", "size", "duration", "sha256", "sprite"}
+    entry per sign so players can prefetch upcoming clips while the current
+    one plays. Signs without a clip get null fields and are skipped instead
+    of requested. Letters and digits also carry their {"url", "start",
+    "end"} segment of the fingerspelling sprite when one is available.
+    """
+    if sign_index is None:
+        sign_index = get_sign_index()
+    if metadata is None:
+        metadata = get_asset_metadata()
+    if sprite is None:
+        sprite = get_fingerspelling_sprite()
+    letters = sprite.segments() if any(len(sign) == 1 for sign in gloss) else None
+
+    with timed('manifest'):
+        manifest = []
+        for sign in gloss:
+            name = sign_index.find(sign)
+            entry = metadata.get(name) if name else None
+            offsets = letters['offsets'].get(name) if letters and name else None
+            manifest.append({
+                'sign': sign,
+                'url': reverse('sign_clip', args=[name]) if name else None,
+                'size': sign_index.size(name) if name else None,
+                'duration': entry.get('duration') if entry else None,
+                'sha256': entry.get('sha256') if entry else None,
+                'sprite': {'url': letters['url'], 'start': offsets[0], 'end': offsets[1]} if offsets else None,
+            })
+    return manifest
+
+
+def playback_duration(manifest):
+    """
+    Total playback time of a manifest in seconds.
+    """
+    return round(sum(clip['duration'] or 0 for clip in manifest), 3)
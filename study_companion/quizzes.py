@@ -0,0 +1,92 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import PPTContent, QuizResult, UserProfile
+
+QUIZ_DIFFICULTIES = ['Easy', 'Medium', 'Hard']
+DEFAULT_DIFFICULTY = 'Medium'
+DEFAULT_NUM_QUESTIONS = 5
+MAX_NUM_QUESTIONS = 20
+
+
+def normalize_quiz_params(difficulty, num_questions):
+    """
+    Clamps request parameters to the supported values so the stored quiz
+    variants stay bounded.
+    """
+    if difficulty not in QUIZ_DIFFICULTIES:
+        difficulty = DEFAULT_DIFFICULTY
+    try:
+        num_questions = int(num_questions)
+    except (TypeError, ValueError):
+        num_questions = DEFAULT_NUM_QUESTIONS
+    num_questions = max(1, min(num_questions, MAX_NUM_QUESTIONS))
+    return difficulty, num_questions
+
+
+def quiz_cache_key(difficulty, num_questions):
+    return f"{difficulty}:{num_questions}"
+
+
+def get_cached_quiz(upload, difficulty, num_questions):
+    """
+    Returns the stored questions for these parameters, or None.
+    """
+    if not isinstance(upload.quiz_data, dict):
+        return None
+    return upload.quiz_data.get(quiz_cache_key(difficulty, num_questions))
+
+
+def store_quiz(upload_id, difficulty, num_questions, questions):
+    """
+    Saves generated questions in PPTUpload.quiz_data, keyed by parameters.
+    The content row is locked so concurrent writers don't drop each other's
+    variants.
+    """
+    with transaction.atomic():
+        content, created = PPTContent.objects.select_for_update().get_or_create(upload_id=upload_id)
+        quiz_data = content.quiz_data if isinstance(content.quiz_data, dict) else {}
+        quiz_data[quiz_cache_key(difficulty, num_questions)] = questions
+        content.quiz_data = quiz_data
+        content.save(update_fields=['quiz_data'])
+
+
+def add_to_quiz_totals(user, score, total):
+    """
+    Adds one quiz result to the user's running totals in a single UPDATE,
+    so concurrent saves don't overwrite each other.
+    """
+    UserProfile.objects.filter(user=user).update(
+        quiz_score_total=F('quiz_score_total') + score,
+        quiz_possible_total=F('quiz_possible_total') + total,
+        quiz_count=F('quiz_count') + 1,
+    )
+
+
+def rebuild_quiz_totals(users=None):
+    """
+    Recomputes the running quiz totals from QuizResult, creating missing
+    profiles first. Limited to `users` (a User queryset) if given.
+    Returns the number of profiles updated.
+    """
+    profiles = UserProfile.objects.all()
+    if users is not None:
+        profiles = profiles.filter(user__in=users)
+        missing = users.filter(userprofile__isnull=True)
+    else:
+        from django.contrib.auth.models import User
+        missing = User.objects.filter(userprofile__isnull=True)
+    UserProfile.objects.bulk_create([UserProfile(user=user) for user in missing], ignore_conflicts=True)
+
+    results = QuizResult.objects.filter(user=OuterRef('user')).order_by().values('user')
+
+    def total(aggregate):
+        return Coalesce(Subquery(results.annotate(value=aggregate).values('value')), 0)
+
+    with transaction.atomic():
+        return profiles.update(
+            quiz_score_total=total(Sum('score')),
+            quiz_possible_total=total(Sum('total')),
+            quiz_count=total(Count('id')),
+        )
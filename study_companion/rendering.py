@@ -0,0 +1,364 @@
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+
+from .asset_metadata import get_asset_metadata
+from .metrics import timed
+from .sign_assets import SIGN_EXTENSION, get_sign_index
+
+# Size budget for rendered sequences on disk; least recently played go first
+DEFAULT_RENDER_CACHE_BYTES = 512 * 1024 * 1024
+
+# Seconds an ffmpeg run may take before the render is abandoned
+RENDER_TIMEOUT = 60
+
+# Background ffmpeg processes per worker process (SIGN_RENDER_WORKERS) and
+# renders that may wait for one before new requests are refused
+# (SIGN_RENDER_QUEUE)
+DEFAULT_RENDER_WORKERS = 1
+DEFAULT_RENDER_QUEUE = 16
+
+RANGE_CHUNK_SIZE = 64 * 1024
+
+RENDER_KEY_RE = re.compile(r'^[0-9a-f]{64}$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class SequenceRenderer:
+    """
+    Stitches the clips of a gloss sequence into a single MP4.
+
+    Clips are joined with ffmpeg's concat demuxer and stream-copied, so
+    nothing is re-encoded as long as the clips share a codec and size
+    (checked against the asset metadata index). Mismatched clips, or a copy
+    that fails, are re-encoded to the first clip's size instead, unless
+    SIGN_RENDER_REENCODE is off.
+
+    Results are cached on disk as <key>.mp4, where the key hashes the clip
+    paths and their size and mtime, so a replaced clip invalidates every
+    sequence that used it. Reading a render bumps its mtime and the oldest
+    files are evicted once the cache exceeds its byte budget.
+
+    Requests go through `render_later`, which only looks the render up and
+    otherwise queues it on the renderer's own small thread pool, so ffmpeg
+    never runs on a request thread and the number of ffmpeg processes is
+    bounded.
+
+    ffmpeg is optional: without it `render` returns None and callers play
+    the clips one by one.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None, ffmpeg=None, sign_index=None, reencode=None, metadata=None,
+                 executor=None, queue_size=None):
+        if cache_dir is None:
+            cache_dir = getattr(settings, 'SIGN_RENDER_DIR', None) or os.path.join(settings.MEDIA_ROOT, 'sign_renders')
+        if max_bytes is None:
+            max_bytes = getattr(settings, 'SIGN_RENDER_CACHE_BYTES', DEFAULT_RENDER_CACHE_BYTES)
+        if ffmpeg is None:
+            ffmpeg = shutil.which(getattr(settings, 'FFMPEG_BINARY', 'ffmpeg'))
+        if reencode is None:
+            reencode = getattr(settings, 'SIGN_RENDER_REENCODE', True)
+        if queue_size is None:
+            queue_size = getattr(settings, 'SIGN_RENDER_QUEUE', DEFAULT_RENDER_QUEUE)
+        self.cache_dir = str(cache_dir)
+        self.max_bytes = max_bytes
+        self.ffmpeg = ffmpeg
+        self.reencode = reencode
+        self._sign_index = sign_index
+        self._metadata = metadata
+        self._evict_lock = threading.Lock()
+        self.queue_size = queue_size
+        self._executor = executor
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+
+    @property
+    def sign_index(self):
+        if self._sign_index is None:
+            self._sign_index = get_sign_index()
+        return self._sign_index
+
+    @property
+    def metadata(self):
+        if self._metadata is None:
+            self._metadata = get_asset_metadata()
+        return self._metadata
+
+    @property
+    def available(self):
+        return bool(self.ffmpeg)
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._pending_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=getattr(settings, 'SIGN_RENDER_WORKERS', DEFAULT_RENDER_WORKERS),
+                        thread_name_prefix='sign-render',
+                    )
+        return self._executor
+
+    def clip_paths(self, gloss):
+        """
+        Returns the clip path for each sign in `gloss`, skipping signs that
+        have no clip.
+        """
+        paths = []
+        for name in gloss:
+            path = self.sign_index.path(name)
+            if path:
+                paths.append(path)
+        return paths
+
+    def clip_formats(self, gloss):
+        """
+        Returns the (codec, width, height) of each clip in `gloss`, in order,
+        or None if any clip's format is unknown.
+        """
+        formats = []
+        for sign in gloss:
+            name = self.sign_index.find(sign)
+            if name is None:
+                continue
+            entry = self.metadata.get(name)
+            if not entry or not entry.get('codec'):
+                return None
+            formats.append((entry['codec'], entry['width'], entry['height']))
+        return formats
+
+    def sequence_key(self, paths):
+        digest = hashlib.sha256()
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stat = None
+            digest.update(path.encode('utf-8'))
+            digest.update(b'\0')
+            if stat is not None:
+                digest.update(f'{stat.st_size}:{stat.st_mtime_ns}'.encode('ascii'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def render_path(self, key):
+        return os.path.join(self.cache_dir, key + SIGN_EXTENSION)
+
+    def cached_path(self, key):
+        """
+        Returns the rendered file for `key` (marking it recently used), or
+        None if it was never rendered or has been evicted.
+        """
+        if not RENDER_KEY_RE.match(key or ''):
+            return None
+        path = self.render_path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def render(self, gloss, timeout=RENDER_TIMEOUT):
+        """
+        Renders `gloss` into one video and returns its cache key, or None if
+        there is nothing to render or ffmpeg is unavailable, fails or runs
+        longer than `timeout` seconds.
+        """
+        paths = self.clip_paths(gloss)
+        if not paths:
+            return None
+        key = self.sequence_key(paths)
+        if self.cached_path(key):
+            return key
+        if not self.available:
+            return None
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Concurrent renders of the same key each write their own temp file;
+        # the last rename wins and the outputs are identical
+        tmp_path = os.path.join(self.cache_dir, f'{key}.{uuid.uuid4().hex}.tmp')
+        list_fd, list_path = tempfile.mkstemp(suffix='.txt', dir=self.cache_dir)
+        try:
+            with os.fdopen(list_fd, 'w', encoding='utf-8') as f:
+                for path in paths:
+                    f.write("file '{}'\n".format(os.path.abspath(path).replace("'", "'\\''")))
+            formats = self.clip_formats(gloss)
+            if formats and len(set(formats)) > 1:
+                # Mixed clips cannot be stream-copied into one valid track
+                _, width, height = formats[0]
+                ok = self.reencode and self._concat(list_path, tmp_path, copy=False, size=(width, height), timeout=timeout)
+            else:
+                ok = self._concat(list_path, tmp_path, copy=True, timeout=timeout)
+                if not ok and self.reencode:
+                    ok = self._concat(list_path, tmp_path, copy=False, timeout=timeout)
+            if not ok:
+                return None
+            os.replace(tmp_path, self.render_path(key))
+        finally:
+            for leftover in (list_path, tmp_path):
+                try:
+                    os.remove(leftover)
+                except OSError:
+                    pass
+
+        self.evict()
+        return key
+
+    def render_later(self, gloss):
+        """
+        Returns (key, ready) for the render of `gloss` without running
+        ffmpeg: ready if it is cached, otherwise it is queued in the
+        background. key is None if there is nothing to render, ffmpeg is
+        unavailable or the queue is full.
+        """
+        paths = self.clip_paths(gloss)
+        if not paths:
+            return None, False
+        key = self.sequence_key(paths)
+        if self.cached_path(key):
+            return key, True
+        if not self.available:
+            return None, False
+        with self._pending_lock:
+            if key not in self._pending:
+                if len(self._pending) >= self.queue_size:
+                    return None, False
+                self._pending.add(key)
+                submit = True
+            else:
+                submit = False
+        if submit:
+            self.executor.submit(self._render_pending, list(gloss), key)
+        return key, False
+
+    def _render_pending(self, gloss, key):
+        try:
+            self.render(gloss)
+        except Exception as e:
+            print(f"Error rendering sign sequence: {e}")
+        finally:
+            with self._pending_lock:
+                self._pending.discard(key)
+
+    def _concat(self, list_path, out_path, copy=True, size=None, timeout=RENDER_TIMEOUT):
+        cmd = [
+            self.ffmpeg, '-hide_banner', '-loglevel', 'error', '-y',
+            '-f', 'concat', '-safe', '0', '-i', list_path,
+        ]
+        if copy:
+            cmd += ['-c', 'copy']
+        else:
+            if size:
+                width, height = size
+                cmd += ['-vf', (
+                    f'scale={width}:{height}:force_original_aspect_ratio=decrease,'
+                    f'pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1'
+                )]
+            cmd += ['-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p', '-an']
+        cmd += ['-movflags', '+faststart', '-f', 'mp4', out_path]
+        try:
+            with timed('render'):
+                result = subprocess.run(cmd, capture_output=True, timeout=timeout)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"Error rendering sign sequence: {e}")
+            return False
+        if result.returncode != 0:
+            print(f"Error rendering sign sequence: {result.stderr.decode('utf-8', 'replace').strip()}")
+            return False
+        return True
+
+    def evict(self):
+        """
+        Deletes the least recently used renders until the cache fits in
+        max_bytes.
+        """
+        with self._evict_lock:
+            entries = []
+            total = 0
+            try:
+                scan = os.scandir(self.cache_dir)
+            except OSError:
+                return
+            with scan:
+                for entry in scan:
+                    if not entry.name.endswith(SIGN_EXTENSION) or not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                    total += stat.st_size
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+
+
+def _iter_file_range(path, start, length, chunk_size=RANGE_CHUNK_SIZE):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            data = f.read(min(chunk_size, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def ranged_file_response(request, path, content_type='video/mp4'):
+    """
+    Serves `path` honouring a single-range "Range: bytes=..." header, so
+    players can seek without downloading the whole file. Other or malformed
+    range headers get the full file.
+    """
+    size = os.path.getsize(path)
+    match = RANGE_RE.match(request.headers.get('Range', '').strip())
+    if match and (match.group(1) or match.group(2)):
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(size - int(last), 0)
+            end = size - 1
+        if start >= size or start > end:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        length = end - start + 1
+        response = StreamingHttpResponse(_iter_file_range(path, start, length), status=206, content_type=content_type)
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    else:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_renderer():
+    """
+    Returns the process-wide SequenceRenderer.
+    """
+    global _renderer
+    if _renderer is None:
+        with _renderer_lock:
+            if _renderer is None:
+                _renderer = SequenceRenderer()
+    return _renderer
@@ -0,0 +1,187 @@
+import hashlib
+import os
+import threading
+import time
+
+from django.conf import settings
+
+SIGN_EXTENSION = '.mp4'
+
+# How often (seconds) the asset directories are re-checked for changes
+DEFAULT_RELOAD_INTERVAL = 2.0
+
+
+class SignAssetIndex:
+    """
+    In-memory index of the sign clips available in STATICFILES_DIRS.
+
+    The directories are scanned once and lookups are plain dict hits.
+    Names are also indexed case-folded, so "me", "ME" and "Me" all resolve
+    to the clip that actually exists on disk ("ME").
+    The index reloads itself when an asset directory's mtime changes.
+    """
+
+    def __init__(self, directories=None, reload_interval=None):
+        self._directories = directories
+        if reload_interval is None:
+            reload_interval = getattr(settings, 'SIGN_ASSET_RELOAD_INTERVAL', DEFAULT_RELOAD_INTERVAL)
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._paths = {}
+        self._folded = {}
+        self._sizes = {}
+        self._signature = None
+        self._checked_at = 0.0
+        self._version = 0
+        self._fingerprint = None
+
+    def directories(self):
+        """
+        Returns the directories to scan. Prefixed STATICFILES_DIRS entries are
+        skipped since their clips are not served as /static/<word>.mp4.
+        """
+        if self._directories is not None:
+            return list(self._directories)
+        dirs = []
+        for entry in getattr(settings, 'STATICFILES_DIRS', []):
+            if isinstance(entry, (list, tuple)):
+                continue
+            dirs.append(str(entry))
+        return dirs
+
+    def _current_signature(self):
+        signature = []
+        for directory in self.directories():
+            try:
+                signature.append((directory, os.stat(directory).st_mtime_ns))
+            except OSError:
+                signature.append((directory, None))
+        return tuple(signature)
+
+    def reload(self):
+        """
+        Rescans the asset directories and swaps in the new index.
+        """
+        signature = self._current_signature()
+        paths = {}
+        folded = {}
+        sizes = {}
+        for directory, _ in signature:
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if not entry.name.endswith(SIGN_EXTENSION) or not entry.is_file():
+                        continue
+                    name = entry.name[:-len(SIGN_EXTENSION)]
+                    # First directory wins, same as the staticfiles finders
+                    if name in paths:
+                        continue
+                    paths[name] = entry.path
+                    sizes[name] = entry.stat().st_size
+                    folded.setdefault(name.casefold(), name)
+
+        with self._lock:
+            self._paths = paths
+            self._folded = folded
+            self._sizes = sizes
+            self._signature = signature
+            self._checked_at = time.monotonic()
+            self._version += 1
+            self._fingerprint = None
+
+    def _refresh(self):
+        if self._signature is None:
+            self.reload()
+            return
+        if self.reload_interval is None:
+            return
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        if self._current_signature() != self._signature:
+            self.reload()
+
+    @property
+    def version(self):
+        """
+        Counter bumped on every reload, for keying caches of lookup results.
+        """
+        self._refresh()
+        return self._version
+
+    def fingerprint(self):
+        """
+        Returns a digest of the clip vocabulary; changes whenever a sign is
+        added, removed or renamed.
+        """
+        self._refresh()
+        if self._fingerprint is None:
+            digest = hashlib.sha1()
+            for name in sorted(self._paths):
+                digest.update(name.encode('utf-8'))
+                digest.update(b'\0')
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def find(self, word):
+        """
+        Returns the canonical sign name for `word`, or None if there is no clip.
+        An exact match is preferred over a case-insensitive one.
+        """
+        if not word:
+            return None
+        self._refresh()
+        if word in self._paths:
+            return word
+        return self._folded.get(word.casefold())
+
+    def path(self, word):
+        """
+        Returns the absolute path of the clip for `word`, or None.
+        """
+        name = self.find(word)
+        if name is None:
+            return None
+        return self._paths.get(name)
+
+    def size(self, word):
+        """
+        Returns the byte size of the clip for `word`, or None.
+        """
+        name = self.find(word)
+        if name is None:
+            return None
+        return self._sizes.get(name)
+
+    def names(self):
+        self._refresh()
+        return list(self._paths)
+
+    def __contains__(self, word):
+        return self.find(word) is not None
+
+    def __len__(self):
+        self._refresh()
+        return len(self._paths)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_sign_index():
+    """
+    Returns the process-wide SignAssetIndex, building it on first use.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = SignAssetIndex()
+                index.reload()
+                _index = index
+    return _index
@@ -0,0 +1,213 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: calls are only deduplicated within a process
+    fcntl = None
+
+# How long a caller waits for another process's computation before running
+# its own (seconds); a little over the Gemini call deadline
+DEFAULT_LOCK_WAIT = 90
+LOCK_POLL_INTERVAL = 0.05
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical computations into one.
+
+    Within a process, callers of `do` (threads) or `ado` (coroutines) with a
+    key that is already being computed wait for that computation and get its
+    result or exception; only the one running it touches the file system.
+    Across worker processes that caller holds an exclusive lock on a file
+    for its key (in LLM_LOCK_DIR), so the same key in a second process waits
+    for the first and should then find the result in the shared cache: the
+    function passed in must check the cache itself before doing any work.
+    Different keys never wait on each other. Set LLM_LOCK_DIR to '' to only
+    deduplicate within each process.
+    """
+
+    def __init__(self, lock_dir=None, wait=None):
+        self._lock_dir = lock_dir
+        self._wait = wait
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._futures = {}
+
+    @property
+    def lock_dir(self):
+        if self._lock_dir is not None:
+            return self._lock_dir
+        return getattr(settings, 'LLM_LOCK_DIR', os.path.join(settings.BASE_DIR, 'llm_locks'))
+
+    @property
+    def wait(self):
+        if self._wait is not None:
+            return self._wait
+        return getattr(settings, 'LLM_LOCK_WAIT', DEFAULT_LOCK_WAIT)
+
+    def lock_path(self, key):
+        """
+        The key's lock file, or None if cross-process locking is off or
+        unavailable.
+        """
+        lock_dir = self.lock_dir
+        if fcntl is None or not lock_dir:
+            return None
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(lock_dir, f'{digest}.lock')
+
+    @staticmethod
+    def _try_lock(path):
+        """
+        One non-blocking attempt at the lock file; returns its descriptor
+        while locked, else None.
+        """
+        try:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError:
+            return None
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            # The previous holder removes the file on release; a lock on a
+            # file that is no longer at `path` excludes nobody
+            if os.fstat(fd).st_ino == os.stat(path).st_ino:
+                return fd
+        except (BlockingIOError, FileNotFoundError):
+            pass
+        os.close(fd)
+        return None
+
+    @staticmethod
+    def _unlock(path, fd):
+        # Removed while still locked, so the directory doesn't collect a
+        # file per request and waiters notice the swap
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        os.close(fd)
+
+    def _first_attempt(self, key):
+        """
+        Returns (path, fd): fd is set if the lock was taken right away, path
+        is None if there is no lock to take.
+        """
+        path = self.lock_path(key)
+        if path is None:
+            return None, None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            return path, self._try_lock(path)
+        except OSError as e:
+            print(f"Single-flight lock unavailable: {e}")
+            return None, None
+
+    @contextmanager
+    def _process_lock(self, key):
+        path, fd = self._first_attempt(key)
+        if path is None:
+            yield
+            return
+        deadline = time.monotonic() + self.wait
+        while fd is None and time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            fd = self._try_lock(path)
+        try:
+            # Past the deadline the computation runs unlocked rather than failing
+            yield
+        finally:
+            if fd is not None:
+                self._unlock(path, fd)
+
+    @asynccontextmanager
+    async def _aprocess_lock(self, key):
+        path, fd = self._first_attempt(key)
+        if path is None:
+            yield
+            return
+        deadline = time.monotonic() + self.wait
+        while fd is None and time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            fd = self._try_lock(path)
+        try:
+            yield
+        finally:
+            if fd is not None:
+                self._unlock(path, fd)
+
+    def do(self, key, func):
+        """
+        Returns func(), running it once for all concurrent callers with `key`.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            with self._process_lock(key):
+                call.result = func()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key, func):
+        """
+        Async counterpart of `do`: returns await func() (a coroutine
+        function), running it once for all concurrent callers with `key` on
+        the same event loop.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            future = self._futures.get((loop, key))
+            leader = future is None
+            if leader:
+                future = self._futures[(loop, key)] = loop.create_future()
+                # Marks an exception as retrieved when nobody else was waiting
+                future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        if not leader:
+            return await asyncio.shield(future)
+
+        try:
+            async with self._aprocess_lock(key):
+                result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._futures[(loop, key)]
+
+
+single_flight = SingleFlight()
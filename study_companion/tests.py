@@ -1,11 +1,23 @@
-from django.test import TestCase, Client
+from django.conf import settings
+from django.test import TestCase, TransactionTestCase, Client, override_settings
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from .models import PPTUpload
 import json
-from unittest.mock import patch
+import os
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import Mock, patch
 
+# Keep LLM responses cached in memory during tests
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'},
+    'llm': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'llm'},
+    'progress': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'progress'},
+}
+
+@override_settings(CACHES=TEST_CACHES)
 class StudyCompanionTests(TestCase):
     def setUp(self):
         # Create a test user
@@ -49,6 +61,58 @@ class StudyCompanionTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Test Presentation")
 
+    def test_history_keyset_pagination(self):
+        """History pages walk uploads newest first without loading the text columns"""
+        from datetime import timedelta
+        from django.utils import timezone
+        from .pagination import upload_page
+        now = timezone.now()
+        for i in range(5):
+            upload = PPTUpload.objects.create(user=self.user, title=f"Deck {i}", file='ppt_uploads/deck.pptx',
+                                              extracted_text="x" * 1000)
+            # Two uploads share a timestamp so the id tie-breaker is exercised
+            PPTUpload.objects.filter(id=upload.id).update(uploaded_at=now + timedelta(minutes=min(i, 3)))
+
+        page, cursor = upload_page(self.user, limit=2)
+        self.assertEqual([u.title for u in page], ["Deck 4", "Deck 3"])
+        self.assertIn('sign_words', page[0].get_deferred_fields())
+        self.assertFalse(PPTUpload.content.related.is_cached(page[0]))
+
+        self.client.login(username='testuser', password='password123')
+        titles = [u.title for u in page]
+        while cursor:
+            response = self.client.get(reverse('history_api'), {'cursor': cursor, 'limit': 2})
+            data = json.loads(response.content)
+            titles += [item['title'] for item in data['uploads']]
+            cursor = data['next_cursor']
+        self.assertEqual(titles, ["Deck 4", "Deck 3", "Deck 2", "Deck 1", "Deck 0", "Test Presentation"])
+
+        response = self.client.get(reverse('history_api'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_content_is_stored_compressed_and_loaded_lazily(self):
+        """Text and quiz payloads live compressed in PPTContent, outside the upload row"""
+        from django.db import connection
+        from .models import PPTContent
+        text = "Photosynthesis converts light energy into chemical energy. " * 200
+        upload = PPTUpload.objects.create(user=self.user, title="Big deck", file='ppt_uploads/big.pptx',
+                                          extracted_text=text, quiz_data={"Easy:5": []})
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT extracted_text FROM study_companion_pptcontent WHERE upload_id = %s", [upload.id])
+            stored = bytes(cursor.fetchone()[0])
+        self.assertLess(len(stored) * 5, len(text))
+
+        with self.assertNumQueries(1):
+            upload = PPTUpload.objects.get(id=upload.id)
+        with self.assertNumQueries(1):
+            self.assertEqual(upload.extracted_text, text)
+            self.assertEqual(upload.quiz_data, {"Easy:5": []})
+
+        upload.summary_text = "Short summary"
+        upload.save(update_fields=['summary_text'])
+        content = PPTContent.objects.get(upload=upload)
+        self.assertEqual((content.summary_text, content.extracted_text), ("Short summary", text))
+
     def test_upload_ppt_view_get(self):
         """Test upload page loads"""
         self.client.login(username='testuser', password='password123')
@@ -62,6 +126,61 @@ class StudyCompanionTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "This is a test summary.")
 
+    @patch('study_companion.ai_services.process_text_for_sign_language')
+    def test_summary_view_uses_stored_gloss(self, mock_process):
+        """The stored gloss is reused until the gloss version changes"""
+        from .gloss import gloss_version
+        mock_process.return_value = ["Hello"]
+        self.client.login(username='testuser', password='password123')
+        url = reverse('summary', args=[self.ppt_upload.id])
+
+        response = self.client.get(url)
+        self.assertEqual(response.context['words'], ["Hello"])
+        self.ppt_upload.refresh_from_db()
+        self.assertEqual(self.ppt_upload.sign_words, ["Hello"])
+        self.assertEqual(self.ppt_upload.sign_words_version, gloss_version())
+
+        response = self.client.get(url)
+        self.assertEqual(response.context['words'], ["Hello"])
+        mock_process.assert_called_once()
+
+        PPTUpload.objects.filter(id=self.ppt_upload.id).update(sign_words_version='stale')
+        self.client.get(url)
+        self.assertEqual(mock_process.call_count, 2)
+
+    def test_progress_is_shared_between_processes(self):
+        """Progress published by a worker is readable from another process's cache"""
+        import tempfile
+        from django.core.cache.backends.filebased import FileBasedCache
+        from .jobs import get_progress, progress_key, publish_progress
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        location = os.path.join(tmp.name, "progress")
+        caches_setting = dict(TEST_CACHES, progress={
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location})
+        with override_settings(CACHES=caches_setting):
+            publish_progress(self.ppt_upload.id, {"summary": "This is"})
+            # A separate backend instance, as the stream's process would have
+            other_process = FileBasedCache(location, {})
+            self.assertEqual(other_process.get(progress_key(self.ppt_upload.id)), {"summary": "This is"})
+            self.assertEqual(get_progress(self.ppt_upload.id), {"summary": "This is"})
+
+    def test_processing_page_polls_without_stream(self):
+        """Without an ASGI server the page polls upload_status, which relays partial results"""
+        from django.urls import NoReverseMatch
+        from .jobs import publish_progress
+        PPTUpload.objects.filter(id=self.ppt_upload.id).update(status=PPTUpload.STATUS_PROCESSING)
+        publish_progress(self.ppt_upload.id, {"summary": "This is", "key_concepts": [{"title": "Light"}]})
+
+        self.client.login(username='testuser', password='password123')
+        response = self.client.get(reverse('summary', args=[self.ppt_upload.id]))
+        self.assertNotContains(response, 'EventSource(')
+        with self.assertRaises(NoReverseMatch):
+            reverse('summary_stream', args=[self.ppt_upload.id])
+
+        data = json.loads(self.client.get(reverse('upload_status', args=[self.ppt_upload.id])).content)
+        self.assertEqual(data['progress'], {"summary": "This is", "key_concepts": [{"title": "Light"}]})
+
     def test_animation_view(self):
         """Test animation tool loads (protected view)"""
         self.client.login(username='testuser', password='password123')
@@ -95,6 +214,140 @@ class StudyCompanionTests(TestCase):
         self.assertEqual(len(data['questions']), 1)
         self.assertEqual(data['questions'][0]['question'], "Test Q1")
 
+    @patch('study_companion.views.get_gloss_engine')
+    def test_convert_batch_api(self, mock_get_engine):
+        """Batch API converts every sentence in one engine call"""
+        mock_get_engine.return_value.to_gloss_batch.return_value = [["Hello"], ["Thank You"]]
+        self.client.login(username='testuser', password='password123')
+        response = self.client.post(
+            reverse('convert_batch_api'),
+            json.dumps({'sentences': ["hello", "thank you"]}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        mock_get_engine.return_value.to_gloss_batch.assert_called_once_with(["hello", "thank you"], mark_tense=True)
+        self.assertEqual(data['results'][1]['gloss'], ["Thank You"])
+        self.assertEqual(data['results'][1]['assets'], ["/static/Thank%20You.mp4"])
+        clip = data['results'][1]['clips'][0]
+        self.assertEqual(clip['url'], "/signs/Thank%20You/")
+        self.assertEqual(clip['size'], os.path.getsize(os.path.join(settings.BASE_DIR, "assets", "Thank You.mp4")))
+        self.assertEqual(data['results'][1]['duration'], clip['duration'])
+        self.assertGreater(clip['duration'], 0)
+
+        response = self.client.post(reverse('convert_batch_api'), json.dumps({'sentences': "hello"}), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(CONVERT_API_TOKEN='integration-token')
+    @patch('study_companion.views.get_gloss_engine')
+    def test_convert_batch_api_token(self, mock_get_engine):
+        """Integrations call the batch API with a bearer token instead of a session and CSRF token"""
+        mock_get_engine.return_value.to_gloss_batch.return_value = [["Hello"]]
+        client = Client(enforce_csrf_checks=True)
+        url = reverse('convert_batch_api')
+        body = json.dumps({'sentences': ["hello"]})
+
+        response = client.post(url, body, content_type='application/json',
+                               HTTP_AUTHORIZATION='Bearer integration-token')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['results'][0]['gloss'], ["Hello"])
+
+        response = client.post(url, body, content_type='application/json', HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(client.post(url, body, content_type='application/json').status_code, 302)
+
+        # Session callers still need their CSRF token
+        client.login(username='testuser', password='password123')
+        self.assertEqual(client.post(url, body, content_type='application/json').status_code, 403)
+
+    @patch('study_companion.ai_services.summarize_deck')
+    @patch('study_companion.ai_services.iter_slides')
+    def test_upload_runs_in_background(self, mock_iter_slides, mock_summarize):
+        """Upload returns a job id at once and processing updates the status"""
+        mock_iter_slides.return_value = iter([{"number": 1, "title": "", "body": "Slide text", "notes": "", "tables": []}])
+        mock_summarize.return_value = json.dumps({"summary": "Deck summary", "key_concepts": [], "important_terms": []})
+        self.client.login(username='testuser', password='password123')
+
+        with patch('study_companion.jobs.get_executor') as mock_get_executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse('upload'),
+                    {'file': SimpleUploadedFile("deck.pptx", b"dummy content")},
+                    HTTP_ACCEPT='application/json'
+                )
+        self.assertEqual(response.status_code, 202)
+        job_id = json.loads(response.content)['job_id']
+        self.assertEqual(PPTUpload.objects.get(id=job_id).status, PPTUpload.STATUS_PENDING)
+        status = json.loads(self.client.get(reverse('upload_status', args=[job_id])).content)
+        self.assertEqual(status['status'], PPTUpload.STATUS_PENDING)
+
+        # Run the job the pool would have received
+        run, func, upload_id = mock_get_executor.return_value.submit.call_args[0]
+        self.assertEqual(upload_id, job_id)
+        with patch('study_companion.jobs.close_old_connections'), \
+                patch('study_companion.jobs.enqueue_quiz_pregeneration') as mock_pregenerate, \
+                patch('study_companion.ai_services.process_text_for_sign_language', return_value=["Deck"]), \
+                patch.object(PPTUpload, 'save', autospec=True, side_effect=PPTUpload.save) as mock_save:
+            run(func, upload_id)
+        mock_pregenerate.assert_called_once_with(job_id)
+        # The gloss is written by the same save that marks the upload done
+        done_fields = mock_save.call_args_list[-1].kwargs['update_fields']
+        self.assertIn('status', done_fields)
+        self.assertIn('sign_words', done_fields)
+
+        upload = PPTUpload.objects.get(id=job_id)
+        self.assertEqual(upload.status, PPTUpload.STATUS_DONE)
+        self.assertEqual(upload.extracted_text, "Slide text")
+        self.assertEqual(upload.sign_words, ["Deck"])
+        status = json.loads(self.client.get(reverse('upload_status', args=[job_id])).content)
+        self.assertEqual(status['status'], PPTUpload.STATUS_DONE)
+
+    @patch('study_companion.ai_services.iter_slides', side_effect=ValueError("bad file"))
+    def test_failed_upload_reports_error(self, mock_extract):
+        """Processing errors are stored on the upload instead of raised"""
+        from .jobs import process_upload
+        process_upload(self.ppt_upload.id)
+        self.ppt_upload.refresh_from_db()
+        self.assertEqual(self.ppt_upload.status, PPTUpload.STATUS_FAILED)
+        self.assertIn("bad file", self.ppt_upload.error_message)
+
+    @patch('study_companion.ai_services.get_gemini_client')
+    @patch('study_companion.ai_services._generate_summary', side_effect=RuntimeError("503 Service Unavailable"))
+    @patch('study_companion.ai_services.iter_slides')
+    def test_gemini_failure_fails_upload(self, mock_slides, mock_generate, mock_client):
+        """A Gemini error marks the upload failed instead of becoming its summary"""
+        from .jobs import process_upload
+        mock_slides.return_value = [{"number": 1, "title": "Light", "body": "Waves", "notes": "", "tables": []}]
+        process_upload(self.ppt_upload.id)
+        upload = PPTUpload.objects.get(id=self.ppt_upload.id)
+        self.assertEqual(upload.status, PPTUpload.STATUS_FAILED)
+        self.assertIn("503 Service Unavailable", upload.error_message)
+        self.assertEqual(upload.summary_text, "This is a test summary.")
+
+    @patch('study_companion.views.generate_mcq')
+    def test_quiz_api_reuses_stored_quiz(self, mock_generate_mcq):
+        """Repeat quiz loads are served from quiz_data without an AI call"""
+        mock_generate_mcq.return_value = [{"question": "Q1", "options": ["A", "B"], "correct_answer": "A"}]
+        self.client.login(username='testuser', password='password123')
+        url = reverse('quiz_data_api', args=[self.ppt_upload.id]) + '?num_questions=1&difficulty=Hard'
+        first = json.loads(self.client.get(url).content)
+        second = json.loads(self.client.get(url).content)
+        self.assertEqual(first, second)
+        mock_generate_mcq.assert_called_once()
+        self.ppt_upload.refresh_from_db()
+        self.assertIn("Hard:1", self.ppt_upload.quiz_data)
+
+    @patch('study_companion.ai_services.generate_mcq')
+    def test_pregenerate_quiz(self, mock_generate_mcq):
+        """Background pregeneration stores each variant once"""
+        from .jobs import pregenerate_quiz
+        mock_generate_mcq.return_value = [{"question": "Q1"}]
+        pregenerate_quiz(self.ppt_upload.id, 'Easy', 5)
+        pregenerate_quiz(self.ppt_upload.id, 'Easy', 5)
+        mock_generate_mcq.assert_called_once_with("This is a test extracted text.", 5, 'Easy')
+        self.ppt_upload.refresh_from_db()
+        self.assertEqual(self.ppt_upload.quiz_data, {"Easy:5": [{"question": "Q1"}]})
+
     def test_ppt_upload_model(self):
         """Test model data integrity"""
         upload = PPTUpload.objects.get(title="Test Presentation")
@@ -127,3 +380,1209 @@ class StudyCompanionTests(TestCase):
         profile = UserProfile.objects.get(user=self.user)
         self.assertEqual(profile.total_xp, 40)
         self.assertEqual(profile.current_streak, 1)
+
+    def test_quiz_totals_are_kept_on_the_profile(self):
+        """Saved results update the running totals; the dashboard reads only those"""
+        from django.core.management import call_command
+        from io import StringIO
+        from .models import QuizResult, UserProfile
+        self.client.login(username='testuser', password='password123')
+        url = reverse('quiz_save_result', args=[self.ppt_upload.id])
+        for score, total in [(4, 5), (3, 10)]:
+            self.client.post(url, json.dumps({'score': score, 'total': total}), content_type='application/json')
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual((profile.quiz_score_total, profile.quiz_possible_total, profile.quiz_count), (7, 15, 2))
+        self.assertEqual(profile.vocab_mastery, 46)
+
+        # Dashboard cost does not grow with the number of results
+        QuizResult.objects.bulk_create([
+            QuizResult(user=self.user, upload=self.ppt_upload, score=1, total=1, time_taken='00:10')
+            for _ in range(50)
+        ])
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['quiz_count'], 2)
+
+        call_command('rebuild_quiz_totals', stdout=StringIO())
+        profile.refresh_from_db()
+        self.assertEqual((profile.quiz_score_total, profile.quiz_possible_total, profile.quiz_count), (57, 65, 52))
+
+        QuizResult.objects.filter(score=3).delete()
+        profile.refresh_from_db()
+        self.assertEqual((profile.quiz_score_total, profile.quiz_possible_total, profile.quiz_count), (54, 55, 51))
+
+    def test_user_save_keeps_profile_counters(self):
+        """Saving a User (e.g. on login) does not write back a stale profile over F() increments"""
+        from django.db.models import F
+        from .models import UserProfile
+        from .quizzes import add_to_quiz_totals
+        user = User.objects.get(pk=self.user.pk)
+        stale = user.userprofile
+        add_to_quiz_totals(user, 4, 5)
+        UserProfile.objects.filter(pk=stale.pk).update(total_xp=F('total_xp') + 40)
+        user.save()
+        self.client.login(username='testuser', password='password123')
+        profile = UserProfile.objects.get(pk=stale.pk)
+        self.assertEqual((profile.quiz_score_total, profile.quiz_count, profile.total_xp), (4, 1, 40))
+
+
+class SignAssetIndexTests(TestCase):
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for name in ("ME.mp4", "Hello.mp4", "Thank You.mp4", "notes.txt"):
+            open(os.path.join(self.tmp.name, name), "wb").close()
+
+    def test_lookup_is_case_insensitive(self):
+        """Any casing resolves to the clip name on disk"""
+        from .sign_assets import SignAssetIndex
+        index = SignAssetIndex(directories=[self.tmp.name])
+        self.assertEqual(index.find("me"), "ME")
+        self.assertEqual(index.find("Me"), "ME")
+        self.assertEqual(index.find("hello"), "Hello")
+        self.assertEqual(index.find("thank you"), "Thank You")
+        self.assertIsNone(index.find("notes"))
+        self.assertIsNone(index.find("missing"))
+        self.assertEqual(len(index), 3)
+
+    def test_reloads_when_directory_changes(self):
+        """New clips are picked up without rebuilding the index"""
+        from .sign_assets import SignAssetIndex
+        index = SignAssetIndex(directories=[self.tmp.name], reload_interval=0)
+        self.assertIsNone(index.find("study"))
+        open(os.path.join(self.tmp.name, "Study.mp4"), "wb").close()
+        # Make sure the directory mtime moves even on coarse filesystems
+        stat = os.stat(self.tmp.name)
+        os.utime(self.tmp.name, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        self.assertEqual(index.find("study"), "Study")
+
+    def test_playback_manifest(self):
+        """Manifest entries carry clip URL, size and metadata; missing clips have no URL"""
+        from .asset_metadata import AssetMetadataIndex
+        from .playback import playback_duration, playback_manifest
+        from .sign_assets import SignAssetIndex
+        with open(os.path.join(self.tmp.name, "Hello.mp4"), "wb") as f:
+            f.write(b"x" * 42)
+        index = SignAssetIndex(directories=[self.tmp.name])
+        metadata = AssetMetadataIndex(path=os.path.join(self.tmp.name, "index.json"), sign_index=index)
+        manifest = playback_manifest(["hello", "Zebra"], sign_index=index, metadata=metadata)
+        self.assertEqual(manifest[0]['url'], "/signs/Hello/")
+        self.assertEqual(manifest[0]['size'], 42)
+        self.assertEqual(len(manifest[0]['sha256']), 64)
+        self.assertIsNone(manifest[0]['duration'])
+        self.assertEqual(manifest[1], {'sign': "Zebra", 'url': None, 'size': None, 'duration': None,
+                                       'sha256': None, 'sprite': None})
+        self.assertEqual(playback_duration(manifest), 0)
+
+
+class FakeLemmatizer:
+    def lemmatize(self, word, pos='n'):
+        return {'studying': 'study', 'computers': 'computer'}.get(word, word)
+
+
+class GlossEngineTests(TestCase):
+    def setUp(self):
+        import tempfile
+        from .gloss import GlossEngine
+        from .sign_assets import SignAssetIndex
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for name in ("Now", "Study", "Computer", "Before", "C", "A", "T"):
+            open(os.path.join(self.tmp.name, name + ".mp4"), "wb").close()
+        self.engine = GlossEngine(sign_index=SignAssetIndex(directories=[self.tmp.name]))
+        self.engine.lemmatizer = FakeLemmatizer()
+
+    def test_tense_marker(self):
+        """Tense markers follow the dominant verb tense"""
+        self.assertEqual(self.engine.tense_marker([("went", "VBD")]), "Before")
+        self.assertEqual(self.engine.tense_marker([("will", "MD"), ("go", "VB")]), "Will")
+        self.assertEqual(self.engine.tense_marker([("studying", "VBG")]), "Now")
+        self.assertIsNone(self.engine.tense_marker([("cat", "NN")]))
+
+    def test_match_assets_fingerspells_unknown_words(self):
+        """Words without a clip are spelled out letter by letter"""
+        self.assertEqual(self.engine.match_assets(["study", "cat!"]), ["Study", "C", "A", "T"])
+
+    def test_phrase_trie_prefers_longest_match(self):
+        from .phrases import PhraseTrie
+        trie = PhraseTrie.from_names(["Do Not", "Do Not Disturb", "Hello"])
+        self.assertEqual(len(trie), 2)
+        tokens = ["please", "do", "not", "disturb", "do", "not"]
+        self.assertEqual(trie.longest_match(tokens, 0), (0, None))
+        self.assertEqual(trie.longest_match(tokens, 1), (3, "Do Not Disturb"))
+        self.assertEqual(trie.longest_match(tokens, 4), (2, "Do Not"))
+
+    def test_multi_word_signs_replace_words(self):
+        """Phrases with a clip are matched before stopwords are dropped"""
+        for name in ("Thank You", "Do Not"):
+            open(os.path.join(self.tmp.name, name + ".mp4"), "wb").close()
+        self.engine.sign_index.reload()
+        tagged = [("thank", "VB"), ("you", "PRP"), ("do", "VBP"), ("n't", "RB"), ("study", "VB")]
+        self.assertEqual(self.engine.filter_and_lemmatize(tagged), ["Thank You", "Do Not", "study"])
+        self.assertEqual(self.engine.match_assets(["Thank You", "Do Not"]), ["Thank You", "Do Not"])
+
+    @patch('study_companion.gloss.nltk.pos_tag_sents')
+    @patch('study_companion.gloss.word_tokenize', side_effect=str.split)
+    def test_to_gloss_batch(self, mock_tokenize, mock_pos_tag_sents):
+        """Batch conversion tags every sentence in a single call"""
+        mock_pos_tag_sents.return_value = [
+            [("i", "PRP"), ("am", "VBP"), ("studying", "VBG"), ("computers", "NNS")],
+            [("the", "DT"), ("cat", "NN")],
+        ]
+        result = self.engine.to_gloss_batch(["I am studying computers", "The cat"])
+        mock_pos_tag_sents.assert_called_once()
+        self.assertEqual(result, [["Now", "Study", "Computer"], ["C", "A", "T"]])
+
+    @patch('study_companion.gloss.nltk.pos_tag', return_value=[("computers", "NNS")])
+    @patch('study_companion.gloss.word_tokenize', side_effect=str.split)
+    def test_to_gloss_caches_results(self, mock_tokenize, mock_pos_tag):
+        """Repeated sentences are served from the result cache"""
+        self.assertEqual(self.engine.to_gloss("Computers"), ["Computer"])
+        self.assertEqual(self.engine.to_gloss("  computers "), ["Computer"])
+        mock_pos_tag.assert_called_once()
+        stats = self.engine.cache_stats()
+        self.assertEqual(stats['result']['hits'], 1)
+        self.assertEqual(stats['result']['misses'], 1)
+
+
+class LRUCacheTests(TestCase):
+    def test_evicts_least_recently_used(self):
+        """The cache never grows past maxsize"""
+        from .lru import LRUCache
+        cache = LRUCache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.stats()['hits'], 2)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+
+class DownloadNltkDataCommandTests(TestCase):
+    @patch('study_companion.management.commands.download_nltk_data.nltk.download')
+    @patch('study_companion.gloss.GlossEngine.load', return_value=0.25)
+    def test_check_only_verifies(self, mock_load, mock_download):
+        """--check preloads the data without downloading anything"""
+        from io import StringIO
+        from django.core.management import call_command
+        out = StringIO()
+        call_command('download_nltk_data', '--check', stdout=out)
+        mock_download.assert_not_called()
+        self.assertIn("preload took 0.250s", out.getvalue())
+
+
+class PPTExtractionTests(TestCase):
+    def setUp(self):
+        import tempfile
+        from pptx import Presentation
+        from pptx.util import Inches
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        prs = Presentation()
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = "Photosynthesis"
+        slide.placeholders[1].text = "Plants convert light into energy"
+        slide.notes_slide.notes_text_frame.text = "Mention chlorophyll"
+        slide = prs.slides.add_slide(prs.slide_layouts[5])
+        slide.shapes.title.text = "Inputs"
+        table = slide.shapes.add_table(2, 2, Inches(1), Inches(2), Inches(4), Inches(1)).table
+        table.cell(0, 0).text = "Input"
+        table.cell(0, 1).text = "Source"
+        table.cell(1, 0).text = "Water"
+        table.cell(1, 1).text = "Roots"
+        self.path = os.path.join(self.tmp.name, "deck.pptx")
+        prs.save(self.path)
+
+    def test_iter_slides(self):
+        """Slides are yielded one by one with title, body, notes and tables"""
+        from .ai_services import iter_slides
+        slides = list(iter_slides(self.path))
+        self.assertEqual([s["number"] for s in slides], [1, 2])
+        self.assertEqual(slides[0]["title"], "Photosynthesis")
+        self.assertEqual(slides[0]["body"], "Plants convert light into energy")
+        self.assertEqual(slides[0]["notes"], "Mention chlorophyll")
+        self.assertEqual(slides[1]["tables"], [[["Input", "Source"], ["Water", "Roots"]]])
+
+    def test_chunk_slides_respects_budget(self):
+        """Chunks stay within the token budget and keep slide numbers"""
+        from .ai_services import chunk_slides, CHARS_PER_TOKEN
+        slides = [
+            {"number": n, "title": f"Slide {n}", "body": "word " * 50, "notes": "", "tables": []}
+            for n in range(1, 11)
+        ]
+        chunks = list(chunk_slides(iter(slides), max_tokens=100))
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk["text"]), 100 * CHARS_PER_TOKEN)
+        self.assertEqual([n for c in chunks for n in c["slides"]], list(range(1, 11)))
+
+    def test_chunk_boundaries_survive_inserted_slide(self):
+        """Inserting a slide leaves the chunks of the other slides unchanged"""
+        from .ai_services import chunk_slides
+        words = ["light", "energy", "cell", "plant", "water", "root", "leaf", "oxygen"]
+        slides = [
+            {"number": n, "title": f"Slide {n}", "body": " ".join(words[(n * i) % 8] for i in range(40 + n % 30)),
+             "notes": "", "tables": []}
+            for n in range(1, 41)
+        ]
+        before = [c["text"] for c in chunk_slides(iter(slides), max_tokens=250)]
+        inserted = {"number": 0, "title": "New", "body": "inserted slide " * 10, "notes": "", "tables": []}
+        after = [c["text"] for c in chunk_slides(iter([inserted] + slides), max_tokens=250)]
+        self.assertGreater(len(before), 5)
+        self.assertGreaterEqual(len(set(before) & set(after)), len(before) - 1)
+
+    def test_mcq_source_samples_whole_deck(self):
+        """Long decks give MCQ requests excerpts from every part, within the budget"""
+        from .ai_services import mcq_source_text, CHARS_PER_TOKEN
+        short = "Slide 1\nLight"
+        self.assertEqual(mcq_source_text(short, max_tokens=500), short)
+        deck = "\n\n".join(f"Slide {n}\n" + "photosynthesis " * 60 for n in range(1, 101))
+        source = mcq_source_text(deck, max_tokens=500)
+        self.assertLessEqual(len(source), 500 * CHARS_PER_TOKEN)
+        self.assertIn("Slide 1\n", source)
+        self.assertTrue(any(f"Slide {n}\n" in source for n in range(90, 101)))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class AsyncViewTests(TransactionTestCase):
+    """
+    The async views read the database from pool threads (their own
+    connections), so the fixtures must be committed rather than held in a
+    test transaction.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='password123')
+        self.client = Client()
+        self.ppt_upload = PPTUpload.objects.create(
+            user=self.user,
+            title="Test Presentation",
+            file='ppt_uploads/test.pptx',
+            extracted_text="This is a test extracted text.",
+            summary_text="This is a test summary."
+        )
+
+    @patch('study_companion.views.generate_mcq')
+    def test_quiz_api_waits_for_processing(self, mock_generate_mcq):
+        """Uploads without extracted text yet get a 409 instead of an AI call"""
+        from asgiref.sync import async_to_sync
+        from django.test import RequestFactory
+        from .views import quiz_data_api_async
+        upload = PPTUpload.objects.create(user=self.user, title="Pending deck", file='ppt_uploads/p.pptx',
+                                          status=PPTUpload.STATUS_PENDING)
+        self.client.login(username='testuser', password='password123')
+        response = self.client.get(reverse('quiz_data_api', args=[upload.id]))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(json.loads(response.content)['status'], 'processing')
+        mock_generate_mcq.assert_not_called()
+
+        request = RequestFactory().get('/')
+        request.user = self.user
+        response = async_to_sync(quiz_data_api_async)(request, upload.id)
+        self.assertEqual(response.status_code, 409)
+
+    @patch('study_companion.views.agenerate_mcq')
+    def test_async_quiz_api(self, mock_agenerate_mcq):
+        """The ASGI quiz view generates once, stores the quiz and requires login"""
+        from asgiref.sync import async_to_sync
+        from django.contrib.auth.models import AnonymousUser
+        from django.test import AsyncRequestFactory
+        from .views import quiz_data_api_async
+        mock_agenerate_mcq.return_value = [{"question": "Q1", "options": ["A", "B"], "correct_answer": "A"}]
+        url = reverse('quiz_data_api', args=[self.ppt_upload.id]) + '?num_questions=2&difficulty=Easy'
+
+        request = AsyncRequestFactory().get(url)
+        request.user = AnonymousUser()
+        response = async_to_sync(quiz_data_api_async)(request, self.ppt_upload.id)
+        self.assertEqual(response.status_code, 302)
+
+        for _ in range(2):
+            request = AsyncRequestFactory().get(url)
+            request.user = self.user
+            response = async_to_sync(quiz_data_api_async)(request, self.ppt_upload.id)
+            self.assertEqual(json.loads(response.content)["questions"][0]["question"], "Q1")
+        mock_agenerate_mcq.assert_awaited_once_with("This is a test extracted text.", 2, 'Easy')
+        self.ppt_upload.refresh_from_db()
+        self.assertIn("Easy:2", self.ppt_upload.quiz_data)
+
+    @patch('study_companion.ai_services.process_text_for_sign_language', return_value=["Hello"])
+    def test_async_summary_stream(self, mock_process):
+        """The ASGI stream relays the same events as the sync one"""
+        from asgiref.sync import async_to_sync, sync_to_async
+        from django.test import AsyncRequestFactory
+        from .jobs import publish_progress
+        from .views import summary_stream_view_async
+        PPTUpload.objects.filter(id=self.ppt_upload.id).update(status=PPTUpload.STATUS_PROCESSING)
+        publish_progress(self.ppt_upload.id, {"summary": "This is"})
+
+        async def finish(seconds):
+            await sync_to_async(PPTUpload.objects.filter(id=self.ppt_upload.id).update)(status=PPTUpload.STATUS_DONE)
+
+        async def read():
+            request = AsyncRequestFactory().get(f'/summary/{self.ppt_upload.id}/stream/')
+            request.user = self.user
+            response = await summary_stream_view_async(request, self.ppt_upload.id)
+            with patch('study_companion.views.asyncio.sleep', side_effect=finish):
+                return b"".join([chunk async for chunk in response.streaming_content]).decode()
+
+        body = async_to_sync(read)()
+        events = [line[len("event: "):] for line in body.splitlines() if line.startswith("event: ")]
+        self.assertEqual(events, ['summary_delta', 'summary', 'key_concepts', 'important_terms', 'gloss', 'done'])
+        self.assertIn('"words": ["Hello"]', body)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SummarizeDeckTests(TestCase):
+    def setUp(self):
+        from django.core.cache import caches
+        caches['llm'].clear()
+        self.slides = [
+            {"number": n, "title": f"Topic {n}", "body": "detail " * 100, "notes": "", "tables": []}
+            for n in range(1, 5)
+        ]
+
+    @patch('study_companion.ai_services.get_gemini_client')
+    @patch('study_companion.ai_services._generate_summary')
+    def test_map_reduce_merges_and_caches_chunks(self, mock_generate, mock_client):
+        """Chunks are summarized once each and merged into one schema"""
+        from .ai_services import summarize_deck
+
+        def fake_summary(client, text):
+            title = text.split("\n")[0]
+            return json.dumps({
+                "summary": f"About {title}",
+                "key_concepts": [{"title": title, "description": "d", "color": "blue"}],
+                "important_terms": ["Energy", title],
+            })
+        mock_generate.side_effect = fake_summary
+
+        result = json.loads(summarize_deck(self.slides, max_workers=2, chunk_tokens=200))
+        self.assertEqual(len(result["key_concepts"]), 4)
+        self.assertEqual(result["important_terms"][:2], ["Energy", "Topic 1"])
+        calls = mock_generate.call_count
+
+        # Change one slide: only its chunk is re-summarized
+        self.slides[2]["body"] = "update " * 100
+        summarize_deck(self.slides, max_workers=2, chunk_tokens=200)
+        self.assertEqual(mock_generate.call_count, calls + 1)
+
+    @patch('study_companion.ai_services.get_gemini_client')
+    @patch('study_companion.ai_services._generate_summary')
+    def test_reduce_recurses_within_budget(self, mock_generate, mock_client):
+        """Partial summaries too long for one call are reduced in rounds, never truncated"""
+        from .ai_services import CHARS_PER_TOKEN, summarize_deck
+        slides = [
+            {"number": n, "title": f"Topic {n}", "body": "detail " * 100, "notes": "", "tables": []}
+            for n in range(1, 13)
+        ]
+        inputs = []
+
+        def fake_summary(client, text):
+            inputs.append(text)
+            return json.dumps({
+                "summary": f"About {text[:20]} " + "x" * 300,
+                "key_concepts": [],
+                "important_terms": [],
+            })
+        mock_generate.side_effect = fake_summary
+
+        result = json.loads(summarize_deck(slides, max_workers=2, chunk_tokens=200))
+        for text in inputs:
+            self.assertLessEqual(len(text), 200 * CHARS_PER_TOKEN)
+        # 12 chunks; two summaries fit a call, so 6, 3 and 2 group summaries; the final call
+        self.assertEqual(len(inputs), 12 + 6 + 3 + 2 + 1)
+        self.assertTrue(result["summary"].startswith("About About About"))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class LLMResponseCacheTests(TestCase):
+    def setUp(self):
+        from django.core.cache import caches
+        caches['llm'].clear()
+
+    def test_key_ignores_whitespace_but_not_params(self):
+        """Keys are content-addressed over normalized text and parameters"""
+        from .llm_cache import llm_cache_key
+        a = llm_cache_key('mcq', 'model', 1, "Some  deck\ntext", {}, difficulty='Easy')
+        b = llm_cache_key('mcq', 'model', 1, "Some deck text", {}, difficulty='Easy')
+        c = llm_cache_key('mcq', 'model', 1, "Some deck text", {}, difficulty='Hard')
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, c)
+
+    @patch('study_companion.ai_services.get_gemini_client')
+    def test_identical_requests_hit_the_cache(self, mock_client):
+        """Identical MCQ requests call Gemini once"""
+        from .ai_services import generate_mcq
+        from .llm_cache import llm_cache
+        mock_client.return_value.models.generate_content.return_value.text = json.dumps([{"question": "Q1"}])
+        hits = llm_cache.hits
+        first = generate_mcq("Deck text", 3, 'Easy')
+        second = generate_mcq("Deck  text", 3, 'Easy')
+        self.assertEqual(first, second)
+        mock_client.return_value.models.generate_content.assert_called_once()
+        self.assertEqual(llm_cache.hits, hits + 1)
+
+    def test_metrics_endpoint_exports_llm_cache(self):
+        """Hits, misses and stored entries of the LLM cache are scraped"""
+        from .llm_cache import llm_cache
+        llm_cache.set("llm:summary:abc", "{}")
+        llm_cache.get("llm:summary:abc")
+        stats = llm_cache.stats()
+        self.assertEqual(stats['entries'], 1)
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('# TYPE a2sl_llm_cache_hits_total counter', body)
+        self.assertIn(f"a2sl_llm_cache_hits_total {stats['hits']}", body)
+        self.assertIn(f"a2sl_llm_cache_misses_total {stats['misses']}", body)
+        self.assertIn('a2sl_llm_cache_entries 1', body)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SingleFlightTests(TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+        from django.core.cache import caches
+        caches['llm'].clear()
+        self.lock_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.lock_dir, True)
+        settings_override = override_settings(LLM_LOCK_DIR=self.lock_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    @patch('study_companion.ai_services.get_gemini_client')
+    def test_concurrent_identical_requests_share_one_call(self, mock_client):
+        """Threads asking for the same quiz wait for one Gemini call"""
+        import threading
+        from .ai_services import generate_mcq
+        release = threading.Event()
+
+        def slow_generate(**kwargs):
+            release.wait(5)
+            response = type('Response', (), {})()
+            response.text = json.dumps([{"question": "Q1"}])
+            return response
+
+        mock_client.return_value.models.generate_content.side_effect = slow_generate
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(generate_mcq("Shared deck", 3, 'Easy')))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        threading.Timer(0.2, release.set).start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(results, [[{"question": "Q1"}]] * 4)
+        mock_client.return_value.models.generate_content.assert_called_once()
+
+    def test_followers_get_the_leaders_error(self):
+        """A failed computation is raised to every waiting caller"""
+        import threading
+        from .singleflight import SingleFlight
+        flight = SingleFlight(lock_dir='')
+        started = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def fail():
+            started.set()
+            release.wait(5)
+            raise ValueError("boom")
+
+        def run():
+            try:
+                flight.do('key', fail)
+            except ValueError as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=run)
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=run)
+        follower.start()
+        release.set()
+        leader.join(5)
+        follower.join(5)
+        self.assertEqual(len(errors), 2)
+        self.assertIs(errors[0], errors[1])
+
+    def test_processes_wait_on_the_file_lock(self):
+        """A second worker waits for the first and then reads its cached result"""
+        import threading
+        from .singleflight import SingleFlight, fcntl
+        if fcntl is None:
+            self.skipTest("File locks need fcntl")
+        # Two instances stand in for two worker processes
+        first, second = SingleFlight(self.lock_dir), SingleFlight(self.lock_dir)
+        store = {}
+        started = threading.Event()
+
+        def compute():
+            started.set()
+            time.sleep(0.2)
+            store['value'] = 'computed'
+            return 'computed'
+
+        def read_or_compute():
+            return store.get('value', 'recomputed')
+
+        thread = threading.Thread(target=first.do, args=('key', compute))
+        thread.start()
+        started.wait(5)
+        self.assertEqual(second.do('key', read_or_compute), 'computed')
+        thread.join(5)
+
+    def test_different_keys_do_not_wait_on_each_other(self):
+        """Unrelated calls run in parallel and leave no lock files behind"""
+        import threading
+        from .singleflight import SingleFlight, fcntl
+        if fcntl is None:
+            self.skipTest("File locks need fcntl")
+        first, second = SingleFlight(self.lock_dir, wait=5), SingleFlight(self.lock_dir, wait=5)
+        started = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            started.set()
+            release.wait(5)
+            return 'first'
+
+        thread = threading.Thread(target=first.do, args=('key-a', hold))
+        thread.start()
+        started.wait(5)
+        began = time.monotonic()
+        self.assertEqual(second.do('key-b', lambda: 'second'), 'second')
+        self.assertLess(time.monotonic() - began, 1)
+        release.set()
+        thread.join(5)
+        self.assertEqual(os.listdir(self.lock_dir), [])
+
+    def test_async_callers_share_one_call(self):
+        """Coroutines asking for the same summary await one computation"""
+        import asyncio
+        from .singleflight import SingleFlight
+        flight = SingleFlight(self.lock_dir)
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 'summary'
+
+        async def run():
+            return await asyncio.gather(*(flight.ado('key', compute) for _ in range(5)))
+
+        self.assertEqual(asyncio.run(run()), ['summary'] * 5)
+        self.assertEqual(len(calls), 1)
+
+
+async def no_sleep(seconds):
+    pass
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    """Answers generateContent calls; fails the first `failures` requests with 503."""
+    failures = 0
+    requests = 0
+
+    def do_POST(self):
+        type(self).requests += 1
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if type(self).requests <= type(self).failures:
+            status, body = 503, {"error": {"code": 503, "message": "overloaded", "status": "UNAVAILABLE"}}
+        else:
+            text = json.dumps({"summary": "From fake server", "key_concepts": [], "important_terms": []})
+            status, body = 200, {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(CACHES=TEST_CACHES)
+class GeminiClientManagerTests(TestCase):
+    def test_extract_partial_summary(self):
+        """The summary value is decoded from an incomplete JSON stream"""
+        from .ai_services import extract_partial_summary
+        self.assertEqual(extract_partial_summary('{"summ'), "")
+        self.assertEqual(extract_partial_summary('{"summary": "Light \\"energy\\" is'), 'Light "energy" is')
+        self.assertEqual(extract_partial_summary('{"summary": "Line\\nTwo\\'), "Line\nTwo")
+        self.assertEqual(extract_partial_summary('{"summary": "Done", "key_concepts": ['), "Done")
+
+    def setUp(self):
+        import threading
+        from .ai_services import GeminiClientManager, set_gemini_manager
+        FakeGeminiHandler.failures = 0
+        FakeGeminiHandler.requests = 0
+        self.server = HTTPServer(('127.0.0.1', 0), FakeGeminiHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.manager = GeminiClientManager(
+            api_key='test-key',
+            base_url=f'http://127.0.0.1:{self.server.server_port}',
+            timeout=10,
+            sleep=lambda seconds: None,
+            async_sleep=no_sleep
+        )
+        previous = set_gemini_manager(self.manager)
+        self.addCleanup(set_gemini_manager, previous)
+
+    def test_summarize_against_fake_server_with_retry(self):
+        """Transient 503s are retried and the shared client is reused"""
+        from .ai_services import summarize_text
+        FakeGeminiHandler.failures = 2
+        result = json.loads(summarize_text("Lecture about light"))
+        self.assertEqual(result["summary"], "From fake server")
+        self.assertEqual(FakeGeminiHandler.requests, 3)
+        client = self.manager.client
+        summarize_text("Another lecture")
+        self.assertIs(self.manager.client, client)
+
+    def test_async_summarize_against_fake_server_with_retry(self):
+        """The async path retries through the async client and shares the cache"""
+        from asgiref.sync import async_to_sync
+        from .ai_services import asummarize_text, summarize_text
+        FakeGeminiHandler.failures = 1
+        result = json.loads(async_to_sync(asummarize_text)("Lecture about sound"))
+        self.assertEqual(result["summary"], "From fake server")
+        self.assertEqual(FakeGeminiHandler.requests, 2)
+        summarize_text("Lecture about sound")
+        self.assertEqual(FakeGeminiHandler.requests, 2)
+
+    def test_circuit_breaker_fails_fast(self):
+        """After repeated failures calls are rejected without hitting the API"""
+        from .ai_services import GeminiClientManager, GeminiUnavailableError
+        import httpx
+        manager = GeminiClientManager(api_key='k', max_retries=0, breaker_threshold=2,
+                                      breaker_reset=60, sleep=lambda seconds: None)
+        calls = []
+
+        def failing():
+            calls.append(1)
+            raise httpx.ConnectError("down")
+
+        for _ in range(2):
+            with self.assertRaises(httpx.ConnectError):
+                manager.call(failing)
+        with self.assertRaises(GeminiUnavailableError):
+            manager.call(failing)
+        self.assertEqual(len(calls), 2)
+
+    def test_circuit_breaker_allows_one_probe(self):
+        """Once the reset time passes a single call probes the API while the others fail fast"""
+        from .ai_services import GeminiClientManager, GeminiUnavailableError
+        import httpx
+        import threading
+        manager = GeminiClientManager(api_key='k', max_retries=0, breaker_threshold=1,
+                                      breaker_reset=0, sleep=lambda seconds: None)
+
+        def failing():
+            raise httpx.ConnectError("down")
+
+        with self.assertRaises(httpx.ConnectError):
+            manager.call(failing)
+        started = threading.Event()
+        release = threading.Event()
+
+        def probe():
+            started.set()
+            release.wait(5)
+            return "ok"
+
+        results = []
+        thread = threading.Thread(target=lambda: results.append(manager.call(probe)))
+        thread.start()
+        self.assertTrue(started.wait(5))
+        with self.assertRaises(GeminiUnavailableError):
+            manager.call(lambda: "second")
+        release.set()
+        thread.join(5)
+        self.assertEqual(results, ["ok"])
+        self.assertEqual(manager.call(lambda: "closed"), "closed")
+
+        # A failed probe re-opens the breaker straight away
+        with self.assertRaises(httpx.ConnectError):
+            manager.call(failing)
+        with self.assertRaises(httpx.ConnectError):
+            manager.call(failing)
+        manager.breaker_reset = 60
+        with self.assertRaises(GeminiUnavailableError):
+            manager.call(lambda: "rejected")
+
+    def test_client_errors_do_not_reset_breaker(self):
+        """Non-retryable errors neither count as failures nor clear earlier ones"""
+        from .ai_services import GeminiClientManager, GeminiUnavailableError
+        from google.genai import errors as genai_errors
+        import httpx
+        manager = GeminiClientManager(api_key='k', max_retries=0, breaker_threshold=2,
+                                      breaker_reset=60, sleep=lambda seconds: None)
+
+        def failing():
+            raise httpx.ConnectError("down")
+
+        def bad_request():
+            raise genai_errors.ClientError(400, {'error': {'code': 400, 'message': 'bad', 'status': 'INVALID_ARGUMENT'}})
+
+        with self.assertRaises(httpx.ConnectError):
+            manager.call(failing)
+        for _ in range(3):
+            with self.assertRaises(genai_errors.ClientError):
+                manager.call(bad_request)
+        with self.assertRaises(httpx.ConnectError):
+            manager.call(failing)
+        with self.assertRaises(GeminiUnavailableError):
+            manager.call(failing)
+
+
+def fake_ffmpeg_run(cmd, **kwargs):
+    """Stands in for ffmpeg: concatenates the listed clips byte for byte"""
+    import subprocess
+    list_path = cmd[cmd.index('-i') + 1]
+    with open(list_path, encoding='utf-8') as f:
+        paths = [line.strip()[len("file '"):-1] for line in f if line.strip()]
+    with open(cmd[-1], 'wb') as out:
+        for path in paths:
+            with open(path, 'rb') as clip:
+                out.write(clip.read())
+    return subprocess.CompletedProcess(cmd, 0, b'', b'')
+
+
+class SequenceRendererTests(TestCase):
+    def setUp(self):
+        import tempfile
+        from .sign_assets import SignAssetIndex
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.assets = os.path.join(self.tmp.name, "assets")
+        os.mkdir(self.assets)
+        for name in ("Hello", "Me", "A", "B"):
+            with open(os.path.join(self.assets, name + ".mp4"), "wb") as f:
+                f.write(name.encode() * 10)
+        self.index = SignAssetIndex(directories=[self.assets])
+        self.cache_dir = os.path.join(self.tmp.name, "renders")
+
+    def make_renderer(self, **kwargs):
+        from .asset_metadata import AssetMetadataIndex
+        from .rendering import SequenceRenderer
+        kwargs.setdefault('ffmpeg', '/usr/bin/ffmpeg')
+        kwargs.setdefault('max_bytes', 10 ** 6)
+        kwargs.setdefault('metadata', AssetMetadataIndex(
+            path=os.path.join(self.tmp.name, "sign_metadata.json"), sign_index=self.index))
+        return SequenceRenderer(cache_dir=self.cache_dir, sign_index=self.index, **kwargs)
+
+    def use_real_clips(self, *names):
+        import shutil
+        for name in names:
+            shutil.copy(os.path.join(settings.BASE_DIR, "assets", name + ".mp4"), self.assets)
+        self.index.reload()
+
+    @patch('study_companion.rendering.subprocess.run', side_effect=fake_ffmpeg_run)
+    def test_mixed_clip_sizes_are_reencoded(self, mock_run):
+        """Clips of different resolutions are scaled instead of stream-copied"""
+        self.use_real_clips("A", "L")
+        renderer = self.make_renderer()
+        renderer.render(["A", "L"])
+        cmd = mock_run.call_args[0][0]
+        self.assertIn('libx264', cmd)
+        self.assertTrue(cmd[cmd.index('-vf') + 1].startswith('scale=1280:720'))
+
+    @patch('study_companion.rendering.subprocess.run', side_effect=fake_ffmpeg_run)
+    def test_fingerspelling_sprite(self, mock_run):
+        """Letters map to offsets inside an alphabet video rendered ahead of time"""
+        from .fingerspelling import FingerspellingSprite
+        from .playback import playback_manifest
+        self.use_real_clips("A", "B")
+        renderer = self.make_renderer()
+        executor = Mock()
+        sprite = FingerspellingSprite(renderer=renderer, metadata=renderer.metadata, sign_index=self.index,
+                                      executor=executor)
+
+        # Requests never render: a missing sprite is built in the background once
+        self.assertIsNone(sprite.segments())
+        manifest = playback_manifest(["b"], sign_index=self.index, metadata=renderer.metadata, sprite=sprite)
+        self.assertIsNone(manifest[0]['sprite'])
+        mock_run.assert_not_called()
+        executor.submit.assert_called_once_with(sprite.build)
+
+        segments = sprite.build()
+        self.assertEqual(segments['offsets'], {"A": (0.0, 1.334), "B": (1.334, 2.668)})
+        self.assertIs(sprite.segments(), segments)
+        self.assertEqual(mock_run.call_count, 1)
+
+        manifest = playback_manifest(["Hello", "b"], sign_index=self.index, metadata=renderer.metadata, sprite=sprite)
+        self.assertIsNone(manifest[0]['sprite'])
+        self.assertEqual(manifest[1]['sprite'], {'url': segments['url'], 'start': 1.334, 'end': 2.668})
+        self.assertEqual(mock_run.call_count, 1)
+
+        # Without ffmpeg (and no cached render) letters fall back to single clips
+        os.remove(renderer.render_path(segments['key']))
+        executor.reset_mock()
+        sprite = FingerspellingSprite(renderer=self.make_renderer(ffmpeg=''), sign_index=self.index,
+                                      metadata=renderer.metadata, executor=executor)
+        self.assertIsNone(sprite.segments())
+        self.assertIsNone(sprite.build())
+        executor.submit.assert_not_called()
+
+        # Builds get their own thread rather than a slot in the upload pool
+        from .jobs import get_executor
+        own = FingerspellingSprite().executor
+        self.addCleanup(own.shutdown)
+        self.assertIsNot(own, get_executor())
+        self.assertEqual(own._max_workers, 1)
+
+    @patch('study_companion.rendering.subprocess.run', side_effect=fake_ffmpeg_run)
+    def test_index_command_renders_sprite(self, mock_run):
+        """index_sign_assets renders the fingerspelling sprite for playback to find"""
+        from django.core.management import call_command
+        from io import StringIO
+        from .fingerspelling import FingerspellingSprite
+        for name in ("Hello", "Me", "A", "B"):
+            os.remove(os.path.join(self.assets, name + ".mp4"))
+        self.use_real_clips("A", "B")
+        index_path = os.path.join(self.tmp.name, "sign_metadata.json")
+        out = StringIO()
+        with patch('study_companion.asset_metadata.get_sign_index', return_value=self.index), \
+                patch('study_companion.rendering.shutil.which', return_value='/usr/bin/ffmpeg'), \
+                self.settings(SIGN_RENDER_DIR=self.cache_dir):
+            call_command('index_sign_assets', path=index_path, stdout=out, stderr=StringIO())
+        self.assertIn("Fingerspelling sprite: 2 character(s)", out.getvalue())
+        self.assertEqual(mock_run.call_count, 1)
+
+        renderer = self.make_renderer()
+        sprite = FingerspellingSprite(renderer=renderer, metadata=renderer.metadata, sign_index=self.index)
+        self.assertEqual(sprite.segments()['offsets'], {"A": (0.0, 1.334), "B": (1.334, 2.668)})
+        self.assertEqual(mock_run.call_count, 1)
+
+    @patch('study_companion.rendering.subprocess.run', side_effect=fake_ffmpeg_run)
+    def test_render_concatenates_and_caches(self, mock_run):
+        """A sequence is stitched once with stream copy and then served from disk"""
+        renderer = self.make_renderer()
+        key = renderer.render(["Hello", "me", "Unknown"])
+        with open(renderer.cached_path(key), "rb") as f:
+            self.assertEqual(f.read(), b"Hello" * 10 + b"Me" * 10)
+        self.assertIn('copy', mock_run.call_args[0][0])
+
+        self.assertEqual(renderer.render(["Hello", "Me"]), key)
+        self.assertEqual(mock_run.call_count, 1)
+        self.assertEqual(os.listdir(self.cache_dir), [key + ".mp4"])
+
+    @patch('study_companion.rendering.subprocess.run', side_effect=fake_ffmpeg_run)
+    def test_evicts_least_recently_used(self, mock_run):
+        """Old renders are dropped once the cache exceeds its byte budget"""
+        renderer = self.make_renderer(max_bytes=90)
+        first = renderer.render(["A", "B"])
+        second = renderer.render(["B", "A"])
+        # Make the first render clearly older, then touch it by reading it
+        os.utime(renderer.render_path(first), ns=(0, 0))
+        os.utime(renderer.render_path(second), ns=(10 ** 9, 10 ** 9))
+        renderer.cached_path(first)
+        renderer.render(["Hello", "Me"])
+        self.assertIsNotNone(renderer.cached_path(first))
+        self.assertIsNone(renderer.cached_path(second))
+
+    def test_without_ffmpeg_nothing_is_rendered(self):
+        renderer = self.make_renderer(ffmpeg='')
+        self.assertFalse(renderer.available)
+        self.assertIsNone(renderer.render(["Hello"]))
+        self.assertIsNone(renderer.cached_path("not-a-key"))
+
+    def test_ranged_file_response(self):
+        """Range requests get 206 partial content, bad ranges 416"""
+        from django.test import RequestFactory
+        from .rendering import ranged_file_response
+        path = os.path.join(self.tmp.name, "clip.mp4")
+        with open(path, "wb") as f:
+            f.write(b"0123456789")
+        factory = RequestFactory()
+
+        response = ranged_file_response(factory.get("/", HTTP_RANGE="bytes=2-5"), path)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), b"2345")
+        self.assertEqual(response["Content-Range"], "bytes 2-5/10")
+
+        response = ranged_file_response(factory.get("/", HTTP_RANGE="bytes=-3"), path)
+        self.assertEqual(b"".join(response.streaming_content), b"789")
+
+        response = ranged_file_response(factory.get("/", HTTP_RANGE="bytes=20-"), path)
+        self.assertEqual(response.status_code, 416)
+
+        response = ranged_file_response(factory.get("/"), path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+        response.close()
+
+    @patch('study_companion.rendering.subprocess.run', side_effect=fake_ffmpeg_run)
+    def test_render_api_and_view(self, mock_run):
+        """The API queues a render in the background and the returned URL streams the video"""
+        executor = Mock()
+        renderer = self.make_renderer(executor=executor, queue_size=1)
+        User.objects.create_user(username='viewer', password='password123')
+        self.client.login(username='viewer', password='password123')
+        with patch('study_companion.views.get_renderer', return_value=renderer):
+            def post(gloss):
+                return self.client.post(reverse('render_sequence_api'), data=json.dumps({"gloss": gloss}),
+                                        content_type='application/json')
+
+            # Nothing runs ffmpeg on the request thread, and a pending render is queued once
+            response = post(["Hello", "Me"])
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.json()["status"], "pending")
+            self.assertEqual(post(["Hello", "Me"]).status_code, 202)
+            mock_run.assert_not_called()
+            executor.submit.assert_called_once()
+            # The queue is full
+            self.assertEqual(post(["Me", "Hello"]).status_code, 503)
+
+            func, *args = executor.submit.call_args[0]
+            func(*args)
+            response = post(["Hello", "Me"])
+            self.assertEqual(response.status_code, 200)
+            url = response.json()["url"]
+            response = self.client.get(url, HTTP_RANGE="bytes=0-4")
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(b"".join(response.streaming_content), b"Hello")
+
+            renderer.ffmpeg = None
+            response = self.client.post(reverse('render_sequence_api'),
+                                        data=json.dumps({"gloss": ["A"]}),
+                                        content_type='application/json')
+            self.assertEqual(response.status_code, 503)
+
+
+class AssetMetadataTests(TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+        from .sign_assets import SignAssetIndex
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.assets = os.path.join(self.tmp.name, "assets")
+        os.mkdir(self.assets)
+        shutil.copy(os.path.join(settings.BASE_DIR, "assets", "Hello.mp4"), self.assets)
+        with open(os.path.join(self.assets, "Broken.mp4"), "wb") as f:
+            f.write(b"not an mp4")
+        self.index = SignAssetIndex(directories=[self.assets], reload_interval=0)
+        self.index_path = os.path.join(self.tmp.name, "sign_metadata.json")
+
+    def test_parse_mp4_headers(self):
+        from .asset_metadata import MP4ParseError, parse_mp4
+        info = parse_mp4(os.path.join(self.assets, "Hello.mp4"))
+        self.assertEqual(info, {'duration': 1.292, 'width': 1280, 'height': 720, 'codec': 'avc1'})
+        with self.assertRaises(MP4ParseError):
+            parse_mp4(os.path.join(self.assets, "Broken.mp4"))
+
+    def test_refresh_is_incremental(self):
+        """Only new or changed clips are re-parsed; the index survives restarts"""
+        from .asset_metadata import AssetMetadataIndex
+        metadata = AssetMetadataIndex(path=self.index_path, sign_index=self.index)
+        self.assertEqual(metadata.refresh(), (2, 0))
+        self.assertIn('error', metadata.get("Broken"))
+        self.assertEqual(metadata.get("hello")['duration'], 1.292)
+
+        reopened = AssetMetadataIndex(path=self.index_path, sign_index=self.index)
+        with patch('study_companion.asset_metadata.describe_clip') as mock_describe:
+            self.assertEqual(reopened.refresh(), (0, 0))
+            mock_describe.assert_not_called()
+
+        os.remove(os.path.join(self.assets, "Broken.mp4"))
+        stat = os.stat(self.assets)
+        os.utime(self.assets, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        self.assertEqual(reopened.refresh(), (0, 1))
+
+    def test_lookups_do_not_stat_clips(self):
+        """get() is a dict hit; clips overwritten in place are re-indexed in the background"""
+        from .asset_metadata import AssetMetadataIndex
+        executor = Mock()
+        metadata = AssetMetadataIndex(path=self.index_path, sign_index=self.index, refresh_interval=60,
+                                      executor=executor)
+        metadata.refresh()
+        with open(os.path.join(self.assets, "Hello.mp4"), "wb") as f:
+            f.write(b"not an mp4 either")
+        with patch.object(metadata, 'refresh', wraps=metadata.refresh) as mock_refresh:
+            self.assertEqual(metadata.get("hello")['duration'], 1.292)
+            metadata.refresh_interval = 0
+            # Past the interval the lookup still answers from the last scan
+            self.assertEqual(metadata.get("hello")['duration'], 1.292)
+            self.assertEqual(metadata.get("hello")['duration'], 1.292)
+            mock_refresh.assert_not_called()
+        executor.submit.assert_called_once_with(metadata._background_refresh)
+
+        executor.submit.call_args[0][0]()
+        self.assertIn('error', metadata.get("hello"))
+
+    def test_command_reports_invalid_clips(self):
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        from io import StringIO
+        with patch('study_companion.asset_metadata.get_sign_index', return_value=self.index):
+            with self.assertRaises(CommandError):
+                call_command('index_sign_assets', path=self.index_path, stdout=StringIO(), stderr=StringIO())
+        with open(self.index_path) as f:
+            self.assertEqual(sorted(json.load(f)['clips']), ["Broken", "Hello"])
+
+    def test_clip_view_uses_strong_etag(self):
+        """Clips are served with their sha256 as ETag and revalidate to 304"""
+        from .asset_metadata import AssetMetadataIndex
+        metadata = AssetMetadataIndex(path=self.index_path, sign_index=self.index)
+        url = reverse('sign_clip', args=["hello"])
+        with patch('study_companion.views.get_sign_index', return_value=self.index), \
+                patch('study_companion.views.get_asset_metadata', return_value=metadata):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            etag = response['ETag']
+            self.assertEqual(etag, '"%s"' % metadata.get("Hello")['sha256'])
+            response.close()
+
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(self.client.get(reverse('sign_clip', args=["missing"])).status_code, 404)
+
+
+class StubGlossEngine:
+    """Splits on whitespace; stands in for the NLTK pipeline"""
+    def __init__(self):
+        from .lru import LRUCache
+        from .sign_assets import get_sign_index
+        self.result_cache = LRUCache(100)
+        self.sign_index = get_sign_index()
+
+    def to_gloss(self, text, mark_tense=True):
+        return [w.strip('.,?!') for w in text.split()]
+
+    def to_gloss_batch(self, texts, mark_tense=True):
+        return [self.to_gloss(t) for t in texts]
+
+
+@override_settings(CACHES=TEST_CACHES)
+class BenchmarkTests(TestCase):
+    def test_percentile(self):
+        from .benchmarks import percentile
+        values = [1.0, 2.0, 3.0, 4.0, 5.0]
+        self.assertEqual(percentile(values, 50), 3.0)
+        self.assertEqual(percentile(values, 95), 4.8)
+        self.assertEqual(percentile([], 99), 0.0)
+
+    def test_corpora_are_reproducible(self):
+        from .benchmarks import deck_summaries, paragraphs
+        self.assertEqual(paragraphs(), paragraphs())
+        self.assertEqual(deck_summaries(), deck_summaries())
+        self.assertGreater(len(deck_summaries()[0]['summary'].split()), 300)
+
+    def test_deck_summaries_match_summary_schema(self):
+        """The benchmark summaries have the fields and types Gemini is asked for"""
+        from .ai_services import SUMMARY_SCHEMA
+        from .benchmarks import deck_summaries
+        concept_schema = SUMMARY_SCHEMA["properties"]["key_concepts"]["items"]
+        colors = concept_schema["properties"]["color"]["enum"]
+        for summary in deck_summaries():
+            self.assertEqual(set(summary), set(SUMMARY_SCHEMA["required"]))
+            self.assertIsInstance(summary["summary"], str)
+            self.assertTrue(summary["key_concepts"])
+            for concept in summary["key_concepts"]:
+                self.assertEqual(set(concept), set(concept_schema["required"]))
+                self.assertIn(concept["color"], colors)
+            self.assertTrue(all(isinstance(term, str) for term in summary["important_terms"]))
+
+    def test_all_stages_report_and_roll_back(self):
+        """Every stage reports latency stats and the request stages leave no rows behind"""
+        from .benchmarks import ConversionBenchmark
+        engine = StubGlossEngine()
+        benchmark = ConversionBenchmark(iterations=1, warmup=0, engine=engine)
+        with patch('study_companion.views.get_gloss_engine', return_value=engine), \
+                patch('study_companion.ai_services.get_gloss_engine', return_value=engine):
+            report = benchmark.run()
+        self.assertEqual(list(report['stages']), ConversionBenchmark.STAGES)
+        stats = report['stages']['animation_view']['sentences']
+        self.assertEqual(stats['calls'], 30)
+        self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+        self.assertIn('peak_memory_kb', report['stages']['summary_view']['regloss'])
+        self.assertFalse(User.objects.filter(username='benchmark-user').exists())
+        self.assertFalse(PPTUpload.objects.filter(title="Benchmark deck").exists())
+
+    def test_command_writes_json(self):
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+        output = os.path.join(tempfile.mkdtemp(), "bench.json")
+        with patch('study_companion.benchmarks.ConversionBenchmark.engine', StubGlossEngine()):
+            call_command('benchmark', stage=['gloss_cached'], iterations=1, output=output, stdout=StringIO())
+        with open(output) as f:
+            report = json.load(f)
+        self.assertEqual(list(report['stages']), ['gloss_cached'])
+        self.assertIn('p95_ms', report['stages']['gloss_cached']['paragraphs'])
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        from .metrics import stage_metrics
+        stage_metrics.clear()
+        self.addCleanup(stage_metrics.clear)
+
+    def test_histogram_buckets_are_cumulative(self):
+        from .metrics import Histogram
+        histogram = Histogram(buckets=(0.01, 0.1))
+        for value in (0.005, 0.05, 0.05, 3.0):
+            histogram.observe(value)
+        cumulative, total, count = histogram.snapshot()
+        self.assertEqual(cumulative, [1, 3, 4])
+        self.assertEqual(count, 4)
+        self.assertAlmostEqual(total, 3.105)
+
+    def test_metrics_endpoint_renders_prometheus_text(self):
+        from .metrics import timed
+        with timed('tokenize'):
+            pass
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('# TYPE a2sl_stage_duration_seconds histogram', body)
+        self.assertIn('a2sl_stage_duration_seconds_bucket{stage="tokenize",le="+Inf"} 1', body)
+        self.assertIn('a2sl_stage_duration_seconds_count{stage="tokenize"} 1', body)
+
+        with override_settings(METRICS_TOKEN='secret'):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+            response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+            self.assertEqual(response.status_code, 200)
+
+    def test_metrics_endpoint_exports_gloss_caches(self):
+        """Lemma and result LRU counters of the loaded gloss engine are scraped"""
+        from . import gloss
+        engine = gloss.GlossEngine(result_cache_size=10)
+        engine.result_cache.set("key", ["Hello"])
+        engine.result_cache.get("key")
+        engine.result_cache.get("other")
+        with patch.object(gloss, '_engine', engine):
+            body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('# TYPE a2sl_gloss_cache_hits_total counter', body)
+        self.assertIn('a2sl_gloss_cache_hits_total{cache="result"} 1', body)
+        self.assertIn('a2sl_gloss_cache_misses_total{cache="result"} 1', body)
+        self.assertIn('a2sl_gloss_cache_entries{cache="result"} 1', body)
+        self.assertIn('a2sl_gloss_cache_max_entries{cache="result"} 10', body)
+        self.assertIn('a2sl_gloss_cache_entries{cache="lemma"} 0', body)
+
+    @override_settings(SERVER_TIMING=True)
+    @patch('study_companion.views.get_gloss_engine')
+    def test_server_timing_header(self, mock_get_engine):
+        """Stages timed during a request are reported in Server-Timing"""
+        mock_get_engine.return_value.to_gloss_batch.return_value = [["Hello"]]
+        User.objects.create_user(username='timer', password='password123')
+        self.client.login(username='timer', password='password123')
+        response = self.client.post(reverse('convert_batch_api'), json.dumps({'sentences': ["hello"]}),
+                                    content_type='application/json')
+        header = response['Server-Timing']
+        self.assertRegex(header, r'manifest;dur=\d+\.\d\d')
+        self.assertRegex(header, r'total;dur=\d+\.\d\d')
+
+        with override_settings(SERVER_TIMING=False):
+            response = Client().get(reverse('metrics'))
+            self.assertFalse(response.has_header('Server-Timing'))
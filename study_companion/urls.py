@@ -1,14 +1,35 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Under ASGI (ASYNC_VIEWS) the Gemini-bound endpoints use their async variants
+if getattr(settings, 'ASYNC_VIEWS', False):
+    quiz_data_api = views.quiz_data_api_async
+else:
+    quiz_data_api = views.quiz_data_api
+
 urlpatterns = [
     path('dashboard/', views.dashboard_view, name='dashboard'),
     path('upload/', views.upload_ppt_view, name='upload'),
     path('summary/<int:session_id>/', views.summary_view, name='summary'),
+    path('summary/<int:session_id>/status/', views.upload_status_api, name='upload_status'),
     path('quiz/<int:session_id>/', views.quiz_view, name='quiz'),
-    path('quiz/<int:session_id>/api/', views.quiz_data_api, name='quiz_data_api'),
+    path('quiz/<int:session_id>/api/', quiz_data_api, name='quiz_data_api'),
     path('quiz/<int:session_id>/results/', views.quiz_submit_view, name='quiz_results'),
     path('quiz/<int:session_id>/save-result/', views.quiz_save_result, name='quiz_save_result'),
     path('live-converter/', views.animation_view, name='animation'),
+    path('api/convert/', views.convert_batch_api, name='convert_batch_api'),
+    path('api/render/', views.render_sequence_api, name='render_sequence_api'),
+    path('render/<str:key>/', views.sign_render_view, name='sign_render'),
+    path('signs/<str:name>/', views.sign_clip_view, name='sign_clip'),
     path('history/', views.history_view, name='history'),
+    path('history/api/', views.history_api, name='history_api'),
+    path('metrics', views.metrics_view, name='metrics'),
 ]
+
+# The summary stream holds its connection for minutes, so it only exists
+# where an ASGI server answers it; WSGI-only deployments poll upload_status
+if getattr(settings, 'SUMMARY_STREAM', False):
+    urlpatterns.append(
+        path('summary/<int:session_id>/stream/', views.summary_stream_view_async, name='summary_stream')
+    )
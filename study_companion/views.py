@@ -1,42 +1,66 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.contrib.auth.views import redirect_to_login
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 from .models import PPTUpload
-from .ai_services import extract_ppt_text, summarize_text, generate_mcq
+from .ai_services import agenerate_mcq, generate_mcq, parse_summary, summary_sign_words
+from .jobs import enqueue_upload, get_progress
+from .quizzes import DEFAULT_DIFFICULTY, DEFAULT_NUM_QUESTIONS, add_to_quiz_totals, get_cached_quiz, normalize_quiz_params, store_quiz
 
+import asyncio
+import functools
 import json
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-import nltk
-from django.contrib.staticfiles import finders
+import time
+from django.templatetags.static import static
+from django.utils.crypto import constant_time_compare
+from django.utils.http import parse_etags
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from .gloss import get_gloss_engine
+from .sign_assets import SIGN_EXTENSION, get_sign_index
+from .asset_metadata import get_asset_metadata
+from .rendering import get_renderer, ranged_file_response
+from .playback import playback_duration, playback_manifest
+from .metrics import stage_metrics
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, upload_page
+from django.utils import dateformat, timezone
+
+# Recent uploads listed on the dashboard; the rest are on the history page
+DASHBOARD_UPLOADS = 10
+
+# Upper bound on sentences accepted by one batch conversion request
+MAX_BATCH_SENTENCES = 1000
+
+# Upper bound on signs stitched into one rendered sequence
+MAX_RENDER_SIGNS = 500
+
+# Summary stream timing (seconds); clients reconnect after STREAM_MAX_DURATION
+STREAM_POLL_INTERVAL = 0.25
+STREAM_KEEPALIVE_INTERVAL = 15
+STREAM_MAX_DURATION = 10 * 60
 
 
 @login_required(login_url="login")
 def dashboard_view(request):
-    from .models import PPTUpload, UserProfile, QuizResult
-    from django.db.models import Sum
+    from .models import UserProfile
     
-    uploads = PPTUpload.objects.filter(user=request.user).order_by('-uploaded_at')
+    uploads, next_cursor = upload_page(request.user, limit=DASHBOARD_UPLOADS)
     
     # Get or create profile (handling existing users who might not have one yet)
     profile, created = UserProfile.objects.get_or_create(user=request.user)
     
-    # Calculate Vocab Mastery (avg quiz accuracy)
-    results = QuizResult.objects.filter(user=request.user)
-    total_score = results.aggregate(Sum('score'))['score__sum'] or 0
-    total_possible = results.aggregate(Sum('total'))['total__sum'] or 0
-    
-    vocab_mastery = 0
-    if total_possible > 0:
-        vocab_mastery = int((total_score / total_possible) * 100)
-        
+    # Quiz stats come from the profile's running totals, not the result rows
     context = {
         'uploads': uploads,
+        'has_more_uploads': next_cursor is not None,
         'streak': profile.current_streak,
         'xp': profile.total_xp,
-        'vocab_mastery': vocab_mastery,
-        'quiz_count': results.count()
+        'vocab_mastery': profile.vocab_mastery,
+        'quiz_count': profile.quiz_count
     }
     
     return render(request, 'dashboard.html', context)
@@ -46,58 +70,69 @@ def upload_ppt_view(request):
     if request.method == 'POST' and request.FILES.get('file'):
         ppt_file = request.FILES['file']
         
-        # Create DB entry
+        # Create DB entry; extraction and summarization run in the background
         upload = PPTUpload.objects.create(
             user=request.user,
             file=ppt_file,
-            title=ppt_file.name
+            title=ppt_file.name,
+            status=PPTUpload.STATUS_PENDING
         )
-        
-        # Process PPT (Text Extraction)
-        try:
-            text = extract_ppt_text(upload.file.path)
-            upload.extracted_text = text
-            
-            # Generate Summary immediately (or could be async)
-            summary = summarize_text(text)
-            upload.summary_text = summary
-            
-            upload.save()
-            return redirect('summary', session_id=upload.id)
-            
-        except Exception as e:
-            # Handle error (e.g., file format issue)
-            print(f"Error processing PPT: {e}")
-            # Optional: delete the upload if failed
-            return render(request, 'upload_ppt.html', {'error': f'Error processing file: {e}'})
+        enqueue_upload(upload.id)
+
+        if 'application/json' in request.headers.get('Accept', ''):
+            return JsonResponse({
+                'job_id': upload.id,
+                'status': upload.status,
+                'status_url': reverse('upload_status', args=[upload.id]),
+                'summary_url': reverse('summary', args=[upload.id]),
+            }, status=202)
+        return redirect('summary', session_id=upload.id)
             
     return render(request, 'upload_ppt.html')
 
 @login_required(login_url="login")
-def summary_view(request, session_id):
+def upload_status_api(request, session_id):
+    """
+    API endpoint reporting the background processing state of an upload.
+    Polled by summary.html while the deck is being processed.
+    """
     upload = get_object_or_404(PPTUpload, id=session_id, user=request.user)
-    
-    # Process summary for sign language
-    from .ai_services import process_text_for_sign_language
+    data = {
+        'job_id': upload.id,
+        'status': upload.status,
+        'error': upload.error_message,
+        'summary_url': reverse('summary', args=[upload.id]),
+    }
+    if upload.is_processing:
+        # Partial results, for pages that poll instead of streaming
+        progress = get_progress(upload.id) or {}
+        data['progress'] = {
+            'summary': progress.get('summary', ''),
+            'key_concepts': progress.get('key_concepts') or [],
+        }
+    return JsonResponse(data)
+
+@login_required(login_url="login")
+def summary_view(request, session_id):
+    upload = get_object_or_404(PPTUpload.objects.select_related('content'), id=session_id, user=request.user)
+
+    if upload.status != PPTUpload.STATUS_DONE:
+        # Still processing (or failed): the page streams the summary where an
+        # ASGI server serves the stream, else polls upload_status_api
+        return render(request, 'summary.html', {
+            'upload': upload,
+            'stream_summary': getattr(settings, 'SUMMARY_STREAM', False),
+            'words': [],
+            'manifest': [],
+            'summary_data': parse_summary(None)
+        })
     
     # Try to parse summary as JSON (new format), else fallback to text (legacy)
-    try:
-        summary_data = json.loads(upload.summary_text)
-        if not isinstance(summary_data, dict):
-            raise ValueError("Not a dictionary")
-        summary_text_content = summary_data.get('summary', '')
-    except (json.JSONDecodeError, ValueError, TypeError):
-        # Legacy: summary_text is just the string
-        summary_text_content = upload.summary_text or ""
-        summary_data = {
-            "summary": summary_text_content,
-            "key_concepts": [],
-            "important_terms": []
-        }
+    summary_data = parse_summary(upload.summary_text)
         
     try:
-        # Use the actual summary text for sign language generation
-        sign_words = process_text_for_sign_language(summary_text_content)
+        # Stored when the summary was generated; only rebuilt if the gloss version changed
+        sign_words = summary_sign_words(upload, summary_data)
     except Exception as e:
         print(f"Error generating sign language: {e}")
         sign_words = []
@@ -105,32 +140,192 @@ def summary_view(request, session_id):
     return render(request, 'summary.html', {
         'upload': upload, 
         'words': sign_words, 
+        'manifest': playback_manifest(sign_words),
         'summary_data': summary_data
     })
 
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _poll_summary(upload_id, sent):
+    """
+    Checks an upload once and returns (status, events) for the progress made
+    since the last poll. `sent` records what the client already has and is
+    updated in place.
+    """
+    upload = PPTUpload.objects.only('id', 'status', 'error_message').get(id=upload_id)
+    if upload.status == PPTUpload.STATUS_DONE:
+        return upload.status, []
+    if upload.status == PPTUpload.STATUS_FAILED:
+        return upload.status, [_sse('error', {'message': upload.error_message})]
+
+    events = []
+    progress = get_progress(upload_id) or {}
+    summary = progress.get('summary', '')
+    if summary != sent['summary']:
+        if summary.startswith(sent['summary']):
+            events.append(_sse('summary_delta', {'text': summary[len(sent['summary']):]}))
+        else:
+            events.append(_sse('summary', {'text': summary}))
+        sent['summary'] = summary
+    concepts = progress.get('key_concepts')
+    if concepts and concepts != sent['concepts']:
+        events.append(_sse('key_concepts', {'key_concepts': concepts}))
+        sent['concepts'] = concepts
+    return upload.status, events
+
+def _final_summary_events(upload_id):
+    """
+    The events sent once an upload is done: the stored summary and its gloss.
+    """
+    upload = PPTUpload.objects.select_related('content').get(id=upload_id)
+    summary_data = parse_summary(upload.summary_text)
+    events = [
+        _sse('summary', {'text': summary_data.get('summary', '')}),
+        _sse('key_concepts', {'key_concepts': summary_data.get('key_concepts', [])}),
+        _sse('important_terms', {'important_terms': summary_data.get('important_terms', [])}),
+    ]
+    try:
+        sign_words = summary_sign_words(upload, summary_data)
+    except Exception as e:
+        print(f"Error generating sign language: {e}")
+        sign_words = []
+    events.append(_sse('gloss', {'words': sign_words}))
+    events.append(_sse('done', {}))
+    return events
+
+async def _asummary_events(upload_id):
+    """
+    Yields server-sent events for an upload: the executive summary as it is
+    generated, then the key concepts and terms, then the sign gloss. Waits
+    between polls without holding a thread, and only the database and cache
+    reads go through sync_to_async.
+    They run on the thread pool (thread_sensitive=False) rather than the one
+    thread that ASGI shares between all sync code of the process.
+    """
+    sent = {'summary': "", 'concepts': None}
+    started = last_sent = time.monotonic()
+
+    while True:
+        status, events = await sync_to_async(_poll_summary, thread_sensitive=False)(upload_id, sent)
+        for event in events:
+            yield event
+        if status == PPTUpload.STATUS_FAILED:
+            return
+        if status == PPTUpload.STATUS_DONE:
+            break
+        if events:
+            last_sent = time.monotonic()
+
+        now = time.monotonic()
+        if now - started > STREAM_MAX_DURATION:
+            yield _sse('timeout', {})
+            return
+        if now - last_sent > STREAM_KEEPALIVE_INTERVAL:
+            yield ": keep-alive\n\n"
+            last_sent = now
+        await asyncio.sleep(STREAM_POLL_INTERVAL)
+
+    for event in await sync_to_async(_final_summary_events, thread_sensitive=False)(upload_id):
+        yield event
+
+def async_login_required(view):
+    """
+    login_required for async views (Django's decorator only accepts them
+    from 5.1). The user is loaded through sync_to_async.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        is_authenticated = await sync_to_async(lambda: request.user.is_authenticated, thread_sensitive=False)()
+        if not is_authenticated:
+            return redirect_to_login(request.get_full_path(), "login")
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+@async_login_required
+async def summary_stream_view_async(request, session_id):
+    """
+    Server-sent event stream of an upload's summary, so the page can show
+    the executive summary while the rest is still being generated. Only
+    routed where an ASGI server serves it (ASYNC_VIEWS / SUMMARY_STREAM),
+    since an open stream then costs a coroutine instead of a worker thread.
+    """
+    upload = await sync_to_async(get_object_or_404, thread_sensitive=False)(PPTUpload.objects.only('id', 'user'), id=session_id, user=request.user)
+    response = StreamingHttpResponse(_asummary_events(upload.id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 @login_required(login_url="login")
 def quiz_view(request, session_id):
     upload = get_object_or_404(PPTUpload, id=session_id, user=request.user)
     return render(request, 'quiz.html', {'upload': upload})
 
+def _quiz_not_ready(upload):
+    """
+    409 response while an upload has no extracted text to quiz on yet
+    (still processing, or processing failed), else None.
+    """
+    if upload.status == PPTUpload.STATUS_DONE and upload.extracted_text:
+        return None
+    status = 'error' if upload.status == PPTUpload.STATUS_FAILED else 'processing'
+    return JsonResponse({
+        'status': status,
+        'message': upload.error_message or 'The presentation is still being processed.',
+        'questions': [],
+    }, status=409)
+
 @login_required(login_url="login")
 def quiz_data_api(request, session_id):
     """
     API endpoint to generate/get quiz data.
     Called via AJAX from quiz.html
     """
-    upload = get_object_or_404(PPTUpload, id=session_id, user=request.user)
+    upload = get_object_or_404(PPTUpload.objects.select_related('content'), id=session_id, user=request.user)
+    not_ready = _quiz_not_ready(upload)
+    if not_ready:
+        return not_ready
     
-    difficulty = request.GET.get('difficulty', 'Medium')
-    num_questions = int(request.GET.get('num_questions', 5))
+    difficulty, num_questions = normalize_quiz_params(
+        request.GET.get('difficulty', DEFAULT_DIFFICULTY),
+        request.GET.get('num_questions', DEFAULT_NUM_QUESTIONS)
+    )
     
-    # We could cache this in the model, but for now let's generate fresh if params change
-    # or just simple generation every time for the demo.
-    
-    questions = generate_mcq(upload.extracted_text, num_questions, difficulty)
+    # Quizzes are stored per (difficulty, num_questions); repeat loads skip the AI call
+    questions = get_cached_quiz(upload, difficulty, num_questions)
+    if questions is None:
+        questions = generate_mcq(upload.extracted_text, num_questions, difficulty)
+        if questions:
+            store_quiz(upload.id, difficulty, num_questions, questions)
     
     return JsonResponse({'questions': questions})
 
+@async_login_required
+async def quiz_data_api_async(request, session_id):
+    """
+    ASGI variant of quiz_data_api: waits on Gemini with the async client so
+    a worker can hold many quiz requests at once.
+    """
+    upload = await sync_to_async(get_object_or_404, thread_sensitive=False)(
+        PPTUpload.objects.select_related('content'), id=session_id, user=request.user
+    )
+    not_ready = _quiz_not_ready(upload)
+    if not_ready:
+        return not_ready
+
+    difficulty, num_questions = normalize_quiz_params(
+        request.GET.get('difficulty', DEFAULT_DIFFICULTY),
+        request.GET.get('num_questions', DEFAULT_NUM_QUESTIONS)
+    )
+
+    questions = get_cached_quiz(upload, difficulty, num_questions)
+    if questions is None:
+        questions = await agenerate_mcq(upload.extracted_text, num_questions, difficulty)
+        if questions:
+            await sync_to_async(store_quiz, thread_sensitive=False)(upload.id, difficulty, num_questions, questions)
+
+    return JsonResponse({'questions': questions})
+
 from datetime import date
 
 @login_required(login_url="login")
@@ -144,36 +339,43 @@ def quiz_save_result(request, session_id):
         try:
             data = json.loads(request.body)
             upload = get_object_or_404(PPTUpload, id=session_id, user=request.user)
+            score = int(data.get('score', 0))
+            total = int(data.get('total', 0))
             
-            # Create Result
-            from .models import QuizResult
-            result = QuizResult.objects.create(
-                user=request.user,
-                upload=upload,
-                score=data.get('score', 0),
-                total=data.get('total', 0),
-                time_taken=data.get('time_taken', '00:00')
-            )
+            from .models import QuizResult, UserProfile
+
+            # Result and running totals are written together
+            with transaction.atomic():
+                # Create Result
+                result = QuizResult.objects.create(
+                    user=request.user,
+                    upload=upload,
+                    score=score,
+                    total=total,
+                    time_taken=data.get('time_taken', '00:00')
+                )
+                add_to_quiz_totals(request.user, score, total)
             
-            # Update Profile
-            user_profile = request.user.userprofile
-            today = date.today()
+                # Update Profile
+                user_profile = request.user.userprofile
+                today = date.today()
             
-            if user_profile.last_activity_date != today:
-                if user_profile.last_activity_date and (today - user_profile.last_activity_date).days == 1:
-                    user_profile.current_streak += 1
-                else:
-                    user_profile.current_streak = 1
+                if user_profile.last_activity_date != today:
+                    if user_profile.last_activity_date and (today - user_profile.last_activity_date).days == 1:
+                        user_profile.current_streak += 1
+                    else:
+                        user_profile.current_streak = 1
                 
-                if user_profile.current_streak > user_profile.longest_streak:
-                    user_profile.longest_streak = user_profile.current_streak
+                    if user_profile.current_streak > user_profile.longest_streak:
+                        user_profile.longest_streak = user_profile.current_streak
                 
-                user_profile.last_activity_date = today
+                    user_profile.last_activity_date = today
             
-            # Add XP (e.g. 10 XP per correct answer)
-            xp_earned = int(data.get('score', 0)) * 10
-            user_profile.total_xp += xp_earned
-            user_profile.save()
+                user_profile.save(update_fields=['current_streak', 'longest_streak', 'last_activity_date'])
+            
+                # Add XP (e.g. 10 XP per correct answer)
+                xp_earned = score * 10
+                UserProfile.objects.filter(pk=user_profile.pk).update(total_xp=F('total_xp') + xp_earned)
             
             return JsonResponse({'status': 'success', 'xp_earned': xp_earned})
         except Exception as e:
@@ -184,104 +386,170 @@ def quiz_save_result(request, session_id):
 def animation_view(request):
 	if request.method == 'POST':
 		text = request.POST.get('sen')
-		#tokenizing the sentence
-		#tokenizing the sentence
-		text = text.lower()
-		#tokenizing the sentence
-		try:
-			words = word_tokenize(text)
-		except LookupError:
-			nltk.download('punkt')
-			nltk.download('punkt_tab')
-			words = word_tokenize(text)
-
-		try:
-			tagged = nltk.pos_tag(words)
-		except LookupError:
-			nltk.download('averaged_perceptron_tagger')
-			nltk.download('averaged_perceptron_tagger_eng')
-			tagged = nltk.pos_tag(words)
-		tense = {}
-		tense["future"] = len([word for word in tagged if word[1] == "MD"])
-		tense["present"] = len([word for word in tagged if word[1] in ["VBP", "VBZ","VBG"]])
-		tense["past"] = len([word for word in tagged if word[1] in ["VBD", "VBN"]])
-		tense["present_continuous"] = len([word for word in tagged if word[1] in ["VBG"]])
-
-
-
-		#stopwords that will be removed
-		stop_words = set(["mightn't", 're', 'wasn', 'wouldn', 'be', 'has', 'that', 'does', 'shouldn', 'do', "you've",'off', 'for', "didn't", 'm', 'ain', 'haven', "weren't", 'are', "she's", "wasn't", 'its', "haven't", "wouldn't", 'don', 'weren', 's', "you'd", "don't", 'doesn', "hadn't", 'is', 'was', "that'll", "should've", 'a', 'then', 'the', 'mustn', 'i', 'nor', 'as', "it's", "needn't", 'd', 'am', 'have',  'hasn', 'o', "aren't", "you'll", "couldn't", "you're", "mustn't", 'didn', "doesn't", 'll', 'an', 'hadn', 'whom', 'y', "hasn't", 'itself', 'couldn', 'needn', "shan't", 'isn', 'been', 'such', 'shan', "shouldn't", 'aren', 'being', 'were', 'did', 'ma', 't', 'having', 'mightn', 've', "isn't", "won't"])
-
-
-
-		#removing stopwords and applying lemmatizing nlp process to words
-		lr = WordNetLemmatizer()
-		try:
-			lr.lemmatize('test')
-		except (LookupError, AttributeError):
-			nltk.download('wordnet')
-			nltk.download('omw-1.4')
-
-		filtered_text = []
-		for w,p in zip(words,tagged):
-			if w not in stop_words:
-				if p[1]=='VBG' or p[1]=='VBD' or p[1]=='VBZ' or p[1]=='VBN' or p[1]=='NN':
-					filtered_text.append(lr.lemmatize(w,pos='v'))
-				elif p[1]=='JJ' or p[1]=='JJR' or p[1]=='JJS'or p[1]=='RBR' or p[1]=='RBS':
-					filtered_text.append(lr.lemmatize(w,pos='a'))
-
-				else:
-					filtered_text.append(lr.lemmatize(w))
-
-
-		#adding the specific word to specify tense
-		words = filtered_text
-		temp=[]
-		for w in words:
-			if w=='I':
-				temp.append('Me')
-			else:
-				temp.append(w)
-		words = temp
-		probable_tense = max(tense,key=tense.get)
-
-		if probable_tense == "past" and tense["past"]>=1:
-			temp = ["Before"]
-			temp = temp + words
-			words = temp
-		elif probable_tense == "future" and tense["future"]>=1:
-			if "Will" not in words:
-					temp = ["Will"]
-					temp = temp + words
-					words = temp
-			else:
-				pass
-		elif probable_tense == "present":
-			if tense["present_continuous"]>=1:
-				temp = ["Now"]
-				temp = temp + words
-				words = temp
-
-
-		filtered_text = []
-		for w in words:
-			path = w + ".mp4"
-			f = finders.find(path)
-			#splitting the word if its animation is not present in database
-			if not f:
-				for c in w:
-					filtered_text.append(c)
-			#otherwise animation of word
-			else:
-				filtered_text.append(w)
-		words = filtered_text;
-
-
-		return render(request,'animation.html',{'words':words,'text':text})
+		words = get_gloss_engine().to_gloss(text)
+		manifest = playback_manifest(words)
+		return render(request,'animation.html',{'words':words,'manifest':manifest,'duration':playback_duration(manifest),'text':text})
 	else:
 		return render(request,'animation.html')
 
+def _api_token_or_login(view):
+    """
+    Lets integrations call `view` with "Authorization: Bearer <CONVERT_API_TOKEN>"
+    instead of a session. Token requests skip CSRF, which only guards
+    cookie-authenticated browsers; session requests keep both checks.
+    """
+    session_view = login_required(csrf_protect(view), login_url="login")
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = getattr(settings, 'CONVERT_API_TOKEN', '')
+        authorization = request.headers.get('Authorization')
+        if token and authorization:
+            if not constant_time_compare(authorization, f'Bearer {token}'):
+                return JsonResponse({'status': 'error', 'message': 'Invalid API token'}, status=403)
+            return view(request, *args, **kwargs)
+        return session_view(request, *args, **kwargs)
+    return csrf_exempt(wrapper)
+
+@_api_token_or_login
+def convert_batch_api(request):
+    """
+    API endpoint converting a list of sentences to sign gloss sequences.
+    Expects {"sentences": [...]} and returns the gloss, clip URLs, playback
+    manifest and total playback time (seconds) per sentence.
+    Integrations authenticate with a bearer token (see _api_token_or_login).
+    """
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error', 'message': 'Invalid method'}, status=405)
+    try:
+        data = json.loads(request.body)
+        sentences = data['sentences']
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return JsonResponse({'status': 'error', 'message': 'Expected a JSON body with a "sentences" list'}, status=400)
+    if not isinstance(sentences, list) or not all(isinstance(s, str) for s in sentences):
+        return JsonResponse({'status': 'error', 'message': '"sentences" must be a list of strings'}, status=400)
+    if len(sentences) > MAX_BATCH_SENTENCES:
+        return JsonResponse({'status': 'error', 'message': f'At most {MAX_BATCH_SENTENCES} sentences per request'}, status=400)
+
+    mark_tense = bool(data.get('mark_tense', True))
+    glosses = get_gloss_engine().to_gloss_batch(sentences, mark_tense=mark_tense)
+
+    results = []
+    for text, gloss in zip(sentences, glosses):
+        manifest = playback_manifest(gloss)
+        results.append({
+            'text': text,
+            'gloss': gloss,
+            'assets': [static(word + SIGN_EXTENSION) for word in gloss],
+            'clips': manifest,
+            'duration': playback_duration(manifest),
+        })
+    return JsonResponse({'status': 'success', 'results': results})
+
+@login_required(login_url="login")
+def render_sequence_api(request):
+    """
+    API endpoint stitching a gloss sequence into one video.
+    Expects {"gloss": [...]} and returns the URL of the rendered MP4 once it
+    exists. Until then the render is queued in the background and the
+    response is 202 {"status": "pending"}, to be asked again; 503 means
+    rendering is unavailable or busy and the player keeps to single clips.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error', 'message': 'Invalid method'}, status=405)
+    try:
+        gloss = json.loads(request.body)['gloss']
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return JsonResponse({'status': 'error', 'message': 'Expected a JSON body with a "gloss" list'}, status=400)
+    if not isinstance(gloss, list) or not all(isinstance(w, str) for w in gloss):
+        return JsonResponse({'status': 'error', 'message': '"gloss" must be a list of strings'}, status=400)
+    if len(gloss) > MAX_RENDER_SIGNS:
+        return JsonResponse({'status': 'error', 'message': f'At most {MAX_RENDER_SIGNS} signs per sequence'}, status=400)
+
+    key, ready = get_renderer().render_later(gloss)
+    if key is None:
+        return JsonResponse({'status': 'error', 'message': 'Sequence rendering is unavailable'}, status=503)
+    if not ready:
+        return JsonResponse({'status': 'pending', 'key': key}, status=202)
+    return JsonResponse({
+        'status': 'success',
+        'key': key,
+        'url': reverse('sign_render', args=[key]),
+    })
+
+@login_required(login_url="login")
+def sign_render_view(request, key):
+    """
+    Serves a rendered sequence with range support. Renders are immutable
+    (the key hashes their clips), so browsers may cache them indefinitely.
+    """
+    path = get_renderer().cached_path(key)
+    if path is None:
+        raise Http404('Rendered sequence not found')
+    response = ranged_file_response(request, path)
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+def sign_clip_view(request, name):
+    """
+    Serves a sign clip with range support and a strong ETag (the clip's
+    sha256), so browsers revalidate with a 304 instead of downloading again.
+    """
+    path = get_sign_index().path(name)
+    if path is None:
+        raise Http404('Sign clip not found')
+    entry = get_asset_metadata().get(name)
+    etag = f'"{entry["sha256"]}"' if entry else None
+    if etag and etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+    response = ranged_file_response(request, path)
+    if etag:
+        response['ETag'] = etag
+    response['Cache-Control'] = 'public, max-age=86400'
+    return response
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint for this process's stage timing histograms
+    and cache counters.
+    Requires "Authorization: Bearer <METRICS_TOKEN>" when METRICS_TOKEN is set.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    return HttpResponse(stage_metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @login_required(login_url="login")
 def history_view(request):
-    uploads = PPTUpload.objects.filter(user=request.user).order_by('-uploaded_at')
-    return render(request, 'history.html', {'uploads': uploads})
+    uploads, next_cursor = upload_page(request.user)
+    return render(request, 'history.html', {'uploads': uploads, 'next_cursor': next_cursor})
+
+def _history_item(upload):
+    uploaded_at = timezone.localtime(upload.uploaded_at)
+    return {
+        'id': upload.id,
+        'title': upload.title,
+        'uploaded_at': upload.uploaded_at.isoformat(),
+        'date': dateformat.format(uploaded_at, "M d, Y"),
+        'time': dateformat.format(uploaded_at, "H:i"),
+        'summary_url': reverse('summary', args=[upload.id]),
+        'quiz_url': reverse('quiz', args=[upload.id]),
+    }
+
+@login_required(login_url="login")
+def history_api(request):
+    """
+    Next page of the history list for infinite scroll:
+    GET ?cursor=<next_cursor>&limit=<n> -> {"uploads": [...], "next_cursor"}.
+    """
+    try:
+        limit = max(1, min(int(request.GET.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE))
+        uploads, next_cursor = upload_page(request.user, request.GET.get('cursor') or None, limit)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return JsonResponse({
+        'uploads': [_history_item(upload) for upload in uploads],
+        'next_cursor': next_cursor,
+    })